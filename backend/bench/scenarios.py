@@ -0,0 +1,409 @@
+"""
+Concurrent scenario runner: how many workflows one backend instance sustains.
+
+Every DEMO_EVENTS entry × region × affected product is sent as a chat turn
+through create_adk_agent(), with a scripted stub model standing in for the
+LLM so no network or API key is needed. The stub walks the same hand-offs
+the orchestrator prompt asks for (Demand → Inventory → Vendor if reorder →
+Routing if transfers → Alert if spike/reorder, or source_and_route in
+parallel mode) and calls the real tools.
+
+    cd backend
+    PYTHONPATH=. python -m bench.scenarios --concurrency 16 --repeat 4 --model-latency 0.05
+    PYTHONPATH=. python -m bench.scenarios --workflow-mode parallel
+"""
+import argparse
+import ast
+import asyncio
+import contextlib
+import gc
+import json
+import os
+import re
+import resource
+import sys
+import tracemalloc
+import uuid
+from time import perf_counter
+from typing import Any, Dict, List, Optional
+
+# Must be set before src.core.config is imported
+os.environ.setdefault("PROVIDER", "stub")
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+
+from ag_ui.core import EventType, RunAgentInput, UserMessage
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from src.data.products import DEMO_EVENTS, INITIAL_INVENTORY
+
+
+REGIONS = [w["name"].split()[0] for w in INITIAL_INVENTORY["warehouses"]]
+
+# Agent -> the tool the script calls for it, in workflow order
+STAGES = {
+    "forecast_demand": "DemandAgent",
+    "optimize_inventory": "InventoryAgent",
+    "negotiate_with_vendor": "VendorAgent",
+    "plan_delivery_route": "RoutingAgent",
+    "send_supply_alerts": "AlertAgent",
+}
+# Orchestrator tool in parallel mode: vendor and routing in one call
+FAN_OUT = "source_and_route"
+
+_QUOTED_RESULT = re.compile(
+    r"`(\w+)` tool returned result:\n<<<BEGIN_QUOTED_AGENT_CONTENT>>>\n(.*?)\n<<<END_QUOTED_AGENT_CONTENT>>>",
+    re.DOTALL,
+)
+_PARAM = re.compile(r"(\w+)=([\w-]+)")
+
+
+def build_scenarios(repeat: int = 1) -> List[Dict[str, str]]:
+    """Every demo event × every warehouse region × each affected product"""
+    scenarios = [
+        {
+            "name": event["name"],
+            "event": key,
+            "event_type": event["type"],
+            "region": region,
+            "product_sku": sku,
+        }
+        for key, event in DEMO_EVENTS.items()
+        for region in REGIONS
+        for sku in event["affected_products"]
+    ]
+    return scenarios * repeat
+
+
+def scenario_prompt(scenario: Dict[str, str]) -> str:
+    return (
+        f"{scenario['name']}. Run the replenishment workflow for "
+        f"product_sku={scenario['product_sku']} region={scenario['region']} "
+        f"event_type={scenario['event_type']}"
+    )
+
+
+# Scripted model
+
+def _call(name: str, **args) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[
+        types.Part(function_call=types.FunctionCall(name=name, args=args))
+    ]))
+
+
+def _text(text: str) -> LlmResponse:
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+def _history(llm_request: LlmRequest):
+    """Scenario parameters from the user turn, and every tool result so far"""
+    params: Dict[str, str] = {}
+    results: Dict[str, Dict[str, Any]] = {}
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.function_response is not None:
+                results[part.function_response.name] = part.function_response.response or {}
+            elif part.text:
+                if not params and content.role == "user":
+                    params = dict(_PARAM.findall(part.text))
+                for name, quoted in _QUOTED_RESULT.findall(part.text):
+                    with contextlib.suppress(ValueError, SyntaxError):
+                        results[name] = ast.literal_eval(quoted)
+    if FAN_OUT in results:
+        # Both branches are done, whichever of them had work to do
+        fanned = results[FAN_OUT]
+        results.setdefault("negotiate_with_vendor", fanned.get("vendor") or {})
+        results.setdefault("plan_delivery_route", fanned.get("routing") or {})
+    return params, results
+
+
+def _next_agent(results: Dict[str, Dict[str, Any]], parallel: bool = False) -> Optional[str]:
+    """The orchestrator's branching rules, applied to the results so far"""
+    forecast = results.get("forecast_demand", {})
+    inventory = results.get("optimize_inventory", {})
+    if "forecast_demand" not in results:
+        return "DemandAgent"
+    if "optimize_inventory" not in results:
+        return "InventoryAgent"
+    if parallel and _needs_fan_out(results):
+        return "SupplyChainOrchestrator"
+    if inventory.get("reorder_needed") and "negotiate_with_vendor" not in results:
+        return "VendorAgent"
+    if inventory.get("transfers") and "plan_delivery_route" not in results:
+        return "RoutingAgent"
+    if (forecast.get("spike_detected") or inventory.get("reorder_needed")) and "send_supply_alerts" not in results:
+        return "AlertAgent"
+    return None
+
+
+def _needs_fan_out(results: Dict[str, Dict[str, Any]]) -> bool:
+    inventory = results.get("optimize_inventory")
+    return (
+        inventory is not None
+        and FAN_OUT not in results
+        and bool(inventory.get("reorder_needed") or inventory.get("transfers"))
+    )
+
+
+def _tool_args(tool: str, params: Dict[str, str], results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    forecast = results.get("forecast_demand", {})
+    inventory = results.get("optimize_inventory", {})
+    vendor = results.get("negotiate_with_vendor", {})
+    urgency = "high" if forecast.get("spike_detected") else "normal"
+    if tool == "forecast_demand":
+        return {k: params.get(k) for k in ("product_sku", "region", "event_type")}
+    if tool == "optimize_inventory":
+        return {
+            "product_sku": params.get("product_sku"),
+            "region": params.get("region"),
+            "forecasted_demand": forecast.get("total_7day_demand", 0),
+        }
+    if tool == "negotiate_with_vendor":
+        return {
+            "product_sku": params.get("product_sku"),
+            "quantity": inventory.get("reorder_quantity", 0),
+            "urgency": urgency,
+        }
+    transfers = [
+        {**t, "to_warehouse": t.get("to_warehouse", inventory.get("target_warehouse"))}
+        for t in inventory.get("transfers") or []
+    ]
+    if tool == "plan_delivery_route":
+        return {"transfers": transfers, "urgency": urgency}
+    if tool == FAN_OUT:
+        return {
+            "product_sku": params.get("product_sku"),
+            "reorder_quantity": inventory.get("reorder_quantity", 0),
+            "transfers": transfers,
+            "urgency": urgency,
+        }
+    return {
+        "event_description": params.get("event_type", "event").replace("_", " ").title(),
+        "region": params.get("region"),
+        "spike_multiplier": forecast.get("spike_multiplier", 1.0),
+        "peak_demand": forecast.get("peak_demand", 0),
+        "reorder_quantity": inventory.get("reorder_quantity", 0),
+        "vendor_selected": vendor.get("vendor_selected", ""),
+        "total_cost": vendor.get("total_price", 0),
+        "severity": "critical" if forecast.get("spike_detected") and inventory.get("reorder_needed") else "high",
+    }
+
+
+def scripted_responder(llm_request: LlmRequest) -> LlmResponse:
+    """
+    Plays the workflow deterministically:
+    - An agent that owns a stage tool calls it once, then hands off
+    - Hand-offs follow the orchestrator's rules; the last agent summarises
+    - In parallel mode inventory hands back to the orchestrator, which calls
+      source_and_route
+    """
+    from src.core.config import settings
+
+    params, results = _history(llm_request)
+    own = next((tool for tool in STAGES if tool in llm_request.tools_dict), None)
+    if own is not None and own not in results:
+        return _call(own, **_tool_args(own, params, results))
+    if FAN_OUT in llm_request.tools_dict and _needs_fan_out(results):
+        return _call(FAN_OUT, **_tool_args(FAN_OUT, params, results))
+    next_agent = _next_agent(results, parallel=settings.workflow_mode == "parallel")
+    if next_agent is not None and "transfer_to_agent" in llm_request.tools_dict:
+        return _call("transfer_to_agent", agent_name=next_agent)
+    return _text(f"Workflow complete: {', '.join(results) or 'no actions'}")
+
+
+def install_stub(agent, latency: float) -> int:
+    """Point every stub model in the agent tree at the script; returns how many"""
+    from src.models import StubLlm
+
+    stubs = {}
+    pending = [agent]
+    while pending:
+        current = pending.pop()
+        pending.extend(current.sub_agents)
+        model = current.model
+        for candidate in (model, getattr(model, "inner", None), *(getattr(model, "models", None) or {}).values()):
+            if isinstance(candidate, StubLlm):
+                stubs[id(candidate)] = candidate
+            inner = getattr(candidate, "inner", None)
+            if isinstance(inner, StubLlm):
+                stubs[id(inner)] = inner
+            for tier in (getattr(inner, "models", None) or {}).values():
+                if isinstance(tier, StubLlm):
+                    stubs[id(tier)] = tier
+    for stub in stubs.values():
+        stub.responder = scripted_responder
+        stub.latency = latency
+    return len(stubs)
+
+
+# Measurement
+
+def percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def _watch_loop_lag(samples: List[float], stop: asyncio.Event, interval: float):
+    """How late a sleeping task wakes up: time the loop spent busy elsewhere"""
+    while not stop.is_set():
+        started = perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, perf_counter() - started - interval))
+
+
+async def _run_one(agent, scenario: Dict[str, str]) -> Dict[str, Any]:
+    run = RunAgentInput(
+        thread_id=f"bench-{uuid.uuid4().hex}",
+        run_id=uuid.uuid4().hex,
+        state={},
+        messages=[UserMessage(id=uuid.uuid4().hex, role="user", content=scenario_prompt(scenario))],
+        tools=[],
+        context=[],
+        forwarded_props={},
+    )
+    started = perf_counter()
+    first_event = None
+    events = tool_results = 0
+    tool_calls: Dict[str, int] = {}
+    error = None
+    async for event in agent.run(run):
+        events += 1
+        if first_event is None:
+            first_event = perf_counter() - started
+        if event.type == EventType.TOOL_CALL_START:
+            tool_calls[event.tool_call_name] = tool_calls.get(event.tool_call_name, 0) + 1
+        elif event.type == EventType.TOOL_CALL_RESULT:
+            tool_results += 1
+        elif event.type == EventType.RUN_ERROR:
+            error = getattr(event, "message", "run error")
+    return {
+        "scenario": f"{scenario['event']}/{scenario['region']}/{scenario['product_sku']}",
+        "latency": perf_counter() - started,
+        "first_event": first_event,
+        "events": events,
+        "tool_results": tool_results,
+        "tool_calls": tool_calls,
+        "error": error,
+    }
+
+
+async def run_scenarios(
+    scenarios: List[Dict[str, str]],
+    concurrency: int = 8,
+    model_latency: float = 0.0,
+    lag_interval: float = 0.01,
+    trace_memory: bool = False,
+) -> Dict[str, Any]:
+    from src.agents.factory import create_adk_agent
+    from src.agents.orchestrator import orchestrator
+
+    stubs = install_stub(orchestrator, model_latency)
+    if not stubs:
+        raise RuntimeError("No stub model found; run with PROVIDER=stub")
+    agent = create_adk_agent()
+
+    gc.collect()
+    if trace_memory:
+        tracemalloc.start()
+    memory_before = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    semaphore = asyncio.Semaphore(concurrency)
+    lag: List[float] = []
+    stop = asyncio.Event()
+
+    async def bounded(scenario):
+        async with semaphore:
+            return await _run_one(agent, scenario)
+
+    watcher = asyncio.create_task(_watch_loop_lag(lag, stop, lag_interval))
+    started = perf_counter()
+    runs = await asyncio.gather(*(bounded(s) for s in scenarios))
+    elapsed = perf_counter() - started
+    stop.set()
+    await watcher
+
+    gc.collect()
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    memory_after = tracemalloc.get_traced_memory()[0] if trace_memory else 0
+    if trace_memory:
+        tracemalloc.stop()
+    with contextlib.suppress(Exception):
+        await agent.close()
+
+    tool_calls: Dict[str, int] = {}
+    for r in runs:
+        for name, calls in r["tool_calls"].items():
+            tool_calls[name] = tool_calls.get(name, 0) + calls
+    latencies = [r["latency"] for r in runs]
+    first_events = [r["first_event"] for r in runs if r["first_event"] is not None]
+    count = len(runs)
+    report = {
+        "scenarios": count,
+        "concurrency": concurrency,
+        "model_latency_s": model_latency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_per_s": round(count / elapsed, 2) if elapsed else None,
+        "errors": sum(1 for r in runs if r["error"]),
+        "tool_results_per_run": round(sum(r["tool_results"] for r in runs) / max(count, 1), 2),
+        # Stage coverage: a stage missing here was never exercised
+        "tool_calls": dict(sorted(tool_calls.items())),
+        "latency_ms": {
+            f"p{int(q * 100)}": round(percentile(latencies, q) * 1000, 2) for q in (0.5, 0.95, 0.99)
+        },
+        "first_event_ms": {
+            f"p{int(q * 100)}": round(percentile(first_events, q) * 1000, 2) for q in (0.5, 0.95, 0.99)
+        } if first_events else {},
+        "loop_lag_ms": {
+            "p50": round((percentile(lag, 0.5) or 0) * 1000, 3),
+            "p99": round((percentile(lag, 0.99) or 0) * 1000, 3),
+            "max": round(max(lag, default=0) * 1000, 3),
+        },
+        # ru_maxrss is KiB on Linux; a peak, so it only grows
+        "rss_peak_growth_kb_per_session": round((rss_after - rss_before) / max(count, 1), 1),
+    }
+    if trace_memory:
+        report["retained_kb_per_session"] = round((memory_after - memory_before) / 1024 / max(count, 1), 1)
+    report["failures"] = [r for r in runs if r["error"]][:5]
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=1, help="run the scenario set this many times")
+    parser.add_argument("--model-latency", type=float, default=0.0, help="seconds per stub model call")
+    parser.add_argument("--lag-interval", type=float, default=0.01)
+    parser.add_argument(
+        "--workflow-mode", choices=["sequential", "parallel"],
+        help="overrides WORKFLOW_MODE; parallel routes vendor + routing through source_and_route",
+    )
+    parser.add_argument("--tracemalloc", action="store_true", help="measure retained Python memory per session")
+    parser.add_argument("--output", help="also write the report as JSON to this path")
+    args = parser.parse_args(argv)
+    if args.workflow_mode:
+        # Read when the agent tree is imported, inside run_scenarios
+        os.environ["WORKFLOW_MODE"] = args.workflow_mode
+
+    report = asyncio.run(run_scenarios(
+        build_scenarios(args.repeat),
+        concurrency=args.concurrency,
+        model_latency=args.model_latency,
+        lag_interval=args.lag_interval,
+        trace_memory=args.tracemalloc,
+    ))
+    encoded = json.dumps(report, indent=2)
+    print(encoded)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(encoded + "\n")
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,415 @@
+"""
+Micro-benchmarks for the tool services: per-call latency of each service
+method as catalog size, warehouses, suppliers, transfers and open alert
+windows grow.
+
+Data sets are synthetic copies of src/data/products.py scaled up, swapped
+into the service modules for the duration of one case. Every run is
+normalised by a fixed pure-Python calibration loop, so a baseline recorded
+on one machine can be compared on another.
+
+    cd backend
+    PYTHONPATH=. python -m bench.services                      # compare with the baseline
+    PYTHONPATH=. python -m bench.services --save-baseline      # record a new one
+    PYTHONPATH=. python -m bench.services --only forecast_demand --output /tmp/run.json
+"""
+import argparse
+import asyncio
+import contextlib
+import copy
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from statistics import mean
+from time import perf_counter
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+
+from src.data import products as data
+from src.tools import demand, inventory, stock, vendor
+from src.tools.alert import AlertAgent
+from src.tools.demand import DemandAgent
+from src.tools.inventory import InventoryAgent
+from src.tools.network import RoadRailNetwork
+from src.tools.notifications import NotificationDispatcher, StubSMTPSink, StubWebhookSink
+from src.tools.routing import RoutingAgent
+from src.tools.stock import StockMatrix
+from src.tools.suppression import AlertSuppressor
+from src.tools.vendor import VendorAgent
+from src.utils.audit_log import AuditLog
+
+
+BASELINE = Path(__file__).parent / "baselines" / "services.json"
+
+# Defaults for the parameters a case doesn't sweep
+BASE_SCALE = {"products": 100, "warehouses": 5, "suppliers": 5, "transfers": 5, "open_windows": 0}
+
+REAL_WAREHOUSES = [w["id"] for w in data.INITIAL_INVENTORY["warehouses"]]
+CITIES = {"WH-MUM": "Mumbai", "WH-DEL": "Delhi", "WH-BLR": "Bangalore", "WH-CHN": "Chennai", "WH-KOL": "Kolkata"}
+
+
+# Synthetic data
+
+def scaled_data(products: int, warehouses: int, suppliers: int) -> Dict[str, Dict]:
+    """
+    PRODUCT_CATALOG, INITIAL_INVENTORY and SUPPLIERS grown to the given sizes:
+    - Extra products clone real ones under new SKUs with the same prefix,
+      so supplier matching by product type still works
+    - Extra warehouses stock every SKU; extra suppliers repeat the real
+      specialties
+    """
+    catalog = copy.deepcopy(data.PRODUCT_CATALOG)
+    real = [p for c in catalog["categories"] for p in c["products"]]
+    extra = {"id": "bench", "name": "Bench", "products": []}
+    for n in range(max(0, products - len(real))):
+        template = real[n % len(real)]
+        extra["products"].append({**template, "sku": f"{template['sku']}-B{n:05d}"})
+    catalog["categories"].append(extra)
+    skus = [p["sku"] for c in catalog["categories"] for p in c["products"]]
+
+    inventory_data = copy.deepcopy(data.INITIAL_INVENTORY)
+    for wh in inventory_data["warehouses"]:
+        for j, sku in enumerate(skus):
+            wh["stock"].setdefault(sku, 50 + (j * 37) % 400)
+    for n in range(max(0, warehouses - len(inventory_data["warehouses"]))):
+        inventory_data["warehouses"].append({
+            "id": f"WH-B{n:04d}",
+            "name": f"Bench Warehouse {n}",
+            "location": "Bench",
+            "capacity": 50000,
+            "stock": {sku: 100 + (n * 13 + j * 7) % 500 for j, sku in enumerate(skus)},
+        })
+
+    suppliers_data = copy.deepcopy(data.SUPPLIERS)
+    real_suppliers = list(suppliers_data["suppliers"])
+    for n in range(max(0, suppliers - len(real_suppliers))):
+        template = real_suppliers[n % len(real_suppliers)]
+        suppliers_data["suppliers"].append({
+            **template,
+            "id": f"SUP-B{n:05d}",
+            "name": f"{template['name']} {n}",
+            "rating": 80 + n % 20,
+        })
+
+    return {"catalog": catalog, "inventory": inventory_data, "suppliers": suppliers_data}
+
+
+@contextlib.contextmanager
+def installed(dataset: Dict[str, Dict]) -> Iterator[None]:
+    """Point the service modules at a data set for the duration of a case"""
+    with contextlib.ExitStack() as stack:
+        for module in (demand, inventory, stock):
+            stack.enter_context(mock.patch.object(module, "PRODUCT_CATALOG", dataset["catalog"]))
+        for module in (inventory, stock):
+            stack.enter_context(mock.patch.object(module, "INITIAL_INVENTORY", dataset["inventory"]))
+        stack.enter_context(mock.patch.object(vendor, "SUPPLIERS", dataset["suppliers"]))
+        yield
+
+
+def last_sku(dataset: Dict[str, Dict], prefix: str = "RC-") -> str:
+    """The last SKU with prefix: worst case for catalog scans"""
+    skus = [p["sku"] for c in dataset["catalog"]["categories"] for p in c["products"]]
+    return next(sku for sku in reversed(skus) if sku.startswith(prefix))
+
+
+# Cases
+
+@dataclass
+class Case:
+    method: str
+    param: str
+    values: Sequence[int]
+    # scale -> (data set, call, teardown or None); call() is awaited once per iteration
+    setup: Callable[[Dict[str, int]], Awaitable[tuple]]
+
+
+async def _forecast(scale):
+    dataset = scaled_data(scale["products"], scale["warehouses"], scale["suppliers"])
+    svc = DemandAgent(demo_mode=True)
+    sku = last_sku(dataset)
+    return dataset, (lambda: svc.forecast_demand(sku, "Mumbai", "cyclone")), None
+
+
+async def _optimize(scale):
+    dataset = scaled_data(scale["products"], scale["warehouses"], scale["suppliers"])
+    with installed(dataset):
+        svc = InventoryAgent(demo_mode=True, stock=StockMatrix.from_catalog())
+    sku = last_sku(dataset)
+    return dataset, (lambda: svc.optimize_inventory(sku, "Mumbai", 5000)), svc.stock.close
+
+
+async def _warehouse_status(scale):
+    dataset = scaled_data(scale["products"], scale["warehouses"], scale["suppliers"])
+    with installed(dataset):
+        svc = InventoryAgent(demo_mode=True, stock=StockMatrix.from_catalog())
+
+    async def call():
+        return svc.get_warehouse_status()
+
+    return dataset, call, svc.stock.close
+
+
+async def _negotiate(scale):
+    dataset = scaled_data(scale["products"], scale["warehouses"], scale["suppliers"])
+    svc = VendorAgent(demo_mode=True)
+    return dataset, (lambda: svc.negotiate_with_vendor("RC-FULL-NVY-M", 500, "high")), None
+
+
+def _transfers(count: int) -> List[Dict[str, Any]]:
+    pairs = [(a, b) for a in REAL_WAREHOUSES for b in CITIES.values() if CITIES[a] != b]
+    return [
+        {"from_warehouse": pairs[n % len(pairs)][0], "to_warehouse": pairs[n % len(pairs)][1],
+         "quantity": 40 + n % 160}
+        for n in range(count)
+    ]
+
+
+_network = None
+
+
+def _road_network():
+    global _network
+    if _network is None:
+        _network = RoadRailNetwork.load()
+    return _network
+
+
+async def _routes(scale, consolidate: bool = False):
+    dataset = scaled_data(scale["products"], scale["warehouses"], scale["suppliers"])
+    svc = RoutingAgent(demo_mode=True, network=_road_network())
+    transfers = _transfers(scale["transfers"])
+    return dataset, (lambda: svc.plan_delivery_route(transfers, "high", consolidate)), None
+
+
+async def _routes_consolidated(scale):
+    return await _routes(scale, consolidate=True)
+
+
+async def _alerts(scale):
+    dataset = scaled_data(scale["products"], scale["warehouses"], scale["suppliers"])
+    directory = tempfile.TemporaryDirectory()
+    dispatcher = NotificationDispatcher(
+        sinks={"slack": StubWebhookSink(), "email": StubSMTPSink()},
+        rate_limits={"slack": 1e6, "email": 1e6},
+    )
+    suppressor = AlertSuppressor(window_seconds=3600, max_windows=scale["open_windows"] + 100_000)
+    for n in range(scale["open_windows"]):
+        suppressor.check(AlertSuppressor.make_key(f"open {n}", "Mumbai", "RC-FULL-NVY-M"), "high", f"A{n}")
+    audit = AuditLog(directory.name)
+    svc = AlertAgent(demo_mode=True, dispatcher=dispatcher, suppressor=suppressor, audit_log=audit)
+    counter = iter(range(10**9))
+
+    def call():
+        # A new event each time, so every call takes the full send path
+        n = next(counter)
+        return svc.send_alerts(
+            event_summary={
+                "event": {"description": f"Bench event {n}", "region": "Mumbai", "product_sku": "RC-FULL-NVY-M"},
+                "demand": {"spike_multiplier": 12, "peak_demand": 96},
+                "procurement": {"quantity": 305, "vendor": "RainShield Fashion", "cost": 96380},
+            },
+            severity="high",
+        )
+
+    async def teardown():
+        await dispatcher.close()
+        audit.close()
+        directory.cleanup()
+
+    return dataset, call, teardown
+
+
+CASES = [
+    Case("forecast_demand", "products", (10, 100, 1000, 10000), _forecast),
+    Case("optimize_inventory", "warehouses", (5, 25, 100, 400), _optimize),
+    Case("optimize_inventory", "products", (10, 100, 1000, 10000), _optimize),
+    Case("get_warehouse_status", "warehouses", (5, 25, 100, 400), _warehouse_status),
+    Case("get_warehouse_status", "products", (10, 100, 1000, 10000), _warehouse_status),
+    Case("negotiate_with_vendor", "suppliers", (5, 50, 500, 5000), _negotiate),
+    Case("plan_delivery_route", "transfers", (1, 10, 100, 1000), _routes),
+    Case("plan_delivery_route[consolidate]", "transfers", (1, 10, 50, 200), _routes_consolidated),
+    Case("send_alerts", "open_windows", (0, 1000, 10000, 50000), _alerts),
+]
+
+
+# Measurement
+
+def calibrate(rounds: int = 5) -> float:
+    """Microseconds for a fixed pure-Python workload: this machine's speed"""
+    def workload():
+        total = 0
+        table = {}
+        for i in range(20000):
+            table[i % 97] = total
+            total += i * 3 % 7
+        return total
+
+    best = float("inf")
+    for _ in range(rounds):
+        started = perf_counter()
+        workload()
+        best = min(best, perf_counter() - started)
+    return best * 1e6
+
+
+def _percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def measure(
+    call: Callable[[], Awaitable], min_time: float, max_iterations: int, rounds: int = 5
+) -> Dict[str, Any]:
+    """
+    Time call() in several rounds with the garbage collector paused.
+    p50_us is the best round's median: steadier run to run than one long
+    median on a shared machine, so it is what baselines compare.
+    """
+    for _ in range(3):
+        await call()  # warm caches (cost table, route conditions, lazy imports)
+    samples: List[float] = []
+    round_p50s: List[float] = []
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            taken: List[float] = []
+            deadline = perf_counter() + min_time / rounds
+            while len(taken) < max_iterations // rounds and (len(taken) < 3 or perf_counter() < deadline):
+                started = perf_counter()
+                await call()
+                taken.append((perf_counter() - started) * 1e6)
+            round_p50s.append(_percentile(taken, 0.5))
+            samples.extend(taken)
+    finally:
+        gc.enable()
+    return {
+        "iterations": len(samples),
+        "mean_us": round(mean(samples), 2),
+        "p50_us": round(min(round_p50s), 2),
+        "p95_us": round(_percentile(samples, 0.95), 2),
+        "min_us": round(min(samples), 2),
+        "ops_per_s": round(1e6 / mean(samples), 1),
+    }
+
+
+async def run_cases(
+    cases: Sequence[Case], min_time: float, max_iterations: int, calibration_us: float
+) -> List[Dict[str, Any]]:
+    results = []
+    for case in cases:
+        for value in case.values:
+            scale = {**BASE_SCALE, case.param: value}
+            dataset, call, teardown = await case.setup(scale)
+            with installed(dataset):
+                stats = await measure(call, min_time, max_iterations)
+            if teardown is not None:
+                done = teardown()
+                if asyncio.iscoroutine(done):
+                    await done
+            results.append({
+                "key": f"{case.method}[{case.param}={value}]",
+                "method": case.method,
+                "param": case.param,
+                "value": value,
+                **stats,
+                "normalized_p50": round(stats["p50_us"] / calibration_us, 5),
+            })
+            print(
+                f"{results[-1]['key']:<52} p50 {stats['p50_us']:>10.1f}µs  "
+                f"p95 {stats['p95_us']:>10.1f}µs  ({stats['iterations']} runs)",
+                file=sys.stderr,
+            )
+    return results
+
+
+# Baselines
+
+def _git_commit() -> Optional[str]:
+    with contextlib.suppress(Exception):
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    return None
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Cases whose calibrated p50 grew by more than tolerance (0.5 = 50%)
+    over the baseline; keys missing from the baseline are skipped.
+    """
+    previous = {r["key"]: r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result["key"])
+        if before is None or not before.get("normalized_p50"):
+            continue
+        ratio = result["normalized_p50"] / before["normalized_p50"]
+        result["vs_baseline"] = round(ratio, 3)
+        if ratio > 1 + tolerance:
+            regressions.append({
+                "key": result["key"],
+                "ratio": round(ratio, 2),
+                "p50_us": result["p50_us"],
+                "baseline_p50_us": before["p50_us"],
+            })
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--only", help="comma-separated method names to run")
+    parser.add_argument("--min-time", type=float, default=0.25, help="seconds measured per case value")
+    parser.add_argument("--max-iterations", type=int, default=2000)
+    parser.add_argument("--baseline", default=str(BASELINE), help="baseline JSON to compare with")
+    parser.add_argument("--save-baseline", action="store_true", help="write this run as the baseline")
+    parser.add_argument("--tolerance", type=float, default=1.0, help="allowed p50 growth before failing (1.0 = 2x)")
+    parser.add_argument("--output", help="also write the results as JSON to this path")
+    args = parser.parse_args(argv)
+
+    cases = CASES
+    if args.only:
+        wanted = set(args.only.split(","))
+        cases = [c for c in CASES if c.method in wanted or c.method.split("[")[0] in wanted]
+
+    calibration_us = calibrate()
+    results = asyncio.run(run_cases(cases, args.min_time, args.max_iterations, calibration_us))
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "calibration_us": round(calibration_us, 2),
+            "base_scale": BASE_SCALE,
+        },
+        "results": results,
+    }
+
+    baseline_path = Path(args.baseline)
+    regressions: List[Dict] = []
+    if args.save_baseline:
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Baseline written to {baseline_path}", file=sys.stderr)
+    elif baseline_path.exists():
+        regressions = compare(results, json.loads(baseline_path.read_text()), args.tolerance)
+        report["regressions"] = regressions
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2) + "\n")
+    print(json.dumps({"calibration_us": report["meta"]["calibration_us"], "regressions": regressions}, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
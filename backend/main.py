@@ -1,15 +1,185 @@
-import uvicorn
-from fastapi import FastAPI
+from src.core.startup import startup
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
 
-from ag_ui_adk import add_adk_fastapi_endpoint
+import uvicorn
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse
+from starlette.routing import Match
 
 from src.core.config import settings
-from src.agents.factory import create_adk_agent
+from src.agents import tracer
+from src.tools.api import router as services_api
+from src.utils.admission import AdmissionController, AdmissionMiddleware
+from src.utils.log import CorrelationMiddleware, configure_logging, get_logger
+from src.tools.pipeline import PipelineRequest, StepFailed, run_pipeline
+from src.utils.metrics import render_prometheus
+from src.utils.state import SupplyChainState
+
+startup.mark("imports_done")
+
+configure_logging(settings.log_level, settings.log_format, settings.log_queue_size)
+log = get_logger("main")
+
+# The agent tree, its model clients and ag_ui_adk are the bulk of cold start.
+# They are built off the event loop after the server is up ("background"),
+# on the first chat request ("lazy"), or before serving ("eager").
+_agent_task: Optional[asyncio.Task] = None
+
+AGENT_PATH = "/"
+
+# Chat turns over the limits wait in a bounded queue, then get 429/503.
+# Each worker enforces its share of the limits, as model pacing does.
+_workers = max(1, settings.workers)
+admission = AdmissionController(
+    max_active=max(1, settings.admission_max_active // _workers),
+    max_per_user=max(1, settings.admission_max_per_user // _workers),
+    max_queue=max(1, settings.admission_max_queue // _workers),
+    queue_timeout_seconds=settings.admission_queue_timeout,
+)
+
+
+def _build_agent():
+    with startup.phase("import agent tree"):
+        from ag_ui_adk import add_adk_fastapi_endpoint
+        from src.agents.factory import create_adk_agent
+        from src.tools.tools import warm_services
+    with startup.phase("build services"):
+        warm_services()
+    with startup.phase("create ADK agent"):
+        agent = create_adk_agent()
+    return add_adk_fastapi_endpoint, agent
+
+
+async def _warm_up():
+    register, agent = await asyncio.to_thread(_build_agent)
+    # Routes are added on the loop thread; requests that arrived meanwhile
+    # were held by AgentReadyMiddleware
+    with startup.phase("register chat endpoint"):
+        register(app, agent, path=AGENT_PATH)
+        app.state.adk_agent = agent
+    startup.mark("agent_ready")
+    log.info("Agent ready {:.2f}s after process start", startup.milestones["agent_ready"])
+
+
+def ensure_agent() -> asyncio.Task:
+    global _agent_task
+    if _agent_task is None:
+        _agent_task = asyncio.create_task(_warm_up())
+    return _agent_task
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.warmup == "eager":
+        await ensure_agent()
+    elif settings.warmup == "background":
+        ensure_agent()
+    startup.mark("serving")
+    yield
+
+
+class AgentReadyMiddleware:
+    """Holds requests for routes that don't exist yet until the agent is built"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and not startup.milestones.get("agent_ready"):
+            routes = scope["app"].router.routes
+            if not any(route.matches(scope)[0] != Match.NONE for route in routes):
+                await asyncio.shield(ensure_agent())
+        await self.app(scope, receive, send)
+
+
+app = FastAPI(title=settings.app_name, lifespan=lifespan)
+app.add_middleware(AgentReadyMiddleware)
+app.add_middleware(
+    AdmissionMiddleware,
+    controller=admission,
+    paths=[AGENT_PATH],
+    user_header=settings.user_id_header,
+    default_user=settings.default_user,
+)
+app.add_middleware(CorrelationMiddleware)
+app.include_router(services_api)
+
+
+@app.post("/pipeline", response_model=SupplyChainState)
+async def pipeline(request: PipelineRequest):
+    """Run the full replenishment workflow in code, without the LLM agents"""
+    try:
+        return await run_pipeline(request)
+    except StepFailed as exc:
+        raise HTTPException(status_code=exc.status, detail=exc.message)
+
+
+@app.get("/execution-trace/{trace_id}")
+def execution_trace(trace_id: str):
+    from src.tools.tools import get_trace_payload
+
+    payload = get_trace_payload(trace_id)
+    if payload is None:
+        raise HTTPException(status_code=404, detail=f"Trace {trace_id} not found")
+    return payload
+
+
+@app.get("/spans")
+def recent_spans(limit: int = 20):
+    return tracer.recent(limit)
+
+
+@app.get("/spans/{trace_id}")
+def span_waterfall(trace_id: str):
+    waterfall = tracer.waterfall(trace_id)
+    if waterfall is None:
+        raise HTTPException(status_code=404, detail=f"Span trace {trace_id} not found")
+    return waterfall
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get("/startup")
+def startup_report():
+    """Cold-start phases and milestones, in seconds"""
+    return startup.report()
+
+
+@app.get("/admission")
+def admission_stats():
+    """Chat turns running and queued, per user, and the current Retry-After"""
+    return admission.stats()
 
-app = FastAPI(title=settings.app_name)
 
-adk_supply_chain_agent = create_adk_agent()
-add_adk_fastapi_endpoint(app, adk_supply_chain_agent, path="/")
+startup.mark("app_created")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=settings.port)
+    if settings.workers > 1:
+        # Workers re-read settings from the environment: give them one stock
+        # matrix, and one session store, since any worker may take a chat's
+        # next turn (uvicorn's workers share one socket, so there is no
+        # sticky routing)
+        os.environ["SHARED_STOCK"] = "true"
+        if settings.session_store != "tiered":
+            log.warning(
+                "SESSION_STORE={} keeps sessions per worker; using tiered with WORKERS={}",
+                settings.session_store,
+                settings.workers,
+            )
+        os.environ["SESSION_STORE"] = "tiered"
+        os.environ["SESSION_SHARED"] = "true"
+        # Holds from an earlier run will never be routed: drop them before workers start
+        from src.tools.stock import StockMatrix
+        StockMatrix.from_catalog(settings.shared_stock_path).reset_reservations()
+        uvicorn.run("main:app", host="0.0.0.0", port=settings.port, workers=settings.workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=settings.port)
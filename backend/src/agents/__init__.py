@@ -1,14 +1,128 @@
 import os
+from functools import lru_cache
+
 from src.core.config import settings
-from google.adk.models.lite_llm import LiteLlm
+from src.utils.tracing import SpanTracer
+
+# Model clients (google-adk models, litellm) are imported and built on first
+# use, not when this package is imported, so the server can start serving
+# before the agent tree exists.
 
 GEMINI_MODEL = "gemini-2.5-flash-lite" # INFO: Switch this provider If you have Gemini Subscription, Or Free Access.
-OPENAI_MODEL = LiteLlm(model="openai/gpt-4o-mini", temperature=0.2) # INFO: OpenAI Only providing the LLM Service with Payment.
+OPENAI_MODEL_NAME = "openai/gpt-4o-mini" # INFO: OpenAI Only providing the LLM Service with Payment.
+OPENAI_PARAMS = {"temperature": 0.2}
+
+tracer = SpanTracer(settings.span_export_path)
+
+
+def _export_api_keys():
+    os.environ["GOOGLE_API_KEY"] = settings.google_api_key
+    os.environ["OPENAI_API_KEY"] = settings.openai_api_key
+
+
+@lru_cache(maxsize=None)
+def _pacing_buckets():
+    """Request and token buckets shared by every provider model in this process"""
+    from src.utils.rate_limit import TokenBucket
+    workers = max(1, settings.workers)  # each worker paces its share of the limits
+    requests = tokens = None
+    if settings.model_rpm > 0:
+        requests = TokenBucket(settings.model_rpm / 60 / workers, settings.model_burst)
+    if settings.model_tpm > 0:
+        # Providers count tokens per minute: allow up to a minute's share at once
+        tokens = TokenBucket(settings.model_tpm / 60 / workers, settings.model_tpm / workers)
+    return requests, tokens
+
+
+def _paced(llm):
+    """The provider model behind the shared buckets, when a rate limit is set"""
+    if settings.model_rpm <= 0 and settings.model_tpm <= 0:
+        return llm
+    from google.adk.models import LLMRegistry
+    from src.models import PacedLlm
+    inner = LLMRegistry.new_llm(llm) if isinstance(llm, str) else llm
+    requests, tokens = _pacing_buckets()
+    return PacedLlm(model=inner.model, inner=inner, requests=requests, tokens=tokens)
+
+
+@lru_cache(maxsize=None)
+def default_model():
+    """The shared model for the configured provider, built once"""
+    _export_api_keys()
+    if settings.provider == "stub":
+        from src.models import StubLlm
+        return _paced(StubLlm())  # offline, no API key needed
+    if settings.provider == "google":
+        return _paced(GEMINI_MODEL)
+    from google.adk.models.lite_llm import LiteLlm
+    return _paced(LiteLlm(model=OPENAI_MODEL_NAME, **OPENAI_PARAMS))
+
+
+@lru_cache(maxsize=None)
+def _llm_cache():
+    from src.models import ResponseCache
+    return ResponseCache(
+        max_entries=settings.llm_cache_max_entries,
+        ttl_seconds=settings.llm_cache_ttl,
+        directory=settings.llm_cache_dir or None,
+    )
+
+
+@lru_cache(maxsize=None)
+def _tier_models():
+    """Fast and strong model per tier for the configured provider"""
+    _export_api_keys()
+    if settings.provider == "stub":
+        from src.models import StubLlm
+        return {
+            "fast": _paced(StubLlm(model="stub-fast", latency=0.05)),
+            "strong": _paced(StubLlm(model="stub-strong", latency=0.3)),
+        }
+    tiers = settings.model_tiers[settings.provider]
+    if settings.provider == "openai":
+        from google.adk.models.lite_llm import LiteLlm
+        return {
+            tier: _paced(LiteLlm(model=name, **OPENAI_PARAMS)) for tier, name in tiers.items()
+        }
+    from google.adk.models import LLMRegistry
+    return {tier: _paced(LLMRegistry.new_llm(name)) for tier, name in tiers.items()}
+
+
+def model_for(agent_name: str):
+    """
+    The model an agent runs on:
+    - The shared model, or a per-agent router over the model tiers
+    - Behind the response cache if the agent opted in
+    """
+    if settings.model_routing:
+        from src.models import RoutedLlm
+        inner = RoutedLlm(
+            model=f"routed:{agent_name}",
+            agent_name=agent_name,
+            models=_tier_models(),
+            costs=settings.model_costs,
+            strong_agents=settings.router_strong_agents,
+            long_prompt_tokens=settings.router_long_prompt_tokens,
+        )
+    elif agent_name in settings.llm_cache_agents:
+        from google.adk.models import LLMRegistry
+        model = default_model()
+        inner = LLMRegistry.new_llm(model) if isinstance(model, str) else model
+    else:
+        return default_model()
+    if agent_name not in settings.llm_cache_agents:
+        return inner
+    from src.models import CachedLlm
+    return CachedLlm(
+        model=inner.model,
+        inner=inner,
+        cache=_llm_cache(),
+        params=OPENAI_PARAMS if settings.provider == "openai" else {},
+    )
 
-_MODEL = GEMINI_MODEL if settings.provider == "google" else OPENAI_MODEL
-os.environ["GOOGLE_API_KEY"] = settings.google_api_key
-os.environ["OPENAI_API_KEY"] = settings.openai_api_key
 
 __all__ = [
-    "_MODEL",
-]
\ No newline at end of file
+    "default_model",
+    "model_for",
+    "tracer",
+]
@@ -1,6 +1,6 @@
 from google.adk.agents import LlmAgent
 
-from src.agents import _MODEL
+from src.agents import model_for, tracer
 from src.tools import (
     send_supply_alerts,
 )
@@ -8,7 +8,7 @@ from src.tools import (
 
 alert_agent = LlmAgent(
     name="AlertAgent",
-    model=_MODEL,
+    model=model_for("AlertAgent"),
     description="""
     Communication Specialist. Your job is to send clear, actionable alerts to stakeholders.
     - Use send_supply_alerts as your ONLY tool to send notifications.
@@ -17,4 +17,5 @@ alert_agent = LlmAgent(
     - Your alerts should be concise, informative, and include all relevant details for decision-making.
     """,
     tools=[send_supply_alerts],
+    **tracer.callbacks(),
 )
\ No newline at end of file
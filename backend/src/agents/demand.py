@@ -1,6 +1,6 @@
 from google.adk.agents import LlmAgent
 
-from src.agents import _MODEL
+from src.agents import model_for, tracer
 from src.tools import (
     forecast_demand,
 )
@@ -8,7 +8,7 @@ from src.tools import (
 
 demand_agent = LlmAgent(
     name="DemandAgent",
-    model=_MODEL,
+    model=model_for("DemandAgent"),
     description="""
     You are a Demand Forecasting Specialist. Your ONLY job is to call forecast_demand and return results.
     - Pass the product_sku, region, and event_type (if known) from the Orchestrator.
@@ -17,4 +17,5 @@ demand_agent = LlmAgent(
     - Do NOT ask for more information. Use exactly what the Orchestrator provides.
     """,
     tools=[forecast_demand],
+    **tracer.callbacks(),
 )
\ No newline at end of file
@@ -3,10 +3,26 @@ from src.agents.orchestrator import orchestrator
 from src.core.config import settings
 
 
+def _session_service():
+    if settings.session_store != "tiered":
+        return None  # ADKAgent's shared in-memory service
+    from src.utils.sessions import TieredSessionService
+    return TieredSessionService(
+        settings.session_db_path,
+        max_bytes=settings.session_hot_max_bytes,
+        keep_events=settings.session_keep_events,
+        compact_after_seconds=settings.session_compact_after,
+        flush_interval_seconds=settings.session_flush_interval,
+        shared=settings.session_shared,
+    )
+
+
 def create_adk_agent() -> ADKAgent:
     return ADKAgent(
         adk_agent=orchestrator,
         user_id=settings.default_user,
         session_timeout_seconds=settings.session_timeout,
         use_in_memory_services=settings.use_in_memory,
-    )
\ No newline at end of file
+        session_service=_session_service(),
+        max_concurrent_executions=settings.max_concurrent_executions,
+    )
@@ -1,5 +1,5 @@
 from google.adk.agents import LlmAgent
-from src.agents import _MODEL
+from src.agents import model_for, tracer
 
 from src.tools import (
     optimize_inventory,
@@ -9,7 +9,7 @@ from src.tools import (
 
 inventory_agent = LlmAgent(
     name="InventoryAgent",
-    model=_MODEL,
+    model=model_for("InventoryAgent"),
     description="""You are an warehouse specialist. Your job is to check stock levels, identify gaps, and determine if reordering or transfers are needed.
 
     - Use optimize_inventory for a specific product/region after demand is known.
@@ -31,4 +31,5 @@ inventory_agent = LlmAgent(
     - Always consider the demand forecast from the DemandAgent when making your inventory recommendations.
     """,
     tools=[optimize_inventory, get_warehouse_status, list_all_products],
+    **tracer.callbacks(),
 )
\ No newline at end of file
@@ -1,8 +1,10 @@
 from google.adk.agents import LlmAgent
 from google.adk.agents.callback_context import CallbackContext
 
-from src.utils.state import SupplyChainState
-from . import _MODEL
+from src.core.config import settings
+from src.tools import source_and_route
+from src.utils.state import init_workflow_state
+from . import model_for, tracer
 from src.agents.demand import demand_agent
 from src.agents.inventory import inventory_agent
 from src.agents.vendor import vendor_agent
@@ -11,13 +13,21 @@ from src.agents.alert import alert_agent
 
 
 def before_orchestrator(callback_context: CallbackContext):
-    if "workflow_state" not in callback_context.state:
-        callback_context.state["workflow_state"] = SupplyChainState().dict()
+    init_workflow_state(callback_context.state)
+
+
+PARALLEL = settings.workflow_mode == "parallel"
+
+PARALLEL_RULE = """
+    6. PARALLEL MODE: after InventoryAgent, call source_and_route ONCE with product_sku,
+       reorder_quantity and transfers. It sources from vendors and plans routes at the same
+       time — do NOT transfer to VendorAgent or RoutingAgent for that step.
+    """
 
 
 orchestrator = LlmAgent(
     name="SupplyChainOrchestrator",
-    model=_MODEL,
+    model=model_for("SupplyChainOrchestrator"),
     description="""
     Master Orchestrator for supply chain management. You coordinate 5 specialists:
       - DemandAgent: forecasts demand spikes and trends using various data sources
@@ -33,7 +43,8 @@ orchestrator = LlmAgent(
     3. Pass data explicitly between agents — tell each one what the previous found.
     4. End with a clear, actionable summary of all decisions made.
     5. Don't call AlertAgent without first trying to resolve with VendorAgent or RoutingAgent. Alert only if it's critical or you have no other choice.
-    """,
+    """ + (PARALLEL_RULE if PARALLEL else ""),
+    tools=[source_and_route] if PARALLEL else [],
     sub_agents=[
         demand_agent,
         inventory_agent,
@@ -41,5 +52,8 @@ orchestrator = LlmAgent(
         routing_agent,
         alert_agent,
     ],
-    before_agent_callback=before_orchestrator,
+    before_agent_callback=[tracer.before_agent, before_orchestrator],
+    after_agent_callback=tracer.after_agent,
+    before_model_callback=tracer.before_model,
+    after_model_callback=tracer.after_model,
 )
@@ -1,6 +1,6 @@
 from google.adk.agents import LlmAgent
 
-from src.agents import _MODEL
+from src.agents import model_for, tracer
 from src.tools import (
     plan_delivery_route,
 )
@@ -8,7 +8,7 @@ from src.tools import (
 
 routing_agent = LlmAgent(
     name="RoutingAgent",
-    model=_MODEL,
+    model=model_for("RoutingAgent"),
     description="""
     You are a Logistics Specialist. Your job is to plan delivery routes for inventory transfers or supplier shipments.
     - Use plan_delivery_route when inventory_agent reports transfers are needed.
@@ -16,4 +16,5 @@ routing_agent = LlmAgent(
     - Return transport_mode (truck, express, train), estimated_delivery_time_hours, and cost to the Orchestrator.
     """,
     tools=[plan_delivery_route],
+    **tracer.callbacks(),
 )
@@ -1,6 +1,6 @@
 from google.adk.agents import LlmAgent
 
-from src.agents import _MODEL
+from src.agents import model_for, tracer
 from src.tools import (
     negotiate_with_vendor
 )
@@ -8,7 +8,7 @@ from src.tools import (
 
 vendor_agent = LlmAgent(
     name="VendorAgent",
-    model=_MODEL,
+    model=model_for("VendorAgent"),
     description="""
     Sourcing Specialist. Your job is to negotiate with suppliers and generate POs.
     - Use negotiate_with_vendor when inventory_agent reports reorder_needed = True.
@@ -17,4 +17,5 @@ vendor_agent = LlmAgent(
     - If you don't have the optimal vendors, Please check with the RoutingAgent to find out if there are nearby warehouses that can transfer stock faster than suppliers can deliver.
     """,
     tools=[negotiate_with_vendor],
+    **tracer.callbacks(),
 )
\ No newline at end of file
@@ -1,3 +1,5 @@
+from typing import Any, Dict, List
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -8,9 +10,92 @@ class Settings(BaseSettings):
     openai_api_key: str = Field(..., env="OPENAI_API_KEY")
     google_api_key: str = Field(..., env="GOOGLE_API_KEY")
     port: int = 8000
-    provider: str = Field("google", env="PROVIDER")  # "openai" or "google"
+    provider: str = Field("google", env="PROVIDER")  # "openai", "google" or "stub" (offline)
     session_timeout : int = 3600  # in seconds
     use_in_memory: bool = True
+    session_store: str = "memory"  # "tiered": memory LRU + SQLite, kept across restarts
+    warmup: str = "background"  # agent tree built after startup; "lazy": first chat request; "eager": before serving
+    max_concurrent_executions: int = 10  # chat runs in flight per instance; more get RUN_ERROR
+    api_batch_max_items: int = 5000  # items per /api/*/batch request
+    api_batch_concurrency: int = 16  # default items in flight per batch
+    workers: int = 1  # uvicorn worker processes; more than one turns on shared_stock and shared tiered sessions
+
+    # Logging: supply_chain.* loggers, written from a background thread
+    log_level: str = "info"  # "debug" adds per-step detail from the services
+    log_format: str = "text"  # "json": one object per line with correlation ids
+    log_queue_size: int = 10000  # records beyond this are dropped, never waited on
+
+    # Admission control in front of the chat endpoint; totals across all
+    # workers, each worker enforcing limit // workers (at least 1)
+    admission_max_active: int = 10  # keep <= max_concurrent_executions
+    admission_max_per_user: int = 2
+    admission_max_queue: int = 50
+    admission_queue_timeout: float = 30.0  # in seconds waiting for a slot
+    user_id_header: str = "X-User-Id"  # falls back to default_user
+
+    # Outbound model calls, paced per process (0 = unlimited)
+    model_rpm: int = 0  # requests per minute across all workers
+    model_tpm: int = 0  # estimated prompt tokens per minute
+    model_burst: int = 5  # requests allowed back to back per worker
+
+    # Tiered sessions: hot LRU bounded by bytes, cold SQLite file
+    session_db_path: str = "data/sessions/sessions.sqlite3"
+    session_hot_max_bytes: int = 64 * 1024 * 1024
+    session_keep_events: int = 40  # older events compacted to their text turns; state is the snapshot
+    session_compact_after: int = 300  # in seconds idle
+    session_flush_interval: int = 5  # in seconds
+    session_shared: bool = False  # write through and re-check SQLite; forced on with workers > 1
+
+    # Inventory: stock matrix in a file-backed mmap shared by all workers
+    shared_stock: bool = False
+    shared_stock_path: str = "data/shared/stock.mmap"
+    reserve_transfers: bool = False  # hold planned transfer units until routed or released
+    reservation_ttl: int = 900  # in seconds; unrouted holds are released after this
+    workflow_mode: str = "sequential"  # "parallel": vendor + routing fan out after inventory
+
+    # Routing: transport mode profiles and mode-selection thresholds
+    transport_modes: Dict[str, Dict[str, Any]] = {
+        "express_truck": {"speed_kmh": 60, "cost_per_km": 15, "carrier": "BlueDart Express"},
+        "truck": {"speed_kmh": 55, "cost_per_km": 10, "carrier": "DTDC Logistics"},
+        "train": {"speed_kmh": 50, "cost_per_km": 8, "carrier": "Indian Railways Cargo"},
+        "multimodal": {"speed_kmh": 50, "cost_per_km": 8, "carrier": "Concor Multimodal"},
+    }
+    express_truck_max_km: int = 500  # high urgency below this distance
+    train_min_km: int = 1500  # rail above this distance
+    handling_cost_per_unit: int = 2  # ₹ per unit
+
+    # Alerts: duplicate suppression window per event/region/SKU
+    alert_suppression_window: int = 900  # in seconds
+    audit_log_dir: str = "data/audit"
+
+    # Execution trace: compact entries kept in session state, full payloads spilled
+    trace_max_entries: int = 50
+    trace_spill_path: str = "data/traces/payloads.jsonl"
+    tool_result_token_budget: int = 600  # per tool result returned to the model
+
+    # Span tracing: OTLP/JSON lines, one per chat turn
+    span_export_path: str = "data/traces/spans.otlp.jsonl"
+
+    # LLM response cache: agents listed here replay identical model requests
+    llm_cache_agents: List[str] = []
+    llm_cache_max_entries: int = 512
+    llm_cache_ttl: int = 3600  # in seconds
+    llm_cache_dir: str = ""  # empty keeps the cache in memory only
+
+    # Model routing: per-request choice between a fast and a strong tier
+    model_routing: bool = False
+    model_tiers: Dict[str, Dict[str, str]] = {
+        "google": {"fast": "gemini-2.5-flash-lite", "strong": "gemini-2.5-flash"},
+        "openai": {"fast": "openai/gpt-4o-mini", "strong": "openai/gpt-4o"},
+    }
+    router_strong_agents: List[str] = ["SupplyChainOrchestrator"]
+    router_long_prompt_tokens: int = 6000
+    model_costs: Dict[str, Dict[str, float]] = {  # USD per 1M tokens
+        "gemini-2.5-flash-lite": {"input": 0.10, "output": 0.40},
+        "gemini-2.5-flash": {"input": 0.30, "output": 2.50},
+        "openai/gpt-4o-mini": {"input": 0.15, "output": 0.60},
+        "openai/gpt-4o": {"input": 2.50, "output": 10.00},
+    }
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,70 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started (Linux), so interpreter start-up counts too"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+class StartupReport:
+    """
+    Where cold-start time goes:
+    - Named phases with their duration, in the order they finished
+    - Milestones (serving, agent ready) as seconds since process start
+    """
+
+    def __init__(self):
+        self._offset = process_age() or 0.0  # process start -> this object
+        self._t0 = time.perf_counter()
+        self._lock = threading.Lock()
+        self.phases: List[Dict[str, Any]] = []
+        self.milestones: Dict[str, float] = {}
+
+    def since_start(self) -> float:
+        return self._offset + time.perf_counter() - self._t0
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        error = None
+        try:
+            yield
+        except BaseException as exc:
+            error = repr(exc)
+            raise
+        finally:
+            entry = {
+                "phase": name,
+                "seconds": round(time.perf_counter() - started, 4),
+                "thread": threading.current_thread().name,
+            }
+            if error:
+                entry["error"] = error
+            with self._lock:
+                self.phases.append(entry)
+
+    def mark(self, milestone: str):
+        with self._lock:
+            self.milestones[milestone] = round(self.since_start(), 4)
+
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "milestones": dict(self.milestones),
+                "phases": list(self.phases),
+                "uptime_seconds": round(self.since_start(), 4),
+            }
+
+
+startup = StartupReport()
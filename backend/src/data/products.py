@@ -360,6 +360,7 @@ SUPPLIERS = {
 # Demo events that trigger demand spikes
 DEMO_EVENTS = {
     "monsoon_cyclone": {
+        "type": "cyclone",  # event_type understood by DemandAgent
         "name": "Cyclone Nisarga Approaching Mumbai",
         "date": "2024-06-12",
         "affected_regions": ["Mumbai", "Pune"],
@@ -368,6 +369,7 @@ DEMO_EVENTS = {
         "duration_days": 3
     },
     "winter_cold_wave": {
+        "type": "cold_wave",
         "name": "Cold Wave Hits North India",
         "date": "2024-12-15",
         "affected_regions": ["Delhi", "Chandigarh", "Jaipur"],
@@ -376,6 +378,7 @@ DEMO_EVENTS = {
         "duration_days": 7
     },
     "festival_diwali": {
+        "type": "festival",
         "name": "Diwali Festival Sale",
         "date": "2024-10-20",
         "affected_regions": ["All"],
@@ -0,0 +1,15 @@
+from .cache import CachedLlm, ResponseCache, request_key
+from .pacing import PacedLlm
+from .router import RoutedLlm, estimate_prompt_tokens, validate_tool_calls
+from .stub import StubLlm
+
+__all__ = [
+    "CachedLlm",
+    "ResponseCache",
+    "request_key",
+    "PacedLlm",
+    "RoutedLlm",
+    "estimate_prompt_tokens",
+    "validate_tool_calls",
+    "StubLlm",
+]
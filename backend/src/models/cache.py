@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, List, Optional, Union
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import Field
+
+
+# Request config entries that never change the model's answer
+_CONFIG_IGNORED = {"http_options", "labels"}
+
+
+def _normalize(value: Any, parent: Optional[str] = None) -> Any:
+    """Drop per-call ids and collapse whitespace so equal prompts hash equal"""
+    if isinstance(value, dict):
+        return {
+            key: _normalize(item, key)
+            for key, item in value.items()
+            if not (key == "id" and parent in ("function_call", "function_response"))
+            and key not in _CONFIG_IGNORED
+        }
+    if isinstance(value, list):
+        return [_normalize(item, parent) for item in value]
+    if isinstance(value, str):
+        return " ".join(value.split())
+    return value
+
+
+def request_key(model: str, llm_request: LlmRequest, params: Optional[Dict[str, Any]] = None) -> str:
+    """Stable hash of model, messages, tools, system prompt and sampling config"""
+    payload = {
+        "model": model.strip().lower(),
+        "params": params or {},
+        "contents": [
+            c.model_dump(mode="json", exclude_none=True) for c in llm_request.contents
+        ],
+        "config": (
+            llm_request.config.model_dump(mode="json", exclude_none=True)
+            if llm_request.config is not None
+            else {}
+        ),
+    }
+    encoded = json.dumps(_normalize(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    Model response cache:
+    - Bounded in-memory LRU in front of an optional SQLite store on disk
+    - Entries expire after ttl_seconds
+    - Disk reads and writes run in a worker thread, off the event loop
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600,
+        directory: Union[str, Path, None] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, responses)
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0}
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if directory:
+            Path(directory).mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(
+                str(Path(directory) / "llm_cache.sqlite3"), check_same_thread=False
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, stored_at REAL, payload TEXT)"
+            )
+            self._db.commit()
+
+    async def get(self, key: str) -> Optional[List[Dict]]:
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[0] <= self.ttl_seconds:
+            self._entries.move_to_end(key)
+            self.stats["hits"] += 1
+            return entry[1]
+
+        if self._db is not None:
+            row = await asyncio.to_thread(self._db_get, key)
+            if row is not None and now - row[0] <= self.ttl_seconds:
+                responses = json.loads(row[1])
+                self._remember(key, row[0], responses)
+                self.stats["disk_hits"] += 1
+                return responses
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, key: str, responses: List[Dict]):
+        stored_at = time.time()
+        self._remember(key, stored_at, responses)
+        self.stats["stores"] += 1
+        if self._db is not None:
+            await asyncio.to_thread(self._db_put, key, stored_at, json.dumps(responses))
+
+    def _remember(self, key: str, stored_at: float, responses: List[Dict]):
+        self._entries[key] = (stored_at, responses)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_get(self, key: str):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT stored_at, payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+    def _db_put(self, key: str, stored_at: float, payload: str):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, stored_at, payload)
+            )
+            self._db.commit()
+
+
+class CachedLlm(BaseLlm):
+    """
+    Wraps another model and replays cached responses for identical requests:
+    - Keyed on normalized model, messages, tools, system prompt and config
+    - Only complete, error-free turns are stored
+    - Function call ids are stripped so ADK assigns fresh ones on replay
+    """
+
+    inner: BaseLlm
+    cache: Any
+    params: Dict[str, Any] = Field(default_factory=dict)  # sampling args not in the request
+
+    @property
+    def capabilities(self):
+        return self.inner.capabilities
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(self.inner.model, llm_request, self.params)
+        cached = await self.cache.get(key)
+        if cached is not None:
+            for payload in cached:
+                yield LlmResponse.model_validate(payload)
+            return
+
+        final: List[Dict] = []
+        cacheable = True
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            if response.error_code:
+                cacheable = False
+            elif not response.partial:
+                final.append(_for_replay(response))
+            yield response
+
+        if cacheable and final:
+            await self.cache.put(key, final)
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
+
+
+def _for_replay(response: LlmResponse) -> Dict:
+    payload = response.model_dump(mode="json", exclude_none=True)
+    for part in (payload.get("content") or {}).get("parts") or []:
+        if "function_call" in part:
+            part["function_call"].pop("id", None)
+    payload.pop("usage_metadata", None)  # a replay costs no tokens
+    return payload
@@ -0,0 +1,41 @@
+from typing import Any, AsyncGenerator, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from src.models.router import estimate_prompt_tokens
+from src.utils.metrics import MODEL_PACING_WAIT
+
+
+class PacedLlm(BaseLlm):
+    """
+    Wraps a provider model and paces outbound calls:
+    - One unit from the requests bucket per call
+    - Estimated prompt tokens from the tokens bucket
+    - Buckets are shared by every model built for the provider, so bursts of
+      chat turns queue here instead of tripping the provider's rate limits
+    """
+
+    inner: BaseLlm
+    requests: Optional[Any] = None  # TokenBucket, one unit per call
+    tokens: Optional[Any] = None  # TokenBucket, estimated prompt tokens
+
+    @property
+    def capabilities(self):
+        return self.inner.capabilities
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        waited = 0.0
+        if self.requests is not None:
+            waited += await self.requests.acquire()
+        if self.tokens is not None:
+            waited += await self.tokens.acquire(estimate_prompt_tokens(llm_request))
+        MODEL_PACING_WAIT.labels(self.inner.model).observe(waited)
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            yield response
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
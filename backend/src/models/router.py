@@ -0,0 +1,239 @@
+import json
+from time import perf_counter
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional, Tuple
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import Field
+
+from src.utils.metrics import MODEL_COST, MODEL_FALLBACKS, MODELS
+
+
+def estimate_prompt_tokens(llm_request: LlmRequest) -> int:
+    """~4 characters per token over messages, system prompt and tool schemas"""
+    size = sum(
+        len(json.dumps(c.model_dump(mode="json", exclude_none=True), separators=(",", ":")))
+        for c in llm_request.contents
+    )
+    if llm_request.config is not None:
+        size += len(json.dumps(
+            llm_request.config.model_dump(mode="json", exclude_none=True, exclude={"http_options"}),
+            separators=(",", ":"),
+        ))
+    return size // 4
+
+
+def _declared_tools(llm_request: LlmRequest) -> Dict[str, Any]:
+    declared = {}
+    for tool in (llm_request.config.tools if llm_request.config else None) or []:
+        for declaration in getattr(tool, "function_declarations", None) or []:
+            declared[declaration.name] = declaration
+    return declared
+
+
+def validate_tool_calls(llm_request: LlmRequest, response: LlmResponse) -> Optional[str]:
+    """Why the response's function calls don't fit the request's tools, or None"""
+    parts = response.content.parts if response.content and response.content.parts else []
+    declared = _declared_tools(llm_request)
+    for part in parts:
+        call = part.function_call
+        if call is None:
+            continue
+        if call.name not in declared and call.name not in llm_request.tools_dict:
+            return f"unknown tool {call.name}"
+        declaration = declared.get(call.name)
+        schema = declaration.parameters if declaration is not None else None
+        required = (schema.required if schema is not None else None) or []
+        if declaration is not None and schema is None and declaration.parameters_json_schema:
+            required = declaration.parameters_json_schema.get("required") or []
+        missing = [name for name in required if name not in (call.args or {})]
+        if missing:
+            return f"{call.name} missing {', '.join(missing)}"
+    return None
+
+
+# A policy looks at (agent name, request, estimated prompt tokens, router)
+# and returns a tier, or None to defer to the next policy.
+Policy = Callable[[str, LlmRequest, int, "RoutedLlm"], Optional[str]]
+
+
+def strong_agents_policy(agent_name, llm_request, tokens, router) -> Optional[str]:
+    """Agents that plan multi-step work (the orchestrator) get the strong tier"""
+    return router.tiers[-1] if agent_name in router.strong_agents else None
+
+
+def long_prompt_policy(agent_name, llm_request, tokens, router) -> Optional[str]:
+    return router.tiers[-1] if tokens > router.long_prompt_tokens else None
+
+
+def deterministic_tools_policy(agent_name, llm_request, tokens, router) -> Optional[str]:
+    """One real tool (besides agent transfer) means the tool plan is fixed"""
+    tools = set(_declared_tools(llm_request)) | set(llm_request.tools_dict)
+    tools.discard("transfer_to_agent")
+    return router.tiers[0] if len(tools) <= 1 else None
+
+
+DEFAULT_POLICIES: Tuple[Policy, ...] = (
+    strong_agents_policy,
+    long_prompt_policy,
+    deterministic_tools_policy,
+)
+
+
+class RoutedLlm(BaseLlm):
+    """
+    Picks a model tier per request for one agent:
+    - Policies run in order; the first tier returned wins, else default_tier
+    - Tiers are ordered cheapest/fastest first
+    - Invalid tool calls (unknown tool, missing required args) retry on the
+      next stronger tier
+    - Latency, cost and fallbacks are recorded per agent:tier route
+    """
+
+    agent_name: str
+    models: Dict[str, Any]  # tier -> BaseLlm, cheapest first
+    costs: Dict[str, Dict[str, float]] = Field(default_factory=dict)  # model -> USD per 1M tokens
+    strong_agents: List[str] = Field(default_factory=list)
+    long_prompt_tokens: int = 6000
+    default_tier: Optional[str] = None
+    policies: Tuple[Any, ...] = DEFAULT_POLICIES
+
+    @property
+    def tiers(self) -> List[str]:
+        return list(self.models)
+
+    @property
+    def capabilities(self):
+        return self.models[self.tiers[-1]].capabilities
+
+    def choose(self, llm_request: LlmRequest) -> Tuple[str, str]:
+        """(tier, deciding policy) for a request"""
+        tokens = estimate_prompt_tokens(llm_request)
+        for policy in self.policies:
+            tier = policy(self.agent_name, llm_request, tokens, self)
+            if tier is not None:
+                return tier, policy.__name__
+        return self.default_tier or self.tiers[0], "default"
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        tier, _ = self.choose(llm_request)
+        order = self.tiers
+        for attempt_tier in order[order.index(tier):]:
+            model = self.models[attempt_tier]
+            route = f"{self.agent_name}:{attempt_tier}"
+            started = perf_counter()
+
+            # A turn is buffered until its tool calls validate, so a rejected
+            # answer never reaches the session
+            responses = []
+            async for response in model.generate_content_async(llm_request, stream=stream):
+                responses.append(response)
+            final = [r for r in responses if not r.partial]
+
+            MODELS.latency.labels(route).observe(perf_counter() - started)
+            MODELS.calls.labels(route)[0] += 1
+            MODEL_COST.labels(route)[0] += self._cost(model.model, llm_request, final)
+
+            problem = next(
+                (p for p in (validate_tool_calls(llm_request, r) for r in final) if p), None
+            )
+            is_last = attempt_tier == order[-1]
+            if problem is None or is_last:
+                if problem is not None or any(r.error_code for r in final):
+                    MODELS.errors.labels(route)[0] += 1
+                for response in responses:
+                    yield response
+                return
+
+            MODELS.errors.labels(route)[0] += 1
+            MODEL_FALLBACKS.labels(route)[0] += 1
+
+    def _cost(self, model: str, llm_request: LlmRequest, responses: List[LlmResponse]) -> float:
+        price = self.costs.get(model)
+        if not price:
+            return 0.0
+        prompt = completion = 0
+        for response in responses:
+            usage = response.usage_metadata
+            if usage is not None:
+                prompt += usage.prompt_token_count or 0
+                completion += usage.candidates_token_count or 0
+            elif response.content is not None:
+                completion += len(json.dumps(
+                    response.content.model_dump(mode="json", exclude_none=True)
+                )) // 4
+        if not prompt:
+            prompt = estimate_prompt_tokens(llm_request)
+        return (prompt * price.get("input", 0) + completion * price.get("output", 0)) / 1e6
+
+    def connect(self, llm_request: LlmRequest):
+        return self.models[self.tiers[-1]].connect(llm_request)
+
+
+# Test
+async def test_model_router():
+    import random
+    from google.genai import types
+    from src.models.stub import StubLlm
+
+    def flaky_tool_call(llm_request: LlmRequest) -> LlmResponse:
+        # The cheap model forgets a required argument about a quarter of the time
+        args = {"product_sku": "RC-FULL-NVY-M", "region": "Mumbai"}
+        if random.random() < 0.25:
+            args.pop("region")
+        return LlmResponse(content=types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name="forecast_demand", args=args))
+        ]))
+
+    def good_tool_call(llm_request: LlmRequest) -> LlmResponse:
+        return LlmResponse(content=types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(
+                name="forecast_demand", args={"product_sku": "RC-FULL-NVY-M", "region": "Mumbai"}
+            ))
+        ]))
+
+    fast = StubLlm(model="stub-fast", latency=0.02, responder=flaky_tool_call)
+    strong = StubLlm(model="stub-strong", latency=0.2, responder=good_tool_call)
+    costs = {"stub-fast": {"input": 0.1, "output": 0.4}, "stub-strong": {"input": 2.5, "output": 10}}
+
+    request = LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text="Cyclone in Mumbai")])],
+        config=types.GenerateContentConfig(tools=[types.Tool(function_declarations=[
+            types.FunctionDeclaration(
+                name="forecast_demand",
+                parameters=types.Schema(
+                    type="OBJECT",
+                    properties={"product_sku": types.Schema(type="STRING"), "region": types.Schema(type="STRING")},
+                    required=["product_sku", "region"],
+                ),
+            )
+        ])]),
+    )
+
+    for agent in ("DemandAgent", "SupplyChainOrchestrator"):
+        router = RoutedLlm(
+            model="routed",
+            agent_name=agent,
+            models={"fast": fast, "strong": strong},
+            costs=costs,
+            strong_agents=["SupplyChainOrchestrator"],
+        )
+        started = perf_counter()
+        for _ in range(20):
+            async for _response in router.generate_content_async(request):
+                pass
+        print(f"{agent}: first choice {router.choose(request)}, 20 calls in {perf_counter() - started:.2f}s")
+
+    print(f"Fast calls: {fast.calls}, strong calls: {strong.calls}")
+    for route, cell in sorted(MODEL_FALLBACKS.values.items()):
+        print(f"Fallbacks {route}: {cell[0]}")
+    for route, cell in sorted(MODEL_COST.values.items()):
+        print(f"Cost {route}: ${cell[0]:.6f}")
+
+
+if __name__ == "__main__":
+    import asyncio
+    asyncio.run(test_model_router())
@@ -0,0 +1,49 @@
+import asyncio
+from typing import AsyncGenerator, Callable, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+
+def _echo(llm_request: LlmRequest) -> LlmResponse:
+    """Reply with the last text or function result seen, so runs are reproducible"""
+    text = "stub: no input"
+    for content in reversed(llm_request.contents):
+        for part in content.parts or []:
+            if part.text:
+                text = f"stub: {part.text.strip()}"
+                break
+            if part.function_response:
+                text = f"stub: {part.function_response.name} done"
+                break
+        else:
+            continue
+        break
+    return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+class StubLlm(BaseLlm):
+    """
+    Offline stand-in for a hosted model:
+    - Deterministic replies from a responder function (echo by default)
+    - Optional latency to mimic a network round-trip
+    - Counts calls, so caching and routing can be checked without an API key
+    """
+
+    model: str = "stub"
+    latency: float = 0.0
+    responder: Optional[Callable[[LlmRequest], LlmResponse]] = None
+    calls: int = 0
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = (self.responder or _echo)(llm_request)
+        response.partial = False
+        response.turn_complete = True
+        yield response
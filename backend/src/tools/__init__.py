@@ -1,12 +1,6 @@
-from .tools import (
-    forecast_demand,
-    optimize_inventory,
-    get_warehouse_status,
-    negotiate_with_vendor,
-    plan_delivery_route,
-    send_supply_alerts,
-    list_all_products,
-)
+# The tool wrappers pull in google-adk and build services on use, so they are
+# loaded when first accessed rather than with the package (src.tools.pipeline
+# only needs its request model at startup).
 
 __all__ = [
     "forecast_demand",
@@ -14,6 +8,14 @@ __all__ = [
     "get_warehouse_status",
     "negotiate_with_vendor",
     "plan_delivery_route",
+    "source_and_route",
     "send_supply_alerts",
     "list_all_products",
-]
\ No newline at end of file
+]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from . import tools
+        return getattr(tools, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
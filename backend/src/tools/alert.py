@@ -1,5 +1,18 @@
+import asyncio
+import time
+import uuid
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from src.core.config import settings
+from src.utils.audit_log import AuditLog
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import instrumented
+from .notifications import NotificationDispatcher, StubSMTPSink, StubWebhookSink
+from .suppression import AlertSuppressor
+
+
+log = get_logger("tools.alert")
 
 
 class AlertAgent:
@@ -9,12 +22,29 @@ class AlertAgent:
     - Generates summary reports
     - Creates audit trails
     - Monitors system status
+    - Sends each suppression digest when its window closes, from a
+      background task that runs while any window is open
     """
     
-    def __init__(self, demo_mode: bool = True):
+    def __init__(
+        self,
+        demo_mode: bool = True,
+        dispatcher: NotificationDispatcher = None,
+        suppressor: AlertSuppressor = None,
+        audit_log: AuditLog = None
+    ):
         self.demo_mode = demo_mode
         self.name = "alert"
+        self.dispatcher = dispatcher or NotificationDispatcher(
+            sinks={"slack": StubWebhookSink(), "email": StubSMTPSink()}
+        )
+        self.suppressor = suppressor or AlertSuppressor(
+            window_seconds=settings.alert_suppression_window
+        )
+        self.audit_log = audit_log or AuditLog(settings.audit_log_dir)
+        self._sweeper: Optional[asyncio.Task] = None
     
+    @instrumented("service")
     async def send_alerts(
         self,
         event_summary: Dict[str, Any],
@@ -25,7 +55,41 @@ class AlertAgent:
         
         Called by Google ADK as a tool
         """
-        print(f"\nALERT AGENT: Generating {severity} alerts")
+        log.info("Generating {} alerts", severity)
+        
+        # 0. Flush digests of closed windows, then drop duplicates
+        self.flush_digests()
+        
+        event = event_summary.get("event") or {}
+        if isinstance(event, str):
+            event = {"description": event}
+        alert_id = f"ALERT-{uuid.uuid4().hex[:12]}"
+        decision = self.suppressor.check(
+            key=AlertSuppressor.make_key(
+                event.get("type") or event.get("description"),
+                event.get("region"),
+                event.get("product_sku"),
+            ),
+            severity=severity,
+            alert_id=alert_id
+        )
+        self._start_sweeper()
+        
+        if decision["action"] == "suppress":
+            log.info(
+                "Duplicate of {} suppressed ({} so far)",
+                decision["alert_id"],
+                decision["suppressed_duplicates"],
+            )
+            return {
+                "status": "suppressed",
+                "alert_id": decision["alert_id"],
+                "severity": decision["window_severity"],
+                "suppressed_duplicates": decision["suppressed_duplicates"],
+                "window_remaining_seconds": decision["window_remaining_seconds"],
+                "suppression": self.suppressor.report(),
+                "timestamp": datetime.utcnow().isoformat()
+            }
         
         # 1. Generate summary message
         summary = self._generate_summary(event_summary)
@@ -33,37 +97,78 @@ class AlertAgent:
         # 2. Determine recipients
         recipients = self._determine_recipients(severity)
         
-        # 3. Send notifications (mock in demo)
+        # 3. Queue notifications — delivered in the background
         notifications_sent = []
         
-        if self.demo_mode:
-            # Mock sending
-            for channel in ["slack", "email"]:
-                notification = await self._send_notification(
-                    channel=channel,
-                    recipients=recipients,
-                    message=summary,
-                    severity=severity
-                )
-                notifications_sent.append(notification)
-                print(f"Sent {channel} notification to {len(recipients[channel])} recipient(s)")
+        for channel in ["slack", "email"]:
+            notification = self.dispatcher.enqueue(
+                channel=channel,
+                recipients=recipients[channel],
+                message=summary,
+                severity=severity
+            )
+            notifications_sent.append(notification)
+            log.debug("Queued {} notification to {} recipient(s)", channel, len(recipients[channel]))
         
         # 4. Create audit record
         audit_record = self._create_audit_record(
             event_summary=event_summary,
-            notifications=notifications_sent
+            notifications=notifications_sent,
+            alert_id=alert_id,
+            region=event.get("region"),
+            severity=severity
         )
         
         return {
             "status": "success",
+            "alert_id": alert_id,
+            "escalated": decision["action"] == "escalate",
             "notifications_sent": notifications_sent,
             "recipients_notified": sum(len(r) for r in recipients.values()),
             "channels_used": list(recipients.keys()),
             "audit_record": audit_record,
             "summary": summary,
+            "suppression": self.suppressor.report(),
             "timestamp": datetime.utcnow().isoformat()
         }
     
+    def flush_digests(self) -> int:
+        """Send digests for windows that have closed; returns how many"""
+        digests = self.suppressor.sweep()
+        for digest in digests:
+            self._send_digest(digest)
+        return len(digests)
+    
+    def _start_sweeper(self):
+        loop = asyncio.get_running_loop()
+        if self._sweeper is None or self._sweeper.done() or self._sweeper.get_loop() is not loop:
+            self._sweeper = loop.create_task(self._sweep_loop())
+    
+    async def _sweep_loop(self):
+        """Wake as each window closes; exits once no window is open"""
+        while (expires_at := self.suppressor.next_expiry()) is not None:
+            await asyncio.sleep(max(0.0, expires_at - time.monotonic()))
+            self.flush_digests()
+    
+    def _send_digest(self, digest: Dict[str, Any]):
+        """One notification summarising duplicates merged during a window"""
+        counts = ", ".join(f"{n} {sev}" for sev, n in digest["by_severity"].items())
+        message = "\n".join([
+            f"ALERT DIGEST for {digest['alert_id']}",
+            f"EVENT: {digest['event']}",
+            f"REGION: {digest['region'] or 'N/A'}",
+            f"SKU: {digest['product_sku'] or 'N/A'}",
+            f"Duplicate alerts suppressed: {digest['suppressed_duplicates']} ({counts})",
+        ])
+        recipients = self._determine_recipients(digest["severity"])
+        for channel in ["slack", "email"]:
+            self.dispatcher.enqueue(
+                channel=channel,
+                recipients=recipients[channel],
+                message=message,
+                severity=digest["severity"]
+            )
+    
     def _generate_summary(self, event_data: Dict) -> str:
         """Generate human-readable summary"""
         
@@ -149,46 +254,38 @@ class AlertAgent:
         
         return recipients
     
-    async def _send_notification(
-        self,
-        channel: str,
-        recipients: Dict,
-        message: str,
-        severity: str
-    ) -> Dict:
-        """Send notification via channel (mock)"""
-        
-        return {
-            "channel": channel,
-            "recipients": recipients.get(channel, []),
-            "message_preview": message[:100] + "...",
-            "severity": severity,
-            "sent_at": datetime.utcnow().isoformat(),
-            "status": "sent"
-        }
-    
     def _create_audit_record(
         self,
         event_summary: Dict,
-        notifications: List[Dict]
+        notifications: List[Dict],
+        alert_id: str = None,
+        region: str = None,
+        severity: str = None
     ) -> Dict:
-        """Create audit trail"""
-        if not notifications:
-            return {
-                "status": "no_notifications",
-                "event_data": event_summary,
-                "agents_involved": ["demand", "inventory", "vendor", "routing", "alert"],
-                "total_actions": 0,
-                "created_at": datetime.utcnow().isoformat()
-            }
-        return {
-            "audit_id": f"AUDIT-{datetime.now().strftime('%Y%m%d%H%M%S')}",
+        """Create audit trail — persisted in the audit log, referenced by id"""
+        inventory = event_summary.get("inventory")
+        transfers = inventory.get("transfers") or [] if isinstance(inventory, dict) else []
+        record = {
+            "audit_id": AuditLog.new_id(),
+            "alert_id": alert_id,
+            "region": region,
+            "severity": severity,
+            "status": "recorded" if notifications else "no_notifications",
             "event_data": event_summary,
             "notifications": notifications,
             "agents_involved": ["demand", "inventory", "vendor", "routing", "alert"],
-            "total_actions": len(notifications) + len((event_summary.get("inventory") or {}).get("transfers", []) if isinstance(event_summary.get("inventory"), dict) else []),
+            "total_actions": len(notifications) + len(transfers) if notifications else 0,
             "created_at": datetime.utcnow().isoformat()
         }
+        self.audit_log.append(record)
+        
+        return {
+            "audit_id": record["audit_id"],
+            "status": record["status"],
+            "agents_involved": record["agents_involved"],
+            "total_actions": record["total_actions"],
+            "created_at": record["created_at"]
+        }
 
 
 # ADK Tool Definition
@@ -229,10 +326,30 @@ async def test_alert_agent():
     }
     
     result = await agent.send_alerts(event_summary=mock_summary, severity="high")
-    print(f"\nSent {result['recipients_notified']} notifications")
+    print(f"\nQueued {result['recipients_notified']} notifications")
     print("\n" + result['summary'])
+    
+    # A duplicate inside the window is merged; its digest goes out when the window closes
+    short = AlertAgent(
+        dispatcher=agent.dispatcher,
+        suppressor=AlertSuppressor(window_seconds=0.2),
+        audit_log=agent.audit_log,
+    )
+    # Keyed on the event type, so differently worded descriptions still merge
+    for description in ("Heat wave in Delhi", "Heat wave hits Delhi", "Delhi heat wave"):
+        heat_wave = {"event": {"type": "heat_wave", "description": description, "region": "Delhi"}}
+        await short.send_alerts(event_summary=heat_wave, severity="info")
+    await asyncio.sleep(0.3)
+    print(f"\nSuppression: {short.suppressor.report()}")
+    
+    await agent.dispatcher.close()
+    print(f"\nDispatcher stats: {agent.dispatcher.stats}")
+    
+    agent.audit_log.flush()
+    for record in agent.audit_log.query(region="Mumbai", severity="high", limit=3):
+        print(f"Audit: {record['audit_id']} ({record['created_at']})")
 
 
 if __name__ == "__main__":
-    import asyncio
+    configure_logging("debug", threaded=False)
     asyncio.run(test_alert_agent())
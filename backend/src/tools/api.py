@@ -0,0 +1,289 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Generic, List, Literal, Optional, TypeVar
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, TypeAdapter
+
+from src.core.config import settings
+from src.tools.pipeline import PipelineRequest, run_pipeline
+
+
+NDJSON = "application/x-ndjson"
+
+router = APIRouter(prefix="/api", tags=["services"])
+
+
+# Request bodies. Validators are built once here, when the classes (and the
+# Batch[...] specialisations below) are created, not per request.
+
+class ForecastRequest(BaseModel):
+    product_sku: str
+    region: str
+    event_type: Optional[str] = None
+
+
+class InventoryRequest(BaseModel):
+    product_sku: str
+    region: str
+    forecasted_demand: int = Field(ge=0)
+
+
+class VendorRequest(BaseModel):
+    product_sku: str
+    quantity: int = Field(gt=0)
+    urgency: Literal["normal", "high"] = "normal"
+
+
+class Transfer(BaseModel):
+    from_warehouse: str
+    to_warehouse: str
+    quantity: int = Field(gt=0)
+    distance_km: Optional[int] = None  # omit to route over the road/rail network
+
+
+class RouteRequest(BaseModel):
+    transfers: List[Transfer]
+    urgency: Literal["normal", "high"] = "normal"
+    consolidate: bool = False
+
+
+T = TypeVar("T")
+
+
+class Batch(BaseModel, Generic[T]):
+    items: List[T] = Field(min_length=1, max_length=settings.api_batch_max_items)
+    concurrency: int = Field(settings.api_batch_concurrency, ge=1, le=256)
+    ordered: bool = False  # stream rows in input order instead of as they finish
+
+
+ForecastBatch = Batch[ForecastRequest]
+InventoryBatch = Batch[InventoryRequest]
+VendorBatch = Batch[VendorRequest]
+RouteBatch = Batch[RouteRequest]
+PipelineBatch = Batch[PipelineRequest]
+
+_ROW = TypeAdapter(Dict[str, Any])
+
+
+def _checked(result: Dict, status: int = 422) -> Dict:
+    """Service results with status=error become an HTTP error (422 by default) for single calls"""
+    if isinstance(result, dict) and result.get("status") == "error":
+        raise HTTPException(status_code=status, detail=result.get("message", "Service error"))
+    return result
+
+
+async def _stream_batch(
+    items: List[BaseModel],
+    call: Callable[[Any], Awaitable[Any]],
+    concurrency: int,
+    ordered: bool,
+) -> AsyncIterator[bytes]:
+    """
+    One NDJSON line per item as soon as it is computed, then a summary line:
+    - At most `concurrency` items in flight; workers pull the next index
+    - The output queue is bounded, so rows are written out while the batch
+      is still running instead of piling up in memory
+    - An item that raises becomes a status=error row; the batch carries on
+    - A client disconnect cancels the workers
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    cursor = iter(enumerate(items))
+    started = time.perf_counter()
+    live = min(concurrency, len(items))
+
+    async def worker():
+        nonlocal live
+        for index, item in cursor:
+            try:
+                result = await call(item)
+                if isinstance(result, BaseModel):
+                    result = result.model_dump(exclude_none=True)
+                row = {"index": index, "result": result}
+            except Exception as exc:
+                row = {"index": index, "result": {"status": "error", "message": str(exc)}}
+            await queue.put(row)
+            # Service calls rarely suspend: let other requests and the writer run
+            await asyncio.sleep(0)
+        live -= 1
+        if not live:
+            await queue.put(None)
+
+    workers = [asyncio.create_task(worker()) for _ in range(live)]
+
+    errors = 0
+    pending: Dict[int, Dict] = {}
+    next_index = 0
+    try:
+        while (row := await queue.get()) is not None:
+            if isinstance(row["result"], dict) and row["result"].get("status") == "error":
+                errors += 1
+            if not ordered:
+                yield _ROW.dump_json(row) + b"\n"
+                continue
+            pending[row["index"]] = row
+            while next_index in pending:
+                yield _ROW.dump_json(pending.pop(next_index)) + b"\n"
+                next_index += 1
+    finally:
+        for task in workers:
+            task.cancel()
+
+    yield _ROW.dump_json(
+        {
+            "done": True,
+            "items": len(items),
+            "errors": errors,
+            "seconds": round(time.perf_counter() - started, 4),
+        }
+    ) + b"\n"
+
+
+def _ndjson(batch: Batch, call: Callable[[Any], Awaitable[Any]]) -> StreamingResponse:
+    return StreamingResponse(
+        _stream_batch(batch.items, call, batch.concurrency, batch.ordered), media_type=NDJSON
+    )
+
+
+# Demand
+
+@router.post("/forecast")
+async def forecast(request: ForecastRequest):
+    """7-day demand forecast for one product and region"""
+    from .tools import _demand_svc
+
+    return _checked(
+        await _demand_svc.forecast_demand(request.product_sku, request.region, request.event_type)
+    )
+
+
+@router.post("/forecast/batch")
+async def forecast_batch(batch: ForecastBatch):
+    """Forecasts for many product/region pairs, streamed as NDJSON"""
+    from .tools import _demand_svc
+
+    return _ndjson(
+        batch,
+        lambda r: _demand_svc.forecast_demand(r.product_sku, r.region, r.event_type),
+    )
+
+
+# Inventory
+
+@router.post("/inventory")
+async def inventory(request: InventoryRequest):
+    """Stock gap and transfer plan for one product against a demand figure"""
+    from .tools import _inventory_svc
+
+    return _checked(
+        await _inventory_svc.optimize_inventory(
+            request.product_sku, request.region, request.forecasted_demand
+        )
+    )
+
+
+@router.post("/inventory/batch")
+async def inventory_batch(batch: InventoryBatch):
+    from .tools import _inventory_svc
+
+    return _ndjson(
+        batch,
+        lambda r: _inventory_svc.optimize_inventory(r.product_sku, r.region, r.forecasted_demand),
+    )
+
+
+@router.get("/inventory/reservations")
+def reservations():
+    """Transfer units held by inventory plans (RESERVE_TRANSFERS), by reservation id"""
+    from .tools import _inventory_svc
+
+    return _inventory_svc.list_reservations()
+
+
+@router.post("/inventory/reservations/{reservation_id}/commit")
+def commit_reservation(reservation_id: str):
+    """Ship a reservation's units to its target warehouse"""
+    from .tools import _inventory_svc
+
+    return _checked(_inventory_svc.commit_reservation(reservation_id), status=404)
+
+
+@router.delete("/inventory/reservations/{reservation_id}")
+def release_reservation(reservation_id: str):
+    """Cancel a reservation; its units are available again"""
+    from .tools import _inventory_svc
+
+    return _checked(_inventory_svc.release_reservation(reservation_id), status=404)
+
+
+@router.get("/warehouses")
+def warehouses():
+    from .tools import _inventory_svc
+
+    return _inventory_svc.get_warehouse_status()
+
+
+@router.get("/products")
+async def products():
+    from .tools import _inventory_svc
+
+    return {"products": await _inventory_svc.list_products()}
+
+
+# Vendor
+
+@router.post("/vendor")
+async def vendor(request: VendorRequest):
+    """Supplier quotes, negotiation and purchase order for one SKU"""
+    from .tools import _vendor_svc
+
+    return _checked(
+        await _vendor_svc.negotiate_with_vendor(request.product_sku, request.quantity, request.urgency)
+    )
+
+
+@router.post("/vendor/batch")
+async def vendor_batch(batch: VendorBatch):
+    from .tools import _vendor_svc
+
+    return _ndjson(
+        batch,
+        lambda r: _vendor_svc.negotiate_with_vendor(r.product_sku, r.quantity, r.urgency),
+    )
+
+
+# Routing
+
+@router.post("/routes")
+async def routes(request: RouteRequest):
+    """Routes (and optionally consolidated trips) for one set of transfers"""
+    from .tools import _routing_svc
+
+    return _checked(
+        await _routing_svc.plan_delivery_route(
+            [t.model_dump(exclude_none=True) for t in request.transfers],
+            request.urgency,
+            request.consolidate,
+        )
+    )
+
+
+@router.post("/routes/batch")
+async def routes_batch(batch: RouteBatch):
+    from .tools import _routing_svc
+
+    return _ndjson(
+        batch,
+        lambda r: _routing_svc.plan_delivery_route(
+            [t.model_dump(exclude_none=True) for t in r.transfers], r.urgency, r.consolidate
+        ),
+    )
+
+
+# Full workflow
+
+@router.post("/pipeline/batch")
+async def pipeline_batch(batch: PipelineBatch):
+    """The replenishment pipeline for many product/region events, streamed as NDJSON"""
+    return _ndjson(batch, run_pipeline)
@@ -0,0 +1,262 @@
+import time
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+
+DistanceFn = Callable[[str, str], Optional[float]]
+
+
+class TripConsolidator:
+    """
+    Consolidates shipments onto shared multi-stop trips:
+    - Splits shipments larger than the vehicle into capacity-sized parts
+    - Groups shipments by delivery destination
+    - Merges pickups with Clarke-Wright savings under vehicle capacity
+    - Improves trips with 2-opt and relocate moves within a time budget
+    - Compares the result with one truck per shipment
+    """
+
+    def __init__(
+        self,
+        distance_fn: DistanceFn,
+        vehicle_capacity: int = 1000,
+        cost_per_km: float = 10,
+        speed_kmh: float = 55,
+        handling_cost_per_unit: int = 2,
+        stop_hours: float = 1.0
+    ):
+        self.distance_fn = distance_fn
+        self.vehicle_capacity = vehicle_capacity
+        self.cost_per_km = cost_per_km
+        self.speed_kmh = speed_kmh
+        self.handling_cost_per_unit = handling_cost_per_unit
+        self.stop_hours = stop_hours  # loading time per extra pickup stop
+
+    def consolidate(
+        self,
+        shipments: List[Dict],
+        time_budget_ms: float = 50
+    ) -> Dict[str, Any]:
+        """
+        Plan trips for shipments.
+
+        Each shipment needs origin, destination and quantity. An optional
+        distance_km overrides the distance function for the direct leg.
+        A shipment over vehicle_capacity is planned as several parts, each
+        marked with part and parts, so no trip exceeds the capacity.
+        """
+        deadline = time.perf_counter() + time_budget_ms / 1000
+        shipments = self._split_oversized(shipments)
+
+        by_destination: Dict[str, List[int]] = {}
+        for i, shipment in enumerate(shipments):
+            by_destination.setdefault(shipment["destination"], []).append(i)
+
+        trips = []
+        for destination, members in by_destination.items():
+            dist = self._distance_matrix(shipments, members, destination)
+            routes = self._savings(shipments, members, dist)
+            self._local_search(shipments, routes, dist, deadline)
+            trips.extend(
+                self._describe_trip(shipments, route, destination, dist)
+                for route in routes
+            )
+
+        naive_cost = sum(
+            self._trip_cost([int(self._shipment_leg(s))], s["quantity"]) for s in shipments
+        )
+        consolidated_cost = sum(t["cost"] for t in trips)
+
+        return {
+            "trips": trips,
+            "total_trips": len(trips),
+            "naive_trips": len(shipments),
+            "naive_cost": naive_cost,
+            "consolidated_cost": consolidated_cost,
+            "savings": naive_cost - consolidated_cost,
+            "savings_percent": (
+                round((naive_cost - consolidated_cost) / naive_cost * 100, 1)
+                if naive_cost else 0
+            ),
+        }
+
+    def _split_oversized(self, shipments: List[Dict]) -> List[Dict]:
+        """Full truckloads first, then the remainder"""
+        split = []
+        for shipment in shipments:
+            quantity = shipment["quantity"]
+            if quantity <= self.vehicle_capacity:
+                split.append(shipment)
+                continue
+            full, rest = divmod(quantity, self.vehicle_capacity)
+            loads = [self.vehicle_capacity] * full + ([rest] if rest else [])
+            split.extend(
+                {**shipment, "quantity": load, "part": number, "parts": len(loads)}
+                for number, load in enumerate(loads, start=1)
+            )
+        return split
+
+    def _shipment_leg(self, shipment: Dict) -> float:
+        if shipment.get("distance_km") is not None:
+            return shipment["distance_km"]
+        distance = self.distance_fn(shipment["origin"], shipment["destination"])
+        return distance if distance is not None else 1000
+
+    def _distance_matrix(
+        self,
+        shipments: List[Dict],
+        members: List[int],
+        destination: str
+    ) -> Dict[Tuple[Any, Any], float]:
+        """Pairwise pickup distances plus pickup -> destination"""
+        dist = {}
+        for i in members:
+            dist[(i, "D")] = self._shipment_leg(shipments[i])
+            for j in members:
+                if i == j:
+                    continue
+                a, b = shipments[i]["origin"], shipments[j]["origin"]
+                if a == b:
+                    dist[(i, j)] = 0.0
+                else:
+                    d = self.distance_fn(a, b)
+                    dist[(i, j)] = d if d is not None else float("inf")
+        return dist
+
+    @staticmethod
+    def _route_distance(route: List[int], dist: Dict) -> float:
+        total = sum(dist[(a, b)] for a, b in zip(route, route[1:]))
+        return total + dist[(route[-1], "D")]
+
+    def _savings(
+        self,
+        shipments: List[Dict],
+        members: List[int],
+        dist: Dict
+    ) -> List[List[int]]:
+        """Clarke-Wright savings for open routes that end at the destination"""
+        routes = {i: [i] for i in members}
+        load = {i: shipments[i]["quantity"] for i in members}
+        route_of = {i: i for i in members}
+
+        # Appending route B after the last stop a of route A replaces the
+        # a -> D leg with a -> b.
+        candidates = sorted(
+            (
+                (dist[(a, "D")] - dist[(a, b)], a, b)
+                for a in members for b in members
+                if a != b and dist[(a, b)] != float("inf")
+            ),
+            reverse=True
+        )
+        for saving, a, b in candidates:
+            if saving <= 0:
+                break
+            ra, rb = route_of[a], route_of[b]
+            if ra == rb:
+                continue
+            if routes[ra][-1] != a or routes[rb][0] != b:
+                continue
+            if load[ra] + load[rb] > self.vehicle_capacity:
+                continue
+            routes[ra].extend(routes[rb])
+            load[ra] += load.pop(rb)
+            for stop in routes.pop(rb):
+                route_of[stop] = ra
+
+        return list(routes.values())
+
+    def _local_search(
+        self,
+        shipments: List[Dict],
+        routes: List[List[int]],
+        dist: Dict,
+        deadline: float
+    ):
+        """2-opt inside trips and relocate between trips, first improvement"""
+        improved = True
+        while improved and time.perf_counter() < deadline:
+            improved = False
+
+            for route in routes:
+                best = self._route_distance(route, dist)
+                for i in range(len(route) - 1):
+                    for j in range(i + 1, len(route)):
+                        candidate = route[:i] + route[i:j + 1][::-1] + route[j + 1:]
+                        length = self._route_distance(candidate, dist)
+                        if length < best - 1e-9:
+                            route[:] = candidate
+                            best = length
+                            improved = True
+
+            for source in routes:
+                for stop in list(source):
+                    if time.perf_counter() >= deadline:
+                        return
+                    quantity = shipments[stop]["quantity"]
+                    rest = [s for s in source if s != stop]
+                    removal_gain = self._route_distance(source, dist) - (
+                        self._route_distance(rest, dist) if rest else 0
+                    )
+                    best_move = None
+                    for target in routes:
+                        if target is source or not target:
+                            continue
+                        if sum(shipments[s]["quantity"] for s in target) + quantity > self.vehicle_capacity:
+                            continue
+                        base = self._route_distance(target, dist)
+                        for pos in range(len(target) + 1):
+                            candidate = target[:pos] + [stop] + target[pos:]
+                            added = self._route_distance(candidate, dist) - base
+                            if added < removal_gain - 1e-9 and (
+                                best_move is None or added < best_move[0]
+                            ):
+                                best_move = (added, target, pos)
+                    if best_move:
+                        _, target, pos = best_move
+                        target.insert(pos, stop)
+                        source.remove(stop)
+                        improved = True
+
+            routes[:] = [r for r in routes if r]
+
+    def _trip_cost(self, legs_km: List[float], quantity: int) -> int:
+        return int(sum(legs_km) * self.cost_per_km) + quantity * self.handling_cost_per_unit
+
+    def _describe_trip(
+        self,
+        shipments: List[Dict],
+        route: List[int],
+        destination: str,
+        dist: Dict
+    ) -> Dict[str, Any]:
+        stops = [shipments[i]["origin"] for i in route]
+        legs = []
+        for a, b in zip(route, route[1:]):
+            if dist[(a, b)] > 0:
+                legs.append({
+                    "from": shipments[a]["origin"],
+                    "to": shipments[b]["origin"],
+                    "distance_km": int(dist[(a, b)]),
+                })
+        legs.append({
+            "from": shipments[route[-1]]["origin"],
+            "to": destination,
+            "distance_km": int(dist[(route[-1], "D")]),
+        })
+
+        distance_km = sum(leg["distance_km"] for leg in legs)
+        quantity = sum(shipments[i]["quantity"] for i in route)
+        pickup_stops = len(dict.fromkeys(stops))
+
+        return {
+            "destination": destination,
+            "stops": list(dict.fromkeys(stops)),
+            "shipments": [shipments[i] for i in route],
+            "quantity": quantity,
+            "distance_km": distance_km,
+            "legs": legs,
+            "cost": self._trip_cost([leg["distance_km"] for leg in legs], quantity),
+            "eta_hours": int(
+                distance_km / self.speed_kmh + (pickup_stops - 1) * self.stop_hours
+            ),
+        }
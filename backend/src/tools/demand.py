@@ -1,6 +1,11 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any
 from src.data.products import PRODUCT_CATALOG
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import instrumented
+
+
+log = get_logger("tools.demand")
 
 
 class DemandAgent:
@@ -16,6 +21,7 @@ class DemandAgent:
         self.demo_mode = demo_mode
         self.name = "demand"
     
+    @instrumented("service")
     async def forecast_demand(
         self,
         product_sku: str,
@@ -27,7 +33,7 @@ class DemandAgent:
         
         This function is called by Google ADK as a tool
         """
-        print(f"\nDEMAND AGENT: Analyzing demand for {product_sku} in {region}")
+        log.info("Analyzing demand for {} in {}", product_sku, region)
         
         # 1. Get product details
         product = self._get_product(product_sku)
@@ -58,11 +64,11 @@ class DemandAgent:
         # 6. Detect spikes
         spike_detected = forecast["peak_demand"] > (historical_data["avg_daily"] * 3)
         
-        print(f"Baseline demand: {historical_data['avg_daily']} units/day")
-        print(f"Predicted peak: {forecast['peak_demand']} units/day")
+        log.debug("Baseline demand: {} units/day", historical_data["avg_daily"])
+        log.debug("Predicted peak: {} units/day", forecast["peak_demand"])
         
         if spike_detected:
-            print(f"SPIKE DETECTED: {forecast['spike_multiplier']}x normal demand!")
+            log.info("Spike detected: {}x normal demand", forecast["spike_multiplier"])
         
         return {
             "status": "success",
@@ -265,4 +271,5 @@ async def test_demand_agent():
 
 if __name__ == "__main__":
     import asyncio
+    configure_logging("debug", threaded=False)
     asyncio.run(test_demand_agent())
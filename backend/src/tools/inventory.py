@@ -1,6 +1,13 @@
+import uuid
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from src.data.products import INITIAL_INVENTORY, PRODUCT_CATALOG
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import instrumented
+from .stock import StockMatrix
+
+
+log = get_logger("tools.inventory")
 
 
 class InventoryAgent:
@@ -10,25 +17,49 @@ class InventoryAgent:
     - Identifies gaps vs demand forecast
     - Plans inter-warehouse transfers
     - Recommends external purchases
+    - Reads stock from a StockMatrix (shared across workers when file-backed)
+    - With reserve_transfers, holds the planned transfer units under one
+      reservation id until it is committed (routed) or released, or expires
     """
     
-    def __init__(self, demo_mode: bool = True):
+    def __init__(
+        self,
+        demo_mode: bool = True,
+        stock: Optional[StockMatrix] = None,
+        reserve_transfers: bool = False,
+        reservation_ttl: float = 900
+    ):
         self.demo_mode = demo_mode
         self.name = "inventory"
+        self.stock = stock or StockMatrix.from_catalog()
+        # Hold planned transfer units so concurrent plans can't promise them twice
+        self.reserve_transfers = reserve_transfers
+        self.reservation_ttl = reservation_ttl
         
+    @instrumented("service")
     async def optimize_inventory(
         self,
         product_sku: str,
         region: str,
         forecasted_demand: int,
-        current_stock: int = None
+        current_stock: int = None,
+        reservation_id: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Main entry point for inventory optimization
         
-        Called by Google ADK as a tool
+        Called by Google ADK as a tool. A reservation_id that already holds
+        units is released first, so re-planning (a retried tool call, a new
+        chat turn) replaces the earlier hold instead of adding to it.
         """
-        print(f"\nINVENTORY AGENT: Optimizing stock for {product_sku} in {region}")
+        log.info("Optimizing stock for {} in {}", product_sku, region)
+        
+        if self.reserve_transfers:
+            self.stock.expire_holds()
+            if reservation_id:
+                self.stock.release_hold(reservation_id)
+            else:
+                reservation_id = f"RSV-{uuid.uuid4().hex[:12]}"
         
         # 1. Get current inventory across all warehouses
         inventory_status = self._get_inventory_status(product_sku)
@@ -42,14 +73,18 @@ class InventoryAgent:
             target_warehouse["id"], 0
         )
         
-        print(f"   Current stock in {region}: {current_stock_target} units")
-        print(f"   Forecasted demand: {forecasted_demand} units")
+        log.debug(
+            "Current stock in {}: {} units, forecasted demand: {} units",
+            region,
+            current_stock_target,
+            forecasted_demand,
+        )
         
         # 3. Calculate gap
         gap = forecasted_demand - current_stock_target
         
         if gap <= 0:
-            print(f"Stock sufficient! Surplus: {abs(gap)} units")
+            log.debug("Stock sufficient, surplus: {} units", -gap)
             return {
                 "status": "success",
                 "action": "none_needed",
@@ -59,14 +94,15 @@ class InventoryAgent:
                 "message": "Stock levels adequate"
             }
         
-        print(f"SHORTFALL: {gap} units needed!")
+        log.info("Shortfall: {} units needed", gap)
         
         # 4. Find surplus in other warehouses
         transfers = self._plan_transfers(
             product_sku=product_sku,
             target_warehouse_id=target_warehouse["id"],
             needed_quantity=gap,
-            inventory_status=inventory_status
+            inventory_status=inventory_status,
+            reservation_id=reservation_id
         )
         
         total_transferable = sum(t["quantity"] for t in transfers)
@@ -92,28 +128,32 @@ class InventoryAgent:
             "estimated_cost_transfers": sum(t["estimated_cost"] for t in transfers),
             "timestamp": datetime.utcnow().isoformat()
         }
+        if self.reserve_transfers and transfers:
+            result["reservation_id"] = reservation_id
+            result["reservation_ttl_seconds"] = self.reservation_ttl
         
-        print(f"Solution found:")
         if transfers:
-            print(f"      - Internal transfers: {total_transferable} units from {len(transfers)} warehouses")
+            log.debug(
+                "Internal transfers: {} units from {} warehouses",
+                total_transferable,
+                len(transfers),
+            )
         if reorder_needed:
-            print(f"      - External order: {result['reorder_quantity']} units (includes {safety_buffer} buffer)")
+            log.debug(
+                "External order: {} units (includes {} buffer)",
+                result["reorder_quantity"],
+                safety_buffer,
+            )
         
         return result
     
     def _get_inventory_status(self, product_sku: str) -> Dict:
-        """Get current inventory across all warehouses"""
-        by_warehouse = {}
-        total = 0
-        
-        for warehouse in INITIAL_INVENTORY["warehouses"]:
-            stock = warehouse["stock"].get(product_sku, 0)
-            by_warehouse[warehouse["id"]] = stock
-            total += stock
+        """Get current inventory across all warehouses (available = on hand - reserved)"""
+        by_warehouse = self.stock.levels(product_sku)
         
         return {
             "product_sku": product_sku,
-            "total_network": total,
+            "total_network": sum(by_warehouse.values()),
             "by_warehouse": by_warehouse
         }
     
@@ -141,7 +181,8 @@ class InventoryAgent:
         product_sku: str,
         target_warehouse_id: str,
         needed_quantity: int,
-        inventory_status: Dict
+        inventory_status: Dict,
+        reservation_id: Optional[str] = None
     ) -> List[Dict]:
         """Plan inter-warehouse transfers"""
         transfers = []
@@ -152,7 +193,7 @@ class InventoryAgent:
             if warehouse["id"] == target_warehouse_id:
                 continue  # Skip target warehouse
             
-            current_stock = warehouse["stock"].get(product_sku, 0)
+            current_stock = inventory_status["by_warehouse"].get(warehouse["id"], 0)
             
             # Keep minimum 30% in source warehouse
             min_stock = int(current_stock * 0.3)
@@ -160,6 +201,19 @@ class InventoryAgent:
             
             if available_for_transfer > 0 and remaining_need > 0:
                 transfer_qty = min(available_for_transfer, remaining_need)
+                if self.reserve_transfers:
+                    # Atomic re-check: another worker may have reserved since the read
+                    transfer_qty = self.stock.reserve(
+                        warehouse["id"],
+                        product_sku,
+                        transfer_qty,
+                        keep=min_stock,
+                        hold=reservation_id,
+                        ttl_seconds=self.reservation_ttl,
+                        to_warehouse=target_warehouse_id,
+                    )
+                    if transfer_qty == 0:
+                        continue
                 
                 # Calculate cost (mock)
                 distance_map = {
@@ -182,19 +236,45 @@ class InventoryAgent:
                     "distance_km": distance,
                     "estimated_cost": estimated_cost,
                     "transit_time_hours": int(distance / 60),  # Assume 60 km/hr
-                    "mode": "truck"
+                    "mode": "truck",
+                    "reserved": self.reserve_transfers
                 })
                 
                 remaining_need -= transfer_qty
         
         return transfers
     
+    @instrumented("service")
+    def commit_reservation(self, reservation_id: str) -> Dict[str, Any]:
+        """Ship a reservation's units to its target warehouse (transfer routed)"""
+        shipped = self.stock.commit_hold(reservation_id)
+        if not shipped:
+            return {"status": "error", "message": f"No open reservation {reservation_id}"}
+        log.info("Committed reservation {}: {} units shipped", reservation_id, shipped)
+        return {"status": "success", "reservation_id": reservation_id, "units_shipped": shipped}
+    
+    @instrumented("service")
+    def release_reservation(self, reservation_id: str) -> Dict[str, Any]:
+        """Give a reservation's units back without moving stock"""
+        released = self.stock.release_hold(reservation_id)
+        if not released:
+            return {"status": "error", "message": f"No open reservation {reservation_id}"}
+        log.info("Released reservation {}: {} units", reservation_id, released)
+        return {"status": "success", "reservation_id": reservation_id, "units_released": released}
+    
+    def list_reservations(self) -> Dict[str, Any]:
+        """Open reservations, after dropping expired ones"""
+        expired = self.stock.expire_holds()
+        return {"reservations": self.stock.holds(), "expired": expired}
+    
+    @instrumented("service")
     def get_warehouse_status(self) -> Dict:
         """Get status of all warehouses (for chat agent)"""
         warehouses = []
+        totals = self.stock.on_hand_totals()
         
         for wh in INITIAL_INVENTORY["warehouses"]:
-            total_items = sum(wh["stock"].values())
+            total_items = totals.get(wh["id"], 0)
             utilization = (total_items / wh["capacity"]) * 100
             
             warehouses.append({
@@ -209,6 +289,7 @@ class InventoryAgent:
         
         return {"warehouses": warehouses}
     
+    @instrumented("service")
     async def list_products(self) -> List[Dict]:
         """List all products (for chat agent)"""
         all_products = []
@@ -271,8 +352,22 @@ async def test_inventory_agent():
     print(f"   External order needed: {result['reorder_needed']}")
     if result['reorder_needed']:
         print(f"   Order quantity: {result['reorder_quantity']} units")
+    
+    # Re-planning under the same reservation replaces the hold; releasing it
+    # returns available stock to where it started
+    agent = InventoryAgent(demo_mode=True, reserve_transfers=True)
+    before = agent.stock.levels("RC-FULL-NVY-M")
+    for _ in range(3):
+        result = await agent.optimize_inventory(
+            "RC-FULL-NVY-M", "Mumbai", 348, reservation_id="RSV-demo"
+        )
+    print(f"\nReserved after 3 plans: {result['total_transferable']} units in {list(agent.stock.holds())}")
+    print(f"   {agent.release_reservation('RSV-demo')}")
+    assert agent.stock.levels("RC-FULL-NVY-M") == before, "reservation cycle leaked stock"
+    print(f"   Available again: {agent.stock.levels('RC-FULL-NVY-M')}")
 
 
 if __name__ == "__main__":
     import asyncio
+    configure_logging("debug", threaded=False)
     asyncio.run(test_inventory_agent())
@@ -0,0 +1,264 @@
+import csv
+import heapq
+import math
+from array import array
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.core.config import settings
+
+
+DEFAULT_NETWORK_DIR = Path(__file__).resolve().parent.parent / "data" / "network"
+
+# Edge type in edges.csv -> transport mode in settings.transport_modes
+EDGE_MODES = {"road": "truck", "rail": "train"}
+METRICS = ("time", "cost")
+
+
+class RoadRailNetwork:
+    """
+    Road/rail network graph for shortest-path routing:
+    - Loads nodes.csv / edges.csv into a CSR adjacency structure
+    - Answers shortest-time and shortest-cost queries (A*)
+    - Precomputes hub-to-hub tables for warehouse-to-warehouse lookups
+    - Returns per-leg route details
+    """
+
+    def __init__(
+        self,
+        nodes: List[Dict],
+        edges: List[Dict],
+        modes: Optional[Dict[str, Dict]] = None
+    ):
+        self.node_ids = [n["id"] for n in nodes]
+        self.lat = array("d", (float(n["lat"]) for n in nodes))
+        self.lon = array("d", (float(n["lon"]) for n in nodes))
+        self.hubs = [i for i, n in enumerate(nodes) if str(n.get("hub", "0")) == "1"]
+
+        self._index = {}
+        for i, node in enumerate(nodes):
+            self._index[node["id"].lower()] = i
+            for alias in (node.get("aliases") or "").split("|"):
+                if alias:
+                    self._index[alias.lower()] = i
+
+        self._mode_names = sorted(set(EDGE_MODES.values()))
+        self._build_csr(edges)
+        self._route_cache: Dict[Tuple[int, int, str], Dict] = {}
+        self._hub_tables: Dict[Tuple[int, str], Tuple[List[float], List[int]]] = {}
+        self.reprice(modes or settings.transport_modes)
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path = DEFAULT_NETWORK_DIR,
+        modes: Optional[Dict[str, Dict]] = None
+    ) -> "RoadRailNetwork":
+        """Load the network from nodes.csv and edges.csv in directory"""
+        directory = Path(directory)
+        with open(directory / "nodes.csv", newline="") as f:
+            nodes = list(csv.DictReader(f))
+        with open(directory / "edges.csv", newline="") as f:
+            edges = list(csv.DictReader(f))
+        return cls(nodes, edges, modes)
+
+    def _build_csr(self, edges: List[Dict]):
+        """Build CSR arrays; every edge is traversable in both directions"""
+        n = len(self.node_ids)
+        pairs = []
+        for edge in edges:
+            u = self._index[edge["from"].lower()]
+            v = self._index[edge["to"].lower()]
+            mode = EDGE_MODES[edge["mode"]]
+            distance = float(edge["distance_km"])
+            pairs.append((u, v, mode, distance))
+            pairs.append((v, u, mode, distance))
+        pairs.sort(key=lambda p: p[0])
+
+        self.offsets = array("l", [0] * (n + 1))
+        for u, _, _, _ in pairs:
+            self.offsets[u + 1] += 1
+        for i in range(n):
+            self.offsets[i + 1] += self.offsets[i]
+
+        self.sources = array("l", (p[0] for p in pairs))
+        self.targets = array("l", (p[1] for p in pairs))
+        self.edge_mode = array("b", (self._mode_names.index(p[2]) for p in pairs))
+        self.edge_km = array("d", (p[3] for p in pairs))
+
+        # Great-circle stretch: keeps the A* heuristic admissible if an edge
+        # is shorter than the straight line between its endpoints.
+        stretch = min(
+            (p[3] / max(self._haversine(p[0], p[1]), 1e-9) for p in pairs),
+            default=1.0
+        )
+        self._stretch = min(stretch, 1.0)
+
+    def reprice(self, modes: Dict[str, Dict]):
+        """Recompute edge hours/costs and hub tables for new mode profiles"""
+        speed = [modes[m]["speed_kmh"] for m in self._mode_names]
+        cost = [modes[m]["cost_per_km"] for m in self._mode_names]
+        self.edge_hours = array(
+            "d", (km / speed[m] for km, m in zip(self.edge_km, self.edge_mode))
+        )
+        self.edge_cost = array(
+            "d", (km * cost[m] for km, m in zip(self.edge_km, self.edge_mode))
+        )
+
+        # A* lower bounds: great-circle km scaled to hours / rupees
+        self._per_km_bound = {
+            "time": self._stretch / max(speed),
+            "cost": self._stretch * min(cost),
+        }
+
+        self._route_cache.clear()
+        self._hub_tables.clear()
+        self._precompute_hub_tables()
+
+    def _weights(self, metric: str) -> array:
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        return self.edge_hours if metric == "time" else self.edge_cost
+
+    def _haversine(self, u: int, v: int) -> float:
+        """Great-circle distance in km between two nodes"""
+        lat1, lon1 = math.radians(self.lat[u]), math.radians(self.lon[u])
+        lat2, lon2 = math.radians(self.lat[v]), math.radians(self.lon[v])
+        a = (
+            math.sin((lat2 - lat1) / 2) ** 2
+            + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+        )
+        return 6371.0 * 2 * math.asin(math.sqrt(a))
+
+    def _dijkstra(
+        self,
+        source: int,
+        metric: str,
+        target: Optional[int] = None
+    ) -> Tuple[List[float], List[int]]:
+        """
+        Shortest paths from source. With a target, runs A* and stops
+        as soon as the target is settled.
+        """
+        weights = self._weights(metric)
+        offsets, targets = self.offsets, self.targets
+        n = len(self.node_ids)
+        dist = [math.inf] * n
+        pred = [-1] * n  # index of the edge used to reach each node
+        dist[source] = 0.0
+
+        per_km = self._per_km_bound[metric]
+        if target is None:
+            heuristic = lambda v: 0.0
+        else:
+            heuristic = lambda v: self._haversine(v, target) * per_km
+
+        heap = [(heuristic(source), source)]
+        settled = [False] * n
+        while heap:
+            _, u = heapq.heappop(heap)
+            if settled[u]:
+                continue
+            settled[u] = True
+            if u == target:
+                break
+            du = dist[u]
+            for e in range(offsets[u], offsets[u + 1]):
+                v = targets[e]
+                nd = du + weights[e]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    pred[v] = e
+                    heapq.heappush(heap, (nd + heuristic(v), v))
+        return dist, pred
+
+    def _precompute_hub_tables(self):
+        """One full shortest-path tree per hub and metric"""
+        for hub in self.hubs:
+            for metric in METRICS:
+                self._hub_tables[(hub, metric)] = self._dijkstra(hub, metric)
+
+        # Warm the route cache for every hub pair
+        for source in self.hubs:
+            for target in self.hubs:
+                if source != target:
+                    for metric in METRICS:
+                        self._route(source, target, metric)
+
+    def resolve(self, location: Optional[str]) -> Optional[int]:
+        """Map a city, warehouse name/id or supplier location to a node"""
+        if not location:
+            return None
+        key = location.strip().lower()
+        if key in self._index:
+            return self._index[key]
+        # "Pune, Maharashtra" / "Noida, Delhi NCR"
+        for part in key.split(","):
+            part = part.strip()
+            if part in self._index:
+                return self._index[part]
+        if key.endswith(" warehouse"):
+            return self._index.get(key[: -len(" warehouse")])
+        return None
+
+    def route(
+        self,
+        origin: str,
+        destination: str,
+        metric: str = "time"
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Shortest route between two locations.
+
+        Returns None if either endpoint is unknown or unreachable. The
+        returned dict is cached and shared between callers — do not mutate.
+        """
+        source, target = self.resolve(origin), self.resolve(destination)
+        if source is None or target is None or source == target:
+            return None
+        return self._route(source, target, metric)
+
+    def _route(self, source: int, target: int, metric: str) -> Optional[Dict]:
+        key = (source, target, metric)
+        cached = self._route_cache.get(key)
+        if cached is not None:
+            return cached
+
+        table = self._hub_tables.get((source, metric))
+        dist, pred = table if table else self._dijkstra(source, metric, target)
+        if math.isinf(dist[target]):
+            return None
+
+        edges = []
+        node = target
+        while node != source:
+            e = pred[node]
+            edges.append(e)
+            node = self.sources[e]
+        edges.reverse()
+
+        legs = []
+        for e in edges:
+            mode = self._mode_names[self.edge_mode[e]]
+            legs.append({
+                "from": self.node_ids[self.sources[e]],
+                "to": self.node_ids[self.targets[e]],
+                "mode": mode,
+                "distance_km": int(self.edge_km[e]),
+                "transit_hours": round(self.edge_hours[e], 1),
+                "cost": int(self.edge_cost[e]),
+            })
+
+        modes = {leg["mode"] for leg in legs}
+        route = {
+            "from": self.node_ids[source],
+            "to": self.node_ids[target],
+            "metric": metric,
+            "distance_km": sum(leg["distance_km"] for leg in legs),
+            "mode": modes.pop() if len(modes) == 1 else "multimodal",
+            "transit_hours": sum(self.edge_hours[e] for e in edges),
+            "cost": sum(leg["cost"] for leg in legs),
+            "legs": legs,
+        }
+        self._route_cache[key] = route
+        return route
@@ -0,0 +1,261 @@
+import asyncio
+import random
+import uuid
+from collections import deque
+from datetime import datetime
+from email.message import EmailMessage
+from typing import Deque, Dict, Any, List, Optional
+
+from src.utils.rate_limit import TokenBucket
+
+
+SEVERITY_RANK = {"info": 0, "high": 1, "critical": 2}
+
+
+class StubWebhookSink:
+    """
+    Local stand-in for a Slack/webhook endpoint:
+    - Records the last max_kept delivered payloads in memory
+    - Optional latency and failure rate to exercise retries
+    """
+
+    def __init__(
+        self,
+        url: str = "http://localhost/webhook",
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        max_kept: int = 1000
+    ):
+        self.url = url
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.received: Deque[Dict] = deque(maxlen=max_kept)
+
+    async def deliver(self, delivery: Dict):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError(f"webhook {self.url} unavailable")
+        self.received.append({
+            "url": self.url,
+            "payload": {
+                "channel": delivery["recipient"],
+                "text": "\n\n".join(delivery["messages"]),
+            },
+            "received_at": datetime.utcnow().isoformat(),
+        })
+
+
+class StubSMTPSink:
+    """
+    Local stand-in for an SMTP relay:
+    - Builds a real EmailMessage per delivery and keeps the last max_kept
+    - Optional latency and failure rate to exercise retries
+    """
+
+    def __init__(
+        self,
+        sender: str = "alerts@styleflow.in",
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        max_kept: int = 1000
+    ):
+        self.sender = sender
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.outbox: Deque[EmailMessage] = deque(maxlen=max_kept)
+
+    async def deliver(self, delivery: Dict):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ConnectionError("SMTP relay unavailable")
+        message = EmailMessage()
+        message["From"] = self.sender
+        message["To"] = delivery["recipient"]
+        message["Subject"] = (
+            f"[{delivery['severity'].upper()}] Supply chain alert"
+            + (f" ({len(delivery['messages'])} updates)" if len(delivery["messages"]) > 1 else "")
+        )
+        message.set_content("\n\n".join(delivery["messages"]))
+        self.outbox.append(message)
+
+
+class NotificationDispatcher:
+    """
+    Background notification delivery:
+    - One asyncio queue and worker per channel
+    - Batches queued notifications and merges them per recipient
+    - Per-channel rate limits
+    - Exponential-backoff retries, then a dead-letter list
+    """
+
+    def __init__(
+        self,
+        sinks: Dict[str, Any],
+        batch_size: int = 50,
+        batch_window: float = 0.05,
+        rate_limits: Optional[Dict[str, float]] = None,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        max_queue: int = 10000
+    ):
+        self.sinks = sinks
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.rate_limits = rate_limits or {"slack": 1.0, "email": 10.0}
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.max_queue = max_queue
+
+        self._loop = None
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: Dict[str, asyncio.Task] = {}
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.dead_letters = deque(maxlen=1000)
+        self.stats = {
+            "enqueued": 0,
+            "delivered_notifications": 0,
+            "deliveries": 0,  # one per recipient per batch
+            "coalesced": 0,
+            "retries": 0,
+            "failed_notifications": 0,
+            "dropped": 0,
+        }
+
+    def enqueue(
+        self,
+        channel: str,
+        recipients: List[str],
+        message: str,
+        severity: str
+    ) -> Dict[str, Any]:
+        """Queue a notification and return immediately"""
+        notification = {
+            "notification_id": f"NTF-{uuid.uuid4().hex[:12]}",
+            "channel": channel,
+            "recipients": recipients,
+            "message": message,
+            "severity": severity,
+            "queued_at": datetime.utcnow().isoformat(),
+        }
+        receipt = {
+            "notification_id": notification["notification_id"],
+            "channel": channel,
+            "recipients": recipients,
+            "message_preview": message[:100] + "...",
+            "severity": severity,
+            "queued_at": notification["queued_at"],
+            "status": "queued",
+        }
+
+        if channel not in self.sinks:
+            receipt["status"] = "unsupported_channel"
+            return receipt
+
+        try:
+            self._queue_for(channel).put_nowait(notification)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            receipt["status"] = "dropped"
+            return receipt
+
+        self.stats["enqueued"] += 1
+        return receipt
+
+    def _queue_for(self, channel: str) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Queues and workers belong to one event loop
+            self._loop = loop
+            self._queues.clear()
+            self._workers.clear()
+            self._buckets.clear()
+
+        if channel not in self._queues:
+            self._queues[channel] = asyncio.Queue(maxsize=self.max_queue)
+            self._buckets[channel] = TokenBucket(self.rate_limits.get(channel, 5.0), capacity=1)
+        worker = self._workers.get(channel)
+        if worker is None or worker.done():
+            self._workers[channel] = loop.create_task(self._worker(channel))
+        return self._queues[channel]
+
+    async def _worker(self, channel: str):
+        queue = self._queues[channel]
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                for delivery in self._coalesce(batch):
+                    await self._buckets[channel].acquire()
+                    await self._deliver(channel, delivery)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def _coalesce(self, batch: List[Dict]) -> List[Dict]:
+        """One delivery per recipient; identical messages are sent once"""
+        deliveries: Dict[str, Dict] = {}
+        for notification in batch:
+            for recipient in notification["recipients"]:
+                delivery = deliveries.setdefault(recipient, {
+                    "recipient": recipient,
+                    "severity": notification["severity"],
+                    "messages": [],
+                    "notification_ids": [],
+                })
+                if SEVERITY_RANK.get(notification["severity"], 0) > SEVERITY_RANK.get(delivery["severity"], 0):
+                    delivery["severity"] = notification["severity"]
+                if notification["message"] in delivery["messages"]:
+                    self.stats["coalesced"] += 1
+                else:
+                    delivery["messages"].append(notification["message"])
+                delivery["notification_ids"].append(notification["notification_id"])
+        return list(deliveries.values())
+
+    async def _deliver(self, channel: str, delivery: Dict):
+        sink = self.sinks[channel]
+        for attempt in range(self.max_retries + 1):
+            try:
+                await sink.deliver(delivery)
+                self.stats["deliveries"] += 1
+                self.stats["delivered_notifications"] += len(delivery["notification_ids"])
+                return
+            except Exception as exc:
+                if attempt == self.max_retries:
+                    self.stats["failed_notifications"] += len(delivery["notification_ids"])
+                    self.dead_letters.append({
+                        "channel": channel,
+                        "delivery": delivery,
+                        "error": str(exc),
+                        "failed_at": datetime.utcnow().isoformat(),
+                    })
+                    return
+                self.stats["retries"] += 1
+                delay = self.backoff_base * (2 ** attempt)
+                await asyncio.sleep(delay * (0.5 + random.random()))
+
+    async def flush(self):
+        """Wait until everything queued so far has been delivered or dead-lettered"""
+        await asyncio.gather(*(q.join() for q in self._queues.values()))
+
+    async def close(self):
+        """Drain the queues, then stop the workers"""
+        await self.flush()
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._workers.clear()
+
+    def queue_depths(self) -> Dict[str, int]:
+        return {channel: q.qsize() for channel, q in self._queues.items()}
@@ -0,0 +1,190 @@
+import time
+from typing import Optional
+
+from pydantic import BaseModel
+
+from src.core.config import settings
+from src.utils.metrics import instrumented
+from src.utils.state import StateWriter, SupplyChainState, read_workflow_state
+
+
+PIPELINE_AGENT = "ReplenishmentPipeline"
+
+
+class PipelineRequest(BaseModel):
+    product_sku: str
+    region: str
+    event_type: Optional[str] = None
+    urgency: Optional[str] = None  # defaults to high when a spike is detected
+    consolidate: bool = False
+    notify: bool = True
+    severity: Optional[str] = None  # forces an alert; default from spike/reorder
+
+
+class StepFailed(Exception):
+    """Raised when a pipeline step's service returns status=error; carries the HTTP status"""
+
+    def __init__(self, step: str, message: str, status: int = 422):
+        super().__init__(message)
+        self.step = step
+        self.message = message
+        self.status = status
+
+
+def _checked(step: str, result: dict) -> dict:
+    if result.get("status") == "error":
+        raise StepFailed(step, result.get("message", f"{step} failed"))
+    return result
+
+
+@instrumented("service", "ReplenishmentPipeline.run")
+async def run_pipeline(request: PipelineRequest) -> SupplyChainState:
+    """
+    Demand → Inventory → Vendor (if reorder needed) ∥ Routing (if transfers)
+    → Alert, calling the service classes directly with the orchestrator's
+    branching rules and no model round-trips.
+
+    Raises StepFailed when forecasting or inventory planning returns an
+    error (unknown SKU or region), since nothing after it can run.
+    """
+    from .tools import (
+        _alert_svc,
+        _demand_svc,
+        _event_summary,
+        _fan_out_sourcing,
+        _inventory_svc,
+        _settle_reservation,
+        _track,
+    )
+
+    session: dict = {}
+
+    def writer(tool_name: str) -> StateWriter:
+        return StateWriter(session, tool=tool_name, trace_slots=settings.trace_max_entries)
+
+    started = time.perf_counter()
+    forecast = await _demand_svc.forecast_demand(
+        request.product_sku, request.region, request.event_type
+    )
+    state = writer("forecast_demand")
+    state.update(
+        {
+            "product_sku": request.product_sku,
+            "region": request.region,
+            "event_type": request.event_type,
+        }
+    )
+    state.write_result(forecast)
+    _track(PIPELINE_AGENT, state, "forecast_demand", request.model_dump(), forecast, started)
+    _checked("forecast_demand", forecast)
+
+    urgency = request.urgency or ("high" if forecast["spike_detected"] else "normal")
+
+    started = time.perf_counter()
+    inventory = await _inventory_svc.optimize_inventory(
+        request.product_sku, request.region, forecast["total_7day_demand"]
+    )
+    state = writer("optimize_inventory")
+    state.write_result(inventory)
+    _track(
+        PIPELINE_AGENT,
+        state,
+        "optimize_inventory",
+        {
+            "product_sku": request.product_sku,
+            "region": request.region,
+            "forecasted_demand": forecast["total_7day_demand"],
+        },
+        inventory,
+        started,
+    )
+    _checked("optimize_inventory", inventory)
+
+    transfers = [
+        {**t, "to_warehouse": t.get("to_warehouse", inventory["target_warehouse"])}
+        for t in inventory.get("transfers") or []
+    ]
+    # Vendor and routing only depend on inventory: run them concurrently,
+    # then apply their (disjoint) fields one after the other
+    results = await _fan_out_sourcing(
+        request.product_sku,
+        inventory.get("reorder_quantity", 0) if inventory.get("reorder_needed") else 0,
+        transfers,
+        urgency,
+        request.consolidate,
+    )
+    inputs = {
+        "negotiate_with_vendor": {
+            "product_sku": request.product_sku,
+            "quantity": inventory.get("reorder_quantity", 0),
+            "urgency": urgency,
+        },
+        "plan_delivery_route": {
+            "transfers": transfers,
+            "urgency": urgency,
+            "consolidate": request.consolidate,
+        },
+    }
+    for tool_name, (result, started, finished) in results.items():
+        state = writer(tool_name)
+        state.write_result(result)
+        _track(
+            PIPELINE_AGENT,
+            state,
+            tool_name,
+            inputs[tool_name],
+            result,
+            started,
+            finished=finished,
+        )
+    vendor = results.get("negotiate_with_vendor", ({},))[0]
+    _settle_reservation(
+        inventory.get("reservation_id"),
+        results.get("plan_delivery_route", (None,))[0],
+        release_on_failure=True,
+    )
+
+    # Like the orchestrator: only alert when something needs attention,
+    # unless the caller asked for a specific severity
+    needs_attention = forecast["spike_detected"] or inventory.get("reorder_needed")
+    if request.notify and (request.severity or needs_attention):
+        started = time.perf_counter()
+        severity = request.severity or (
+            "critical" if forecast["spike_detected"] and inventory.get("reorder_needed")
+            else "high"
+        )
+        state = writer("send_supply_alerts")
+        event_description = (
+            f"{request.event_type.replace('_', ' ').title()} in {request.region}"
+            if request.event_type
+            else f"Replenishment run for {request.region}"
+        )
+        alert = await _alert_svc.send_alerts(
+            event_summary=_event_summary(
+                state,
+                event_description,
+                request.region,
+                forecast["spike_multiplier"],
+                forecast["peak_demand"],
+                inventory.get("reorder_quantity", 0),
+                vendor.get("vendor_selected", ""),
+                vendor.get("total_price", 0),
+            ),
+            severity=severity,
+        )
+        state["alert_severity"] = severity
+        state.write_result(alert)
+        _track(
+            PIPELINE_AGENT,
+            state,
+            "send_supply_alerts",
+            {
+                "event_description": event_description,
+                "region": request.region,
+                "severity": severity,
+            },
+            alert,
+            started,
+        )
+
+    return SupplyChainState(**read_workflow_state(session))
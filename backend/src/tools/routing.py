@@ -1,5 +1,116 @@
+import asyncio
+import json
 from datetime import datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.core.config import settings
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import instrumented
+from .consolidation import TripConsolidator
+
+
+log = get_logger("tools.routing")
+
+
+class RouteCostTable:
+    """
+    Memoized route plans per (origin, destination, mode, urgency):
+    - Transit hours, base cost, carrier and legs (copied into each response,
+      so callers can't alter the memoized plan)
+    - Mode profiles and thresholds come from settings
+    - Cleared whenever the routing configuration changes
+    """
+    
+    def __init__(self, network=None):
+        self.network = network  # Optional RoadRailNetwork for path routing
+        self._entries: Dict[Tuple, Dict] = {}
+        self._fingerprint = self._config_fingerprint()
+    
+    @staticmethod
+    def _config_fingerprint() -> str:
+        return json.dumps(
+            [
+                settings.transport_modes,
+                settings.express_truck_max_km,
+                settings.train_min_km,
+            ],
+            sort_keys=True
+        )
+    
+    def refresh(self):
+        """Drop memoized entries if the routing configuration changed"""
+        fingerprint = self._config_fingerprint()
+        if fingerprint == self._fingerprint:
+            return
+        self._fingerprint = fingerprint
+        self._entries.clear()
+        if self.network is not None:
+            self.network.reprice(settings.transport_modes)
+    
+    def select_mode(self, distance_km: int, urgency: str) -> str:
+        """Determine best transport mode"""
+        if urgency == "high" and distance_km < settings.express_truck_max_km:
+            return "express_truck"
+        elif distance_km > settings.train_min_km:
+            return "train"
+        return "truck"
+    
+    def lookup(
+        self,
+        origin: str,
+        destination: str,
+        urgency: str,
+        distance_km: Optional[int] = None
+    ) -> Dict:
+        """
+        Route plan for one origin/destination pair.
+        
+        Without a distance the pair is routed over the network (time-optimal
+        for high urgency, cost-optimal otherwise), falling back to 1000 km.
+        """
+        path = None
+        if distance_km is None and self.network is not None:
+            metric = "time" if urgency == "high" else "cost"
+            path = self.network.route(origin, destination, metric)
+        
+        if path:
+            mode, distance_km = path["mode"], path["distance_km"]
+        else:
+            distance_km = 1000 if distance_km is None else distance_km
+            mode = self.select_mode(distance_km, urgency)
+        
+        key = (origin, destination, mode, urgency)
+        entry = self._entries.get(key)
+        if entry is not None and entry["distance_km"] == distance_km:
+            return entry
+        
+        profile = settings.transport_modes.get(mode, {})
+        if path:
+            transit_hours = int(path["transit_hours"])
+            base_cost = path["cost"]
+            legs = path["legs"]
+        else:
+            transit_hours = int(distance_km / profile["speed_kmh"])
+            base_cost = distance_km * profile["cost_per_km"]
+            legs = [{
+                "from": origin,
+                "to": destination,
+                "mode": mode,
+                "distance_km": distance_km,
+                "transit_hours": transit_hours,
+                "cost": base_cost,
+            }]
+        
+        entry = {
+            "mode": mode,
+            "distance_km": distance_km,
+            "transit_hours": transit_hours,
+            "base_cost": base_cost,
+            "carrier": profile.get("carrier", "Standard Logistics"),
+            "legs": tuple(dict(leg) for leg in legs),  # copied out per response
+        }
+        self._entries[key] = entry
+        return entry
 
 
 class RoutingAgent:
@@ -11,53 +122,183 @@ class RoutingAgent:
     - Estimates delivery times
     """
     
-    def __init__(self, demo_mode: bool = True):
+    def __init__(
+        self,
+        demo_mode: bool = True,
+        max_concurrent_lookups: int = 16,
+        network=None,
+        vehicle_capacity: int = 1000
+    ):
         self.demo_mode = demo_mode
         self.name = "routing"
+        self.max_concurrent_lookups = max_concurrent_lookups
+        self.network = network  # Optional RoadRailNetwork for path routing
+        self.vehicle_capacity = vehicle_capacity
+        self.cost_table = RouteCostTable(network)
     
+    @instrumented("service")
     async def plan_delivery_route(
         self,
         transfers: List[Dict],
-        urgency: str = "normal"
+        urgency: str = "normal",
+        consolidate: bool = False
     ) -> Dict[str, Any]:
         """
         Main entry point for route planning
         
         Called by Google ADK as a tool
         """
-        print(f"\nROUTING AGENT: Planning delivery for {len(transfers)} shipments")
-        
-        optimized_routes = []
-        total_cost = 0
-        earliest_eta = None
-        
-        for transfer in transfers:
-            route = await self._optimize_single_route(
-                from_location=transfer.get("from_warehouse", transfer.get("source")),
-                to_location=transfer.get("to_warehouse", transfer.get("destination", "Mumbai")),
-                quantity=transfer["quantity"],
-                distance_km=transfer.get("distance_km", 1000),
-                urgency=urgency
-            )
-            
-            optimized_routes.append(route)
-            total_cost += route["cost"]
-            
-            # Track earliest delivery
-            if not earliest_eta or route["eta_datetime"] < earliest_eta:
-                earliest_eta = route["eta_datetime"]
-            
-            print(f"{route['from']} → {route['to']}: {route['mode']} ({route['eta_hours']}h, ₹{route['cost']:,})")
-        
-        return {
+        log.info("Planning delivery for {} shipments", len(transfers))
+        
+        optimized_routes = await self.plan_routes_batch(transfers, urgency)
+        
+        total_cost = sum(r["cost"] for r in optimized_routes)
+        # ISO timestamps from the same clock sort chronologically
+        earliest_eta = min((r["eta_datetime"] for r in optimized_routes), default=None)
+        
+        log.debug("Planned {} routes, total cost ₹{:,}", len(optimized_routes), total_cost)
+        
+        result = {
             "status": "success",
             "routes": optimized_routes,
             "total_routes": len(optimized_routes),
             "total_cost": total_cost,
             "earliest_delivery": earliest_eta,
-            "average_delivery_hours": sum(r["eta_hours"] for r in optimized_routes) / len(optimized_routes),
+            "average_delivery_hours": (
+                sum(r["eta_hours"] for r in optimized_routes) / len(optimized_routes)
+                if optimized_routes else 0
+            ),
             "timestamp": datetime.utcnow().isoformat()
         }
+        
+        if consolidate and transfers:
+            result["consolidation"] = self.plan_consolidated_trips(transfers)
+            log.debug(
+                "Consolidated into {} trips, saving ₹{:,}",
+                result["consolidation"]["total_trips"],
+                result["consolidation"]["savings"],
+            )
+        
+        return result
+    
+    @instrumented("service")
+    def plan_consolidated_trips(
+        self,
+        transfers: List[Dict],
+        time_budget_ms: float = 50,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        Merge transfers and supplier pickups onto shared multi-stop trucks.
+        
+        Shipments bound for the same destination are combined under
+        vehicle_capacity; cost and ETA are reported per trip together with
+        the savings against one truck per shipment.
+        """
+        now = now or datetime.now()
+        truck = settings.transport_modes["truck"]
+        consolidator = TripConsolidator(
+            distance_fn=self._road_distance,
+            vehicle_capacity=self.vehicle_capacity,
+            cost_per_km=truck["cost_per_km"],
+            speed_kmh=truck["speed_kmh"],
+            handling_cost_per_unit=settings.handling_cost_per_unit
+        )
+        shipments = [
+            {
+                "origin": t.get("from_warehouse", t.get("source")),
+                "destination": t.get("to_warehouse", t.get("destination", "Mumbai")),
+                "quantity": t["quantity"],
+                "distance_km": t.get("distance_km"),
+            }
+            for t in transfers
+        ]
+        plan = consolidator.consolidate(shipments, time_budget_ms=time_budget_ms)
+        
+        for number, trip in enumerate(plan["trips"], start=1):
+            eta = now + timedelta(hours=trip["eta_hours"])
+            trip["trip_id"] = f"TRIP-{number:03d}"
+            trip["mode"] = "truck"
+            trip["carrier"] = self._select_carrier("truck")
+            trip["eta_datetime"] = eta.isoformat()
+            trip["eta_display"] = eta.strftime("%Y-%m-%d %H:%M")
+        
+        return plan
+    
+    def _road_distance(self, origin: str, destination: str) -> Optional[float]:
+        """Network distance between two locations, if known"""
+        if self.network is None:
+            return None
+        path = self.network.route(origin, destination, "time")
+        return path["distance_km"] if path else None
+    
+    @instrumented("service")
+    async def plan_routes_batch(
+        self,
+        transfers: List[Dict],
+        urgency: str = "normal",
+        now: Optional[datetime] = None
+    ) -> List[Dict]:
+        """
+        Plan all transfers in one pass.
+        
+        Mode, transit time and base cost come from the memoized cost table;
+        only handling cost and the absolute ETA are computed per request.
+        External lookups (weather/traffic) run concurrently, once per
+        distinct destination.
+        """
+        if not transfers:
+            return []
+        
+        now = now or datetime.now()
+        self.cost_table.refresh()
+        
+        # 1. Columns
+        origins = [t.get("from_warehouse", t.get("source")) for t in transfers]
+        destinations = [
+            t.get("to_warehouse", t.get("destination", "Mumbai")) for t in transfers
+        ]
+        quantities = [t["quantity"] for t in transfers]
+        entries = [
+            self.cost_table.lookup(o, d, urgency, t.get("distance_km"))
+            for t, o, d in zip(transfers, origins, destinations)
+        ]
+        
+        # 2. Per-request cost
+        handling = settings.handling_cost_per_unit
+        costs = [e["base_cost"] + q * handling for e, q in zip(entries, quantities)]
+        
+        # 3. ETA — formatted once per distinct transit time
+        eta_cache = {}
+        for entry in entries:
+            hours = entry["transit_hours"]
+            if hours not in eta_cache:
+                eta = now + timedelta(hours=hours)
+                eta_cache[hours] = (eta.isoformat(), eta.strftime("%Y-%m-%d %H:%M"))
+        
+        # 4. Route conditions, looked up concurrently per destination
+        delays = await self._lookup_route_conditions(set(destinations), now)
+        
+        return [
+            {
+                "from": origin,
+                "to": destination,
+                "distance_km": entry["distance_km"],
+                "mode": entry["mode"],
+                "quantity": quantity,
+                "eta_hours": entry["transit_hours"] + delays[destination],
+                "eta_datetime": eta_cache[entry["transit_hours"]][0],
+                "eta_display": eta_cache[entry["transit_hours"]][1],
+                "cost": cost,
+                "weather_delay_hours": delays[destination],
+                "carrier": entry["carrier"],
+                "tracking_available": True,
+                "legs": [dict(leg) for leg in entry["legs"]]
+            }
+            for origin, destination, entry, quantity, cost in zip(
+                origins, destinations, entries, quantities, costs
+            )
+        ]
     
     async def _optimize_single_route(
         self,
@@ -68,60 +309,44 @@ class RoutingAgent:
         urgency: str
     ) -> Dict:
         """Optimize a single delivery route"""
+        routes = await self.plan_routes_batch(
+            [{
+                "from_warehouse": from_location,
+                "to_warehouse": to_location,
+                "quantity": quantity,
+                "distance_km": distance_km,
+            }],
+            urgency
+        )
+        return routes[0]
+    
+    async def _lookup_route_conditions(
+        self,
+        destinations: set,
+        now: datetime
+    ) -> Dict[str, int]:
+        """Weather delay (hours) per destination, with bounded parallelism"""
+        semaphore = asyncio.Semaphore(self.max_concurrent_lookups)
         
-        # Determine best transport mode
-        if urgency == "high" and distance_km < 500:
-            mode = "express_truck"
-            speed_kmh = 60
-            cost_per_km = 15
-        elif distance_km > 1500:
-            mode = "train"
-            speed_kmh = 50
-            cost_per_km = 8
-        else:
-            mode = "truck"
-            speed_kmh = 55
-            cost_per_km = 10
-        
-        # Calculate timing
-        transit_hours = int(distance_km / speed_kmh)
-        base_cost = distance_km * cost_per_km
-        handling_cost = quantity * 2  # ₹2 per unit
-        total_cost = base_cost + handling_cost
-        
-        eta_datetime = datetime.now() + timedelta(hours=transit_hours)
+        async def lookup(destination: str) -> int:
+            async with semaphore:
+                return await self._check_weather_delay(destination, now)
         
-        # Weather check (mock)
-        weather_delay = 0
+        ordered = list(destinations)
+        delays = await asyncio.gather(*(lookup(d) for d in ordered))
+        return dict(zip(ordered, delays))
+    
+    async def _check_weather_delay(self, to_location: str, now: datetime) -> int:
+        """Weather check (mock)"""
         if self.demo_mode:
             # Simulate weather impact
-            if "Mumbai" in to_location and datetime.now().day % 2 == 0:
-                weather_delay = 2
-                transit_hours += weather_delay
-        
-        return {
-            "from": from_location,
-            "to": to_location,
-            "distance_km": distance_km,
-            "mode": mode,
-            "quantity": quantity,
-            "eta_hours": transit_hours,
-            "eta_datetime": eta_datetime.isoformat(),
-            "eta_display": eta_datetime.strftime("%Y-%m-%d %H:%M"),
-            "cost": total_cost,
-            "weather_delay_hours": weather_delay,
-            "carrier": self._select_carrier(mode),
-            "tracking_available": True
-        }
+            if "Mumbai" in to_location and now.day % 2 == 0:
+                return 2
+        return 0
     
     def _select_carrier(self, mode: str) -> str:
         """Select logistics carrier based on mode"""
-        carriers = {
-            "express_truck": "BlueDart Express",
-            "truck": "DTDC Logistics",
-            "train": "Indian Railways Cargo"
-        }
-        return carriers.get(mode, "Standard Logistics")
+        return settings.transport_modes.get(mode, {}).get("carrier", "Standard Logistics")
 
 
 # ADK Tool Definition
@@ -174,4 +399,5 @@ async def test_routing_agent():
 
 if __name__ == "__main__":
     import asyncio
+    configure_logging("debug", threaded=False)
     asyncio.run(test_routing_agent())
@@ -0,0 +1,367 @@
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from src.data.products import INITIAL_INVENTORY, PRODUCT_CATALOG
+
+
+_MAGIC = b"SCSTOCK1"
+# magic, layout hash, warehouses, skus, generation (bumped on every write)
+_HEADER = struct.Struct("<8sQQQQ")
+_HEADER_SIZE = 64
+_ON_HAND, _RESERVED = 0, 1
+
+
+def _layout_hash(warehouse_ids: List[str], skus: List[str]) -> int:
+    digest = hashlib.sha256(json.dumps([warehouse_ids, skus]).encode()).digest()
+    return int.from_bytes(digest[:8], "little")
+
+
+class StockMatrix:
+    """
+    Stock on hand and reserved units per (warehouse, SKU), as int64 cells:
+    - In-process by default (anonymous mmap)
+    - With a path, a file-backed mmap shared by every process that opens it
+      (uvicorn workers), seeded once from INITIAL_INVENTORY
+    - Writes are read-check-write under an exclusive fcntl lock on the file
+      (plus a thread lock, since fcntl locks are per process), so concurrent
+      reservations across workers never over-allocate
+    - Reservations made under a hold id are recorded in a ledger (a JSON file
+      next to the matrix when shared) with an expiry, so a hold can be
+      committed or released as a whole from any worker, and abandoned ones
+      expire instead of lowering available stock for good
+    """
+
+    def __init__(
+        self,
+        warehouses: List[Dict],
+        skus: List[str],
+        path: Union[str, Path, None] = None,
+    ):
+        self.warehouse_ids = [w["id"] for w in warehouses]
+        self.skus = list(skus)
+        self._wh_index = {wid: i for i, wid in enumerate(self.warehouse_ids)}
+        self._sku_index = {sku: j for j, sku in enumerate(self.skus)}
+        self._layout = _layout_hash(self.warehouse_ids, self.skus)
+        self._thread_lock = threading.RLock()
+        self.path = Path(path) if path else None
+        self._holds_path = self.path.with_name(self.path.name + ".holds.json") if self.path else None
+        self._holds: Dict[str, Dict] = {}  # the ledger when not shared
+
+        size = _HEADER_SIZE + len(self.warehouse_ids) * len(self.skus) * 2 * 8
+        if self.path is None:
+            self._fd = None
+            self._mm = mmap.mmap(-1, size)
+        else:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        with self._locked(exclusive=True):
+            if self._fd is not None:
+                if os.fstat(self._fd).st_size != size:
+                    os.ftruncate(self._fd, size)
+                self._mm = mmap.mmap(self._fd, size)
+            self._cells = memoryview(self._mm)[_HEADER_SIZE:].cast("q")
+            magic, layout, _, _, _ = _HEADER.unpack_from(self._mm, 0)
+            if magic != _MAGIC or layout != self._layout:
+                self._seed(warehouses)
+                self._write_holds({})
+
+    @classmethod
+    def from_catalog(cls, path: Union[str, Path, None] = None) -> "StockMatrix":
+        """Matrix over INITIAL_INVENTORY warehouses and every catalog SKU"""
+        warehouses = INITIAL_INVENTORY["warehouses"]
+        skus = [p["sku"] for c in PRODUCT_CATALOG["categories"] for p in c["products"]]
+        for warehouse in warehouses:
+            skus.extend(sku for sku in warehouse["stock"] if sku not in skus)
+        return cls(warehouses, skus, path)
+
+    @property
+    def shared(self) -> bool:
+        return self._fd is not None
+
+    # Reads
+
+    def available(self, warehouse_id: str, sku: str) -> int:
+        """On hand minus reserved"""
+        with self._locked(exclusive=False):
+            i = self._cell(warehouse_id, sku)
+            if i is None:
+                return 0
+            return self._cells[i + _ON_HAND] - self._cells[i + _RESERVED]
+
+    def levels(self, sku: str) -> Dict[str, int]:
+        """Available units of one SKU in every warehouse, read consistently"""
+        with self._locked(exclusive=False):
+            return {
+                wid: self._cells[i + _ON_HAND] - self._cells[i + _RESERVED]
+                if (i := self._cell(wid, sku)) is not None else 0
+                for wid in self.warehouse_ids
+            }
+
+    def on_hand_totals(self) -> Dict[str, int]:
+        """Units on hand per warehouse, all SKUs"""
+        width = len(self.skus) * 2
+        with self._locked(exclusive=False):
+            return {
+                wid: sum(self._cells[w * width + _ON_HAND:(w + 1) * width:2])
+                for w, wid in enumerate(self.warehouse_ids)
+            }
+
+    def reserved(self, warehouse_id: str, sku: str) -> int:
+        with self._locked(exclusive=False):
+            i = self._cell(warehouse_id, sku)
+            return self._cells[i + _RESERVED] if i is not None else 0
+
+    # Atomic updates
+
+    def reserve(
+        self,
+        warehouse_id: str,
+        sku: str,
+        quantity: int,
+        keep: int = 0,
+        hold: Optional[str] = None,
+        ttl_seconds: float = 900,
+        to_warehouse: Optional[str] = None,
+    ) -> int:
+        """
+        Reserve up to quantity, leaving at least keep available; returns
+        units granted. With a hold id the units are added to that hold,
+        which expires ttl_seconds from now unless committed or released.
+        """
+        with self._locked(exclusive=True):
+            i = self._require(warehouse_id, sku)
+            free = self._cells[i + _ON_HAND] - self._cells[i + _RESERVED] - keep
+            granted = max(0, min(quantity, free))
+            if granted:
+                self._cells[i + _RESERVED] += granted
+                self._bump()
+                if hold is not None:
+                    holds = self._read_holds()
+                    entry = holds.setdefault(hold, {"to_warehouse": to_warehouse, "lines": []})
+                    entry["lines"].append([warehouse_id, sku, granted])
+                    entry["expires_at"] = time.time() + ttl_seconds
+                    self._write_holds(holds)
+            return granted
+
+    def release_hold(self, hold: str) -> int:
+        """Drop every reservation in a hold; returns units released (0 if unknown)"""
+        with self._locked(exclusive=True):
+            holds = self._read_holds()
+            entry = holds.pop(hold, None)
+            if entry is None:
+                return 0
+            released = sum(
+                self._release(self._require(wid, sku), units) for wid, sku, units in entry["lines"]
+            )
+            self._write_holds(holds)
+            return released
+
+    def commit_hold(self, hold: str) -> int:
+        """
+        Ship every reservation in a hold: units leave the source warehouses
+        and, when the hold names one, arrive in its destination. Returns
+        units shipped (0 if the hold is unknown or already expired).
+        """
+        with self._locked(exclusive=True):
+            holds = self._read_holds()
+            entry = holds.pop(hold, None)
+            if entry is None:
+                return 0
+            shipped = 0
+            for wid, sku, units in entry["lines"]:
+                moved = self._commit(self._require(wid, sku), units)
+                target = self._cell(entry["to_warehouse"], sku) if entry["to_warehouse"] else None
+                if moved and target is not None:
+                    self._cells[target + _ON_HAND] += moved
+                shipped += moved
+            self._write_holds(holds)
+            return shipped
+
+    def expire_holds(self, now: Optional[float] = None) -> int:
+        """Release holds past their expiry; returns how many"""
+        now = time.time() if now is None else now
+        with self._locked(exclusive=True):
+            holds = self._read_holds()
+            expired = [hold for hold, entry in holds.items() if entry["expires_at"] <= now]
+            for hold in expired:
+                for wid, sku, units in holds.pop(hold)["lines"]:
+                    self._release(self._require(wid, sku), units)
+            if expired:
+                self._write_holds(holds)
+            return len(expired)
+
+    def holds(self) -> Dict[str, Dict]:
+        """Open holds by id: destination, [warehouse, sku, units] lines and expiry"""
+        with self._locked(exclusive=False):
+            return self._read_holds()
+
+    def release(self, warehouse_id: str, sku: str, quantity: int) -> int:
+        """Drop a reservation without moving stock; returns units released"""
+        with self._locked(exclusive=True):
+            return self._release(self._require(warehouse_id, sku), quantity)
+
+    def commit(self, warehouse_id: str, sku: str, quantity: int) -> int:
+        """Ship reserved units: they leave both reserved and on hand"""
+        with self._locked(exclusive=True):
+            return self._commit(self._require(warehouse_id, sku), quantity)
+
+    def receive(self, warehouse_id: str, sku: str, quantity: int) -> int:
+        """Add units on hand (transfer arrival, supplier delivery); returns the new level"""
+        with self._locked(exclusive=True):
+            i = self._require(warehouse_id, sku)
+            self._cells[i + _ON_HAND] += quantity
+            self._bump()
+            return self._cells[i + _ON_HAND]
+
+    def reset(self):
+        """Back to INITIAL_INVENTORY with no reservations"""
+        with self._locked(exclusive=True):
+            self._seed(INITIAL_INVENTORY["warehouses"])
+            self._write_holds({})
+
+    def reset_reservations(self):
+        """Drop every reservation and hold, keeping stock on hand (run at startup)"""
+        with self._locked(exclusive=True):
+            for k in range(_RESERVED, len(self._cells), 2):
+                self._cells[k] = 0
+            self._write_holds({})
+            self._bump()
+
+    @property
+    def generation(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[4]
+
+    def close(self):
+        self._cells.release()
+        self._mm.close()
+        if self._fd is not None:
+            os.close(self._fd)
+
+    # Internals
+
+    @contextmanager
+    def _locked(self, exclusive: bool):
+        with self._thread_lock:
+            if self._fd is None:
+                yield
+                return
+            fcntl.lockf(self._fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN)
+
+    def _cell(self, warehouse_id: str, sku: str) -> Optional[int]:
+        w = self._wh_index.get(warehouse_id)
+        s = self._sku_index.get(sku)
+        if w is None or s is None:
+            return None
+        return (w * len(self.skus) + s) * 2
+
+    def _require(self, warehouse_id: str, sku: str) -> int:
+        i = self._cell(warehouse_id, sku)
+        if i is None:
+            raise KeyError(f"No stock cell for {warehouse_id}/{sku}")
+        return i
+
+    # Cell updates; callers hold the exclusive lock (fcntl locks don't nest)
+
+    def _release(self, i: int, quantity: int) -> int:
+        released = min(quantity, self._cells[i + _RESERVED])
+        self._cells[i + _RESERVED] -= released
+        self._bump()
+        return released
+
+    def _commit(self, i: int, quantity: int) -> int:
+        shipped = min(quantity, self._cells[i + _RESERVED])
+        self._cells[i + _RESERVED] -= shipped
+        self._cells[i + _ON_HAND] -= shipped
+        self._bump()
+        return shipped
+
+    def _read_holds(self) -> Dict[str, Dict]:
+        """The hold ledger; callers hold the lock"""
+        if self._holds_path is None:
+            return json.loads(json.dumps(self._holds))
+        try:
+            return json.loads(self._holds_path.read_text() or "{}")
+        except FileNotFoundError:
+            return {}
+
+    def _write_holds(self, holds: Dict[str, Dict]):
+        if self._holds_path is None:
+            self._holds = holds
+            return
+        scratch = self._holds_path.with_name(self._holds_path.name + ".tmp")
+        scratch.write_text(json.dumps(holds))
+        os.replace(scratch, self._holds_path)
+
+    def _seed(self, warehouses: List[Dict]):
+        for k in range(len(self._cells)):
+            self._cells[k] = 0
+        for warehouse in warehouses:
+            for sku, units in warehouse["stock"].items():
+                i = self._cell(warehouse["id"], sku)
+                if i is not None:
+                    self._cells[i + _ON_HAND] = units
+        _HEADER.pack_into(
+            self._mm, 0, _MAGIC, self._layout, len(self.warehouse_ids), len(self.skus), 0
+        )
+
+    def _bump(self):
+        magic, layout, n_wh, n_sku, generation = _HEADER.unpack_from(self._mm, 0)
+        _HEADER.pack_into(self._mm, 0, magic, layout, n_wh, n_sku, generation + 1)
+
+
+# Test
+def test_stock_matrix():
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    path = Path(tempfile.mkdtemp()) / "stock.mmap"
+    stock = StockMatrix.from_catalog(path)
+    print(f"Delhi RC-FULL-NVY-M available: {stock.available('WH-DEL', 'RC-FULL-NVY-M')}")
+
+    # 8 processes each try to reserve 10 units 5 times from 180 on hand
+    with ProcessPoolExecutor(8) as pool:
+        granted = sum(pool.map(_reserve_many, [str(path)] * 8))
+    print(f"Granted across processes: {granted} (expected 180 - keep 54 = 126 max)")
+    print(f"Reserved: {stock.reserved('WH-DEL', 'RC-FULL-NVY-M')}, generation {stock.generation}")
+    stock.commit("WH-DEL", "RC-FULL-NVY-M", granted)
+    print(f"After shipping: {stock.available('WH-DEL', 'RC-FULL-NVY-M')} available")
+
+    # A hold that is released, or left to expire, gives every unit back
+    before = stock.levels("RC-FULL-NVY-M")
+    stock.reserve("WH-BLR", "RC-FULL-NVY-M", 40, hold="RSV-demo", to_warehouse="WH-MUM")
+    stock.reserve("WH-KOL", "RC-FULL-NVY-M", 20, hold="RSV-demo", to_warehouse="WH-MUM")
+    print(f"Holds: {stock.holds()}")
+    print(f"Released {stock.release_hold('RSV-demo')} units")
+    assert stock.levels("RC-FULL-NVY-M") == before, "release did not restore available stock"
+    stock.reserve("WH-BLR", "RC-FULL-NVY-M", 40, hold="RSV-stale", ttl_seconds=0)
+    print(f"Expired {stock.expire_holds()} hold(s)")
+    assert stock.levels("RC-FULL-NVY-M") == before, "expiry did not restore available stock"
+
+    # Committing moves the held units to the destination
+    stock.reserve("WH-BLR", "RC-FULL-NVY-M", 40, hold="RSV-ship", to_warehouse="WH-MUM")
+    print(f"Shipped {stock.commit_hold('RSV-ship')} units: {stock.levels('RC-FULL-NVY-M')}")
+    stock.close()
+
+
+def _reserve_many(path: str) -> int:
+    stock = StockMatrix.from_catalog(path)
+    granted = sum(stock.reserve("WH-DEL", "RC-FULL-NVY-M", 10, keep=54) for _ in range(5))
+    stock.close()
+    return granted
+
+
+if __name__ == "__main__":
+    test_stock_matrix()
@@ -0,0 +1,121 @@
+import time
+from collections import deque
+from typing import Dict, Any, List, Optional, Tuple
+
+from .notifications import SEVERITY_RANK
+
+
+class _Window:
+    __slots__ = ("expires_at", "severity", "alert_id", "suppressed", "digest")
+
+    def __init__(self, expires_at: float, severity: str, alert_id: str):
+        self.expires_at = expires_at
+        self.severity = severity
+        self.alert_id = alert_id
+        self.suppressed = 0
+        self.digest: Dict[str, int] = {}  # severity -> duplicates merged
+
+
+class AlertSuppressor:
+    """
+    Suppression windows for repeated alerts:
+    - Keyed by event type (or description when there is none), region
+      and SKU, compared on severity
+    - Duplicates at the same or lower severity are merged into a digest
+    - A higher severity escalates and opens a new window
+    - Expired windows are swept in insertion order
+    """
+
+    def __init__(self, window_seconds: float = 900, max_windows: int = 10000):
+        self.window_seconds = window_seconds
+        self.max_windows = max_windows
+        self._windows: Dict[Tuple[str, str, str], _Window] = {}
+        self._expiry = deque()  # (expires_at, key), oldest first
+        self.stats = {"checked": 0, "sent": 0, "escalated": 0, "suppressed": 0, "digests": 0}
+
+    @staticmethod
+    def make_key(event: str, region: str, product_sku: Optional[str]) -> Tuple[str, str, str]:
+        return (
+            " ".join((event or "").lower().split()),
+            (region or "").lower(),
+            (product_sku or "").upper(),
+        )
+
+    def check(
+        self,
+        key: Tuple[str, str, str],
+        severity: str,
+        alert_id: str,
+        now: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """
+        Decide whether an alert goes out.
+
+        Returns action "send", "escalate" or "suppress", plus the window's
+        original alert id and duplicate count.
+        """
+        now = time.monotonic() if now is None else now
+        self.stats["checked"] += 1
+
+        window = self._windows.get(key)
+        if window is not None and window.expires_at <= now:
+            window = None
+
+        if window is not None and SEVERITY_RANK.get(severity, 0) <= SEVERITY_RANK.get(window.severity, 0):
+            window.suppressed += 1
+            window.digest[severity] = window.digest.get(severity, 0) + 1
+            self.stats["suppressed"] += 1
+            return {
+                "action": "suppress",
+                "alert_id": window.alert_id,
+                "window_severity": window.severity,
+                "suppressed_duplicates": window.suppressed,
+                "window_remaining_seconds": round(window.expires_at - now),
+            }
+
+        action = "escalate" if window is not None else "send"
+        self.stats["sent" if action == "send" else "escalated"] += 1
+
+        new_window = _Window(now + self.window_seconds, severity, alert_id)
+        if window is not None:
+            # Carry merged duplicates into the escalated window's digest
+            new_window.suppressed = window.suppressed
+            new_window.digest = window.digest
+        self._windows[key] = new_window
+        self._expiry.append((new_window.expires_at, key))
+        return {"action": action, "alert_id": alert_id, "suppressed_duplicates": new_window.suppressed}
+
+    def sweep(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        Drop expired windows; returns digests for windows that merged
+        duplicates so they can be sent once.
+        """
+        now = time.monotonic() if now is None else now
+        digests = []
+        while self._expiry and (
+            self._expiry[0][0] <= now or len(self._windows) > self.max_windows
+        ):
+            expires_at, key = self._expiry.popleft()
+            window = self._windows.get(key)
+            if window is None or window.expires_at != expires_at:
+                continue  # superseded by an escalation
+            del self._windows[key]
+            if window.suppressed:
+                self.stats["digests"] += 1
+                digests.append({
+                    "event": key[0],
+                    "region": key[1],
+                    "product_sku": key[2],
+                    "alert_id": window.alert_id,
+                    "severity": window.severity,
+                    "suppressed_duplicates": window.suppressed,
+                    "by_severity": dict(window.digest),
+                })
+        return digests
+
+    def next_expiry(self) -> Optional[float]:
+        """Monotonic time the oldest open window closes, or None if none are open"""
+        return self._expiry[0][0] if self._expiry else None
+
+    def report(self) -> Dict[str, Any]:
+        return {**self.stats, "active_windows": len(self._windows)}
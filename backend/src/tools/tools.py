@@ -1,56 +1,188 @@
 from typing import Optional
+import asyncio
 from google.adk.tools import ToolContext
 import datetime
+import time
 
 from .vendor import VendorAgent
 from .demand import DemandAgent
 from .inventory import InventoryAgent
 from .routing import RoutingAgent
+from .network import RoadRailNetwork
 from .alert import AlertAgent
-from src.utils.state import SupplyChainState
-
-
-def _get_state(tool_context: ToolContext) -> dict:
-    state = tool_context.state.get("workflow_state")
-
-    if state is None:
-        state = SupplyChainState().dict()
-        tool_context.state["workflow_state"] = state
-
-    if "execution_trace" not in state:
-        state["execution_trace"] = []
-
-    return state
+from .stock import StockMatrix
+from src.core.config import settings
+from src.utils.compaction import compact_result
+from src.utils.lazy import Lazy
+from src.utils.metrics import instrumented, observe_payload
+from src.utils.state import StateWriter
+from src.utils.trace import TraceSpill, compact_entry
+
+
+def _get_state(tool_context: ToolContext, tool_name: str) -> StateWriter:
+    return StateWriter(
+        tool_context.state, tool=tool_name, trace_slots=settings.trace_max_entries
+    )
 
 
 def _track(
-    tool_context: ToolContext,
+    agent_name: str,
+    state: StateWriter,
     tool_name: str,
     input_data: dict,
     result: dict,
+    started: float,
+    commit: bool = True,
+    finished: Optional[float] = None,
 ):
-    state = _get_state(tool_context)
+    timestamp = datetime.datetime.utcnow().isoformat()
 
-    state["execution_trace"].append(
+    # Full payloads go to the spill file; state keeps a bounded, compact trace
+    trace_id, size = _trace_spill.append(
         {
-            "timestamp": datetime.datetime.utcnow().isoformat(),
-            "agent": tool_context.agent_name,
+            "timestamp": timestamp,
+            "agent": agent_name,
             "tool": tool_name,
             "input": input_data,
             "output": result,
         }
     )
+    observe_payload(tool_name, size)
+    state.append_trace(
+        compact_entry(
+            agent=agent_name,
+            tool=tool_name,
+            timestamp=timestamp,
+            duration_ms=((finished or time.perf_counter()) - started) * 1000,
+            input_data=input_data,
+            output=result,
+            trace_id=trace_id,
+        )
+    )
+
+    # One write per tool call, carrying only the keys that changed
+    if commit:
+        state.commit()
+
 
-    tool_context.state["workflow_state"] = state
+def _event_summary(
+    state: StateWriter,
+    event_description: str,
+    region: str,
+    spike_multiplier: float,
+    peak_demand: int,
+    reorder_quantity: int,
+    vendor_selected: str,
+    total_cost: int,
+) -> dict:
+    return {
+        "event": {
+            # The workflow's event type keys suppression; the description is model-written
+            "type": state.get("event_type"),
+            "description": event_description,
+            "region": region,
+            "product_sku": state.get("product_sku"),
+        },
+        "demand": {
+            "spike_detected": spike_multiplier > 1,
+            "spike_multiplier": spike_multiplier,
+            "peak_demand": peak_demand,
+        },
+        "inventory": {
+            "reorder_needed": reorder_quantity > 0,
+            "reorder_quantity": reorder_quantity,
+            "transfers": state.get("transfers", []),
+        },
+        "vendor": {
+            "vendor_selected": vendor_selected,
+            "total_price": total_cost,
+        },
+        "routing": {
+            "routes": state.get("routes", []),
+            "total_cost": state.get("routing_total_cost", 0),
+            "earliest_delivery": state.get("earliest_delivery"),
+        },
+    }
+
+
+async def _timed(coro) -> tuple:
+    started = time.perf_counter()
+    result = await coro
+    return result, started, time.perf_counter()
+
+
+async def _fan_out_sourcing(
+    product_sku: str,
+    reorder_quantity: int,
+    transfers: list[dict],
+    urgency: str,
+    consolidate: bool,
+) -> dict:
+    """Vendor sourcing and route planning only depend on inventory, so run them together"""
+    jobs = {}
+    if reorder_quantity > 0:
+        jobs["negotiate_with_vendor"] = _timed(
+            _vendor_svc.negotiate_with_vendor(product_sku, reorder_quantity, urgency)
+        )
+    if transfers:
+        jobs["plan_delivery_route"] = _timed(
+            _routing_svc.plan_delivery_route(transfers, urgency, consolidate)
+        )
+    return dict(zip(jobs, await asyncio.gather(*jobs.values())))
+
+
+def _settle_reservation(
+    reservation_id: Optional[str], routing: Optional[dict], release_on_failure: bool = False
+):
+    """Ship the units held for transfers once their routes are planned"""
+    if not reservation_id or routing is None:
+        return
+    if routing.get("status") == "success":
+        _inventory_svc.commit_reservation(reservation_id)
+    elif release_on_failure:
+        _inventory_svc.release_reservation(reservation_id)
+
+
+def get_trace_payload(trace_id: str) -> Optional[dict]:
+    """Full input/output of a traced tool call, by trace_id"""
+    return _trace_spill.get(trace_id)
+
+
+def _build_inventory() -> InventoryAgent:
+    stock = StockMatrix.from_catalog(settings.shared_stock_path if settings.shared_stock else None)
+    if stock.shared and settings.workers <= 1:
+        # Holds left by an earlier run will never be routed; with several
+        # workers main.py clears them before the workers start
+        stock.reset_reservations()
+    return InventoryAgent(
+        demo_mode=True,
+        stock=stock,
+        reserve_transfers=settings.reserve_transfers,
+        reservation_ttl=settings.reservation_ttl,
+    )
 
 
-_demand_svc = DemandAgent(demo_mode=True)
-_inventory_svc = InventoryAgent(demo_mode=True)
-_vendor_svc = VendorAgent(demo_mode=True)
-_routing_svc = RoutingAgent(demo_mode=True)
-_alert_svc = AlertAgent(demo_mode=True)
+# Services are built on first use (or by the startup warmup), not at import
+_trace_spill = Lazy(lambda: TraceSpill(settings.trace_spill_path), "TraceSpill")
+_demand_svc = Lazy(lambda: DemandAgent(demo_mode=True), "DemandAgent")
+_inventory_svc = Lazy(_build_inventory, "InventoryAgent")
+_vendor_svc = Lazy(lambda: VendorAgent(demo_mode=True), "VendorAgent")
+_routing_svc = Lazy(
+    lambda: RoutingAgent(demo_mode=True, network=RoadRailNetwork.load()), "RoutingAgent"
+)
+_alert_svc = Lazy(lambda: AlertAgent(demo_mode=True), "AlertAgent")
 
+_SERVICES = (_trace_spill, _demand_svc, _inventory_svc, _vendor_svc, _routing_svc, _alert_svc)
 
+
+def warm_services() -> dict:
+    """Build every service singleton now; returns build seconds per service"""
+    for svc in _SERVICES:
+        svc.resolve()
+    return {svc.name: round(svc.build_seconds or 0.0, 4) for svc in _SERVICES}
+
+
+@instrumented("tool")
 async def forecast_demand(
     tool_context: ToolContext,
     product_sku: str,
@@ -67,21 +199,22 @@ async def forecast_demand(
         region: Target region — Mumbai | Delhi | Bangalore | Chennai | Kolkata
         event_type: Demand driver — cyclone | cold_wave | festival | monsoon  (omit if none)
     """
+    started = time.perf_counter()
     result = await _demand_svc.forecast_demand(product_sku, region, event_type)
 
-    state = _get_state(tool_context)
+    state = _get_state(tool_context, "forecast_demand")
     state.update(
         {
             "product_sku": product_sku,
             "region": region,
             "event_type": event_type,
-            **result,
         }
     )
+    state.write_result(result)
 
-    tool_context.state["workflow_state"] = state
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "forecast_demand",
         {
             "product_sku": product_sku,
@@ -89,11 +222,13 @@ async def forecast_demand(
             "event_type": event_type,
         },
         result,
+        started,
     )
 
-    return result
+    return compact_result("forecast_demand", result, settings.tool_result_token_budget)
 
 
+@instrumented("tool")
 async def optimize_inventory(
     tool_context: ToolContext, product_sku: str, region: str, forecasted_demand: int
 ) -> dict:
@@ -107,15 +242,20 @@ async def optimize_inventory(
         region: Target region — Mumbai | Delhi | Bangalore | Chennai | Kolkata
         forecasted_demand: Demand quantity from forecast_demand (use total_7day_demand)
     """
+    started = time.perf_counter()
+    # One hold per session, SKU and region: a retry or a later turn re-plans it
     result = await _inventory_svc.optimize_inventory(
-        product_sku, region, forecasted_demand
+        product_sku,
+        region,
+        forecasted_demand,
+        reservation_id=f"RSV-{tool_context.session.id}-{product_sku}-{region}",
     )
-    state = _get_state(tool_context)
-    state.update(result)
+    state = _get_state(tool_context, "optimize_inventory")
+    state.write_result(result)
 
-    tool_context.state["workflow_state"] = state
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "optimize_inventory",
         {
             "product_sku": product_sku,
@@ -123,33 +263,37 @@ async def optimize_inventory(
             "forecasted_demand": forecasted_demand,
         },
         result,
+        started,
     )
 
-    return result
+    return compact_result("optimize_inventory", result, settings.tool_result_token_budget)
 
 
+@instrumented("tool")
 def get_warehouse_status(tool_context: ToolContext) -> dict:
     """
     Get current stock levels and utilisation across ALL warehouses.
     Use this for a full network-wide inventory picture without a specific product.
     """
+    started = time.perf_counter()
     result = _inventory_svc.get_warehouse_status()
 
-    state = _get_state(tool_context)
-    state.update(result)
-
-    tool_context.state["workflow_state"] = state
+    state = _get_state(tool_context, "get_warehouse_status")
+    state.write_result(result)
 
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "get_warehouse_status",
         {},
         result,
+        started,
     )
 
-    return result
+    return compact_result("get_warehouse_status", result, settings.tool_result_token_budget)
 
 
+@instrumented("tool")
 async def negotiate_with_vendor(
     tool_context: ToolContext, product_sku: str, quantity: int, urgency: str = "normal"
 ) -> dict:
@@ -163,14 +307,15 @@ async def negotiate_with_vendor(
         quantity: Quantity to order (use reorder_quantity from optimize_inventory)
         urgency: normal | high  — high adds 10% premium but faster delivery
     """
+    started = time.perf_counter()
     result = await _vendor_svc.negotiate_with_vendor(product_sku, quantity, urgency)
 
-    state = _get_state(tool_context)
-    state.update(result)
+    state = _get_state(tool_context, "negotiate_with_vendor")
+    state.write_result(result)
 
-    tool_context.state["workflow_state"] = state
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "negotiate_with_vendor",
         {
             "product_sku": product_sku,
@@ -178,13 +323,18 @@ async def negotiate_with_vendor(
             "urgency": urgency,
         },
         result,
+        started,
     )
 
-    return result
+    return compact_result("negotiate_with_vendor", result, settings.tool_result_token_budget)
 
 
+@instrumented("tool")
 async def plan_delivery_route(
-    tool_context: ToolContext, transfers: list[dict], urgency: str = "normal"
+    tool_context: ToolContext,
+    transfers: list[dict],
+    urgency: str = "normal",
+    consolidate: bool = False,
 ) -> dict:
     """
     Optimise delivery routes for inventory transfers or supplier shipments.
@@ -192,26 +342,105 @@ async def plan_delivery_route(
 
     Args:
         transfers: List of dicts, each with keys: from_warehouse, to_warehouse,
-                   quantity (int), distance_km (int)
+                   quantity (int), distance_km (int, optional — omit to route
+                   over the road/rail network)
         urgency: normal | high
+        consolidate: True to merge shipments onto shared multi-stop trucks
+                     (reports per-trip cost/ETA and savings vs one truck each)
     """
-    result = await _routing_svc.plan_delivery_route(transfers, urgency)
-    state = _get_state(tool_context)
-    state.update(result)
+    started = time.perf_counter()
+    result = await _routing_svc.plan_delivery_route(transfers, urgency, consolidate)
+    state = _get_state(tool_context, "plan_delivery_route")
+    state.write_result(result)
+    _settle_reservation(state.get("reservation_id"), result)
 
-    tool_context.state["workflow_state"] = state
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "plan_delivery_route",
         {
             "transfers": transfers,
             "urgency": urgency,
+            "consolidate": consolidate,
         },
         result,
+        started,
+    )
+    return compact_result("plan_delivery_route", result, settings.tool_result_token_budget)
+
+
+@instrumented("tool")
+async def source_and_route(
+    tool_context: ToolContext,
+    product_sku: str,
+    reorder_quantity: int,
+    transfers: list[dict],
+    urgency: str = "normal",
+    consolidate: bool = False,
+) -> dict:
+    """
+    Source the reorder from suppliers AND plan delivery routes for the
+    transfers at the same time. Call this once right AFTER optimize_inventory,
+    instead of handing off to VendorAgent and then RoutingAgent.
+
+    Args:
+        product_sku: Product SKU
+        reorder_quantity: reorder_quantity from optimize_inventory (0 skips sourcing)
+        transfers: transfers from optimize_inventory, each with from_warehouse,
+                   to_warehouse and quantity (empty list skips routing)
+        urgency: normal | high
+        consolidate: True to merge shipments onto shared multi-stop trucks
+    """
+    results = await _fan_out_sourcing(
+        product_sku, reorder_quantity, transfers, urgency, consolidate
+    )
+
+    # Both branches write disjoint fields into one writer, then commit once
+    state = _get_state(tool_context, "source_and_route")
+    _settle_reservation(
+        state.get("reservation_id"), results.get("plan_delivery_route", (None,))[0]
     )
-    return result
+    inputs = {
+        "negotiate_with_vendor": {
+            "product_sku": product_sku,
+            "quantity": reorder_quantity,
+            "urgency": urgency,
+        },
+        "plan_delivery_route": {
+            "transfers": transfers,
+            "urgency": urgency,
+            "consolidate": consolidate,
+        },
+    }
+    for tool_name, (result, started, finished) in results.items():
+        state.write_result(result, source_tool=tool_name)
+        _track(
+            tool_context.agent_name,
+            state,
+            tool_name,
+            inputs[tool_name],
+            result,
+            started,
+            commit=False,
+            finished=finished,
+        )
+    state.commit()
+
+    return {
+        "vendor": compact_result(
+            "negotiate_with_vendor",
+            results.get("negotiate_with_vendor", (None,))[0],
+            settings.tool_result_token_budget,
+        ),
+        "routing": compact_result(
+            "plan_delivery_route",
+            results.get("plan_delivery_route", (None,))[0],
+            settings.tool_result_token_budget,
+        ),
+    }
 
 
+@instrumented("tool")
 async def send_supply_alerts(
     tool_context: ToolContext,
     event_description: str,
@@ -237,38 +466,28 @@ async def send_supply_alerts(
         total_cost: Total procurement cost in rupees (0 if none)
         severity: info | high | critical
     """
-    state = _get_state(tool_context)
-    event_summary = {
-        "event": {"description": event_description, "region": region},
-        "demand": {
-            "spike_detected": spike_multiplier > 1,
-            "spike_multiplier": spike_multiplier,
-            "peak_demand": peak_demand,
-        },
-        "inventory": {
-            "reorder_needed": reorder_quantity > 0,
-            "reorder_quantity": reorder_quantity,
-            "transfers": state.get("transfers", []),
-        },
-        "vendor": {
-            "vendor_selected": vendor_selected,
-            "total_price": total_cost,
-        },
-        "routing": {
-            "routes": state.get("routes", []),
-            "total_cost": state.get("routing_total_cost", 0),
-            "earliest_delivery": state.get("earliest_delivery"),
-        },
-    }
+    started = time.perf_counter()
+    state = _get_state(tool_context, "send_supply_alerts")
+    event_summary = _event_summary(
+        state,
+        event_description,
+        region,
+        spike_multiplier,
+        peak_demand,
+        reorder_quantity,
+        vendor_selected,
+        total_cost,
+    )
     result = await _alert_svc.send_alerts(
         event_summary=event_summary, severity=severity
     )
 
     state["alert_severity"] = severity
+    state.write_result(result)
 
-    tool_context.state["workflow_state"] = state
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "send_supply_alerts",
         {
             "event_description": event_description,
@@ -276,30 +495,34 @@ async def send_supply_alerts(
             "severity": severity,
         },
         result,
+        started,
     )
 
-    return result
+    return compact_result("send_supply_alerts", result, settings.tool_result_token_budget)
 
 
+@instrumented("tool")
 async def list_all_products(tool_context: ToolContext) -> dict:
     """
     List all products in the supply chain network with their SKUs, names, and categories.
     This can be used for inventory checks or vendor negotiations when product details are needed.
     """
+    started = time.perf_counter()
     result = await _inventory_svc.list_products()
 
-    state = _get_state(tool_context)
-    state.update({"products": result})
+    state = _get_state(tool_context, "list_all_products")
+    state["products"] = result
 
-    tool_context.state["workflow_state"] = state
     _track(
-        tool_context,
+        tool_context.agent_name,
+        state,
         "list_all_products",
         {
             "products_count": len(result),
             "products": result,
         },
         result,
+        started,
     )
 
-    return result
+    return compact_result("list_all_products", result, settings.tool_result_token_budget)
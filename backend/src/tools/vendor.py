@@ -1,6 +1,11 @@
 from datetime import datetime, timedelta
 from typing import Dict, Any, List
 from src.data.products import SUPPLIERS
+from src.utils.log import configure_logging, get_logger
+from src.utils.metrics import instrumented
+
+
+log = get_logger("tools.vendor")
 
 
 class VendorAgent:
@@ -16,6 +21,7 @@ class VendorAgent:
         self.demo_mode = demo_mode
         self.name = "vendor"
     
+    @instrumented("service")
     async def negotiate_with_vendor(
         self,
         product_sku: str,
@@ -28,7 +34,7 @@ class VendorAgent:
         
         Called by Google ADK as a tool
         """
-        print(f"\n💼 VENDOR AGENT: Sourcing {quantity} units of {product_sku}")
+        log.info("Sourcing {} units of {}", quantity, product_sku)
         
         # 1. Find eligible suppliers
         eligible_suppliers = self._find_suppliers(product_sku)
@@ -39,7 +45,7 @@ class VendorAgent:
                 "message": f"No suppliers found for {product_sku}"
             }
         
-        print(f"   Found {len(eligible_suppliers)} eligible suppliers")
+        log.debug("Found {} eligible suppliers", len(eligible_suppliers))
         
         # 2. Send RFQs and get quotes
         quotes = await self._get_quotes(
@@ -49,7 +55,7 @@ class VendorAgent:
             urgency=urgency
         )
         
-        print(f"   Received {len(quotes)} quotes")
+        log.debug("Received {} quotes", len(quotes))
         
         # 3. Evaluate and select best vendor
         best_quote = self._select_best_vendor(
@@ -75,10 +81,13 @@ class VendorAgent:
             quantity=quantity
         )
         
-        print(f"Selected: {final_quote['supplier_name']}")
-        print(f"Price: ₹{final_quote['unit_price']}/unit")
-        print(f"Total: ₹{final_quote['total_price']:,}")
-        print(f"Delivery: {final_quote['delivery_days']} days")
+        log.info(
+            "Selected {} at ₹{}/unit, total ₹{:,}, delivery in {} days",
+            final_quote["supplier_name"],
+            final_quote["unit_price"],
+            final_quote["total_price"],
+            final_quote["delivery_days"],
+        )
         
         return {
             "status": "success",
@@ -305,4 +314,5 @@ async def test_vendor_agent():
 
 if __name__ == "__main__":
     import asyncio
+    configure_logging("debug", threaded=False)
     asyncio.run(test_vendor_agent())
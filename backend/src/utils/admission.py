@@ -0,0 +1,223 @@
+import asyncio
+import math
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, Iterable, Optional
+
+from src.utils.metrics import ADMISSION, ADMISSION_DEPTH, ADMISSION_WAIT
+
+
+class Rejected(Exception):
+    """Raised when a request can't be admitted; carries the status and Retry-After"""
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class _Waiter:
+    user: str
+    future: asyncio.Future
+    enqueued: float = field(default_factory=time.monotonic)
+
+
+class AdmissionController:
+    """
+    Concurrency limits in front of the agent endpoint:
+    - At most max_active runs in flight overall and max_per_user per user
+    - Requests over a limit wait in one bounded FIFO queue; a freed slot goes
+      to the oldest waiter whose user is under their own limit, so one busy
+      user doesn't hold up everyone queued behind them
+    - A full queue is rejected at once (429), a wait past the deadline
+      gives up (503); both with a Retry-After estimated from recent run times
+    """
+
+    def __init__(
+        self,
+        max_active: int = 10,
+        max_per_user: int = 2,
+        max_queue: int = 50,
+        queue_timeout_seconds: float = 30.0,
+    ):
+        self.max_active = max_active
+        self.max_per_user = max_per_user
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout_seconds
+        self.active = 0
+        self.per_user: Dict[str, int] = {}
+        self.waiters: Deque[_Waiter] = deque()
+        self._avg_run_seconds = 5.0  # EWMA, seeded with a typical chat turn
+
+    def _has_room(self, user: str) -> bool:
+        return self.active < self.max_active and self.per_user.get(user, 0) < self.max_per_user
+
+    def _admit(self, user: str):
+        self.active += 1
+        self.per_user[user] = self.per_user.get(user, 0) + 1
+        self._publish()
+
+    def _publish(self):
+        ADMISSION_DEPTH.labels("active")[0] = self.active
+        ADMISSION_DEPTH.labels("queued")[0] = len(self.waiters)
+
+    def retry_after(self) -> int:
+        """Seconds until the queue ahead of a new request has likely drained"""
+        rounds = (len(self.waiters) + 1) / max(1, self.max_active)
+        return max(1, math.ceil(rounds * self._avg_run_seconds))
+
+    async def acquire(self, user: str):
+        # Slots are handed out on every release, so anyone still queued is
+        # blocked by their own per-user limit: a request with room goes first
+        if self._has_room(user):
+            self._admit(user)
+            ADMISSION.labels("admitted")[0] += 1
+            ADMISSION_WAIT.labels("admitted").observe(0.0)
+            return
+        if len(self.waiters) >= self.max_queue:
+            ADMISSION.labels("rejected")[0] += 1
+            raise Rejected(429, "Too many requests queued", self.retry_after())
+
+        waiter = _Waiter(user, asyncio.get_running_loop().create_future())
+        self.waiters.append(waiter)
+        self._publish()
+        ADMISSION.labels("queued")[0] += 1
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter.future), self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as exc:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted in the same tick we gave up: hand the slot back
+                self.release(user)
+            else:
+                waiter.future.cancel()
+                self.waiters.remove(waiter)
+                self._publish()
+            if isinstance(exc, asyncio.CancelledError):
+                raise
+            ADMISSION.labels("expired")[0] += 1
+            ADMISSION_WAIT.labels("expired").observe(time.monotonic() - waiter.enqueued)
+            raise Rejected(503, "Timed out waiting for capacity", self.retry_after())
+        ADMISSION.labels("admitted")[0] += 1
+        ADMISSION_WAIT.labels("admitted").observe(time.monotonic() - waiter.enqueued)
+
+    def release(self, user: str, run_seconds: Optional[float] = None):
+        self.active -= 1
+        remaining = self.per_user.get(user, 1) - 1
+        if remaining:
+            self.per_user[user] = remaining
+        else:
+            self.per_user.pop(user, None)
+        if run_seconds is not None:
+            self._avg_run_seconds += 0.2 * (run_seconds - self._avg_run_seconds)
+        self._dispatch()
+        self._publish()
+
+    def _dispatch(self):
+        """Hand free slots to the oldest waiters that fit their user's limit"""
+        for waiter in list(self.waiters):
+            if self.active >= self.max_active:
+                break
+            if waiter.future.done() or not self._has_room(waiter.user):
+                continue
+            self.waiters.remove(waiter)
+            self._admit(waiter.user)
+            waiter.future.set_result(None)
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "queued": len(self.waiters),
+            "max_active": self.max_active,
+            "max_per_user": self.max_per_user,
+            "max_queue": self.max_queue,
+            "per_user": dict(self.per_user),
+            "avg_run_seconds": round(self._avg_run_seconds, 3),
+            "retry_after": self.retry_after(),
+        }
+
+
+class AdmissionMiddleware:
+    """
+    ASGI gate for POSTs to the given paths. The slot is held until the
+    response (the whole event stream) is finished. The user is taken from
+    user_header, falling back to default_user.
+    """
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        paths: Iterable[str],
+        user_header: str,
+        default_user: str,
+    ):
+        self.app = app
+        self.controller = controller
+        self.paths = set(paths)
+        self.user_header = user_header.lower().encode()
+        self.default_user = default_user
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        user = self.default_user
+        for name, value in scope["headers"]:
+            if name == self.user_header and value:
+                user = value.decode("latin-1")
+                break
+        try:
+            await self.controller.acquire(user)
+        except Rejected as exc:
+            await _reject(send, exc)
+            return
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(user, time.monotonic() - started)
+
+
+async def _reject(send, exc: Rejected):
+    body = b'{"detail":"%s"}' % exc.reason.encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": exc.status,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(exc.retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+# Test
+async def test_admission():
+    controller = AdmissionController(max_active=2, max_per_user=1, max_queue=2, queue_timeout_seconds=0.5)
+
+    async def run(user: str, seconds: float) -> str:
+        try:
+            await controller.acquire(user)
+        except Rejected as exc:
+            return f"{user}: {exc.status} retry after {exc.retry_after}s"
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            controller.release(user, seconds)
+        return f"{user}: ok"
+
+    results = await asyncio.gather(
+        run("alice", 0.2), run("alice", 0.2), run("bob", 0.2), run("carol", 0.2), run("dave", 0.2)
+    )
+    print("\n".join(results))
+    print(controller.stats())
+
+
+if __name__ == "__main__":
+    asyncio.run(test_admission())
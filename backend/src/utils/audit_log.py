@@ -0,0 +1,240 @@
+import gzip
+import json
+import os
+import queue
+import re
+import threading
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional, Union
+
+from src.utils.file_lock import file_lock
+
+_SEGMENT_RE = re.compile(r"audit-(\d{6})\.jsonl\.gz$")
+_WRITE = "write"
+
+
+class AuditLog:
+    """
+    Append-only audit log:
+    - gzip-compressed JSONL segments, one gzip member per block of records
+    - Size-based segment rotation
+    - Sparse per-block index on time, region and severity
+    - Streaming queries that only decompress matching blocks
+    - All file I/O on a background writer thread
+    - Safe to share one directory between worker processes: appends and
+      rotation happen under a lock file, and queries first pick up index
+      lines other processes wrote (their unflushed records stay private)
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_segment_bytes: int = 8 * 1024 * 1024,
+        block_records: int = 32,
+        flush_interval: float = 1.0
+    ):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_segment_bytes = max_segment_bytes
+        self.block_records = block_records
+        self.flush_interval = flush_interval
+
+        self._lock = threading.Lock()
+        self._file_lock = self.directory / "audit.lock"
+        self._index: List[Dict] = []  # one entry per block, all segments
+        self._index_read: Dict[int, int] = {}  # segment -> bytes of its index file loaded
+        self._pending: List[Dict] = []  # records not yet on disk
+        self._segment = self._refresh_index()
+
+        self._queue: queue.Queue = queue.Queue()
+        self._writer = threading.Thread(target=self._run, name="audit-log-writer", daemon=True)
+        self._writer.start()
+
+    @staticmethod
+    def new_id(now: Optional[datetime] = None) -> str:
+        now = now or datetime.utcnow()
+        return f"AUDIT-{now.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:10]}"
+
+    def append(self, record: Dict[str, Any]) -> str:
+        """Add a record; it is queryable at once and written in the background"""
+        record.setdefault("audit_id", self.new_id())
+        record.setdefault("created_at", datetime.utcnow().isoformat())
+        with self._lock:
+            self._pending.append(record)
+            block_full = len(self._pending) >= self.block_records
+        if block_full:
+            self._queue.put(_WRITE)
+        return record["audit_id"]
+
+    def flush(self, timeout: Optional[float] = None):
+        """Block until every appended record is on disk"""
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+
+    def query(
+        self,
+        start: Union[str, datetime, None] = None,
+        end: Union[str, datetime, None] = None,
+        region: Optional[str] = None,
+        severity: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Stream records matching all given filters, oldest first"""
+        start = start.isoformat() if isinstance(start, datetime) else start
+        end = end.isoformat() if isinstance(end, datetime) else end
+
+        def matches(record: Dict) -> bool:
+            created = record.get("created_at", "")
+            return (
+                (start is None or created >= start)
+                and (end is None or created <= end)
+                and (region is None or record.get("region") == region)
+                and (severity is None or record.get("severity") == severity)
+            )
+
+        with self._lock:
+            self._refresh_index()
+            blocks = list(self._index)
+            pending = list(self._pending)
+
+        returned = 0
+        for block in blocks:
+            if start is not None and block["t_max"] < start:
+                continue
+            if end is not None and block["t_min"] > end:
+                continue
+            if region is not None and region not in block["regions"]:
+                continue
+            if severity is not None and severity not in block["severities"]:
+                continue
+            for record in self._read_block(block):
+                if matches(record):
+                    yield record
+                    returned += 1
+                    if limit is not None and returned >= limit:
+                        return
+
+        for record in pending:
+            if matches(record):
+                yield record
+                returned += 1
+                if limit is not None and returned >= limit:
+                    return
+
+    def _segment_path(self, segment: int) -> Path:
+        return self.directory / f"audit-{segment:06d}.jsonl.gz"
+
+    def _index_path(self, segment: int) -> Path:
+        return self.directory / f"audit-{segment:06d}.idx.jsonl"
+
+    def _segments(self) -> List[int]:
+        return sorted(
+            int(m.group(1))
+            for m in (_SEGMENT_RE.match(p.name) for p in self.directory.iterdir())
+            if m
+        )
+
+    def _refresh_index(self) -> int:
+        """
+        Load index lines appended since the last call, by this process or
+        another; returns the newest segment. Callers hold self._lock.
+        """
+        segments = self._segments()
+        for segment in segments:
+            index_path = self._index_path(segment)
+            read = self._index_read.get(segment, 0)
+            try:
+                if index_path.stat().st_size <= read:
+                    continue
+                with open(index_path, "rb") as f:
+                    f.seek(read)
+                    data = f.read()
+            except FileNotFoundError:
+                continue
+            complete = data[:data.rfind(b"\n") + 1]  # a line being written is left for later
+            for line in complete.splitlines():
+                if line.strip():
+                    self._index.append({**json.loads(line), "segment": segment})
+            self._index_read[segment] = read + len(complete)
+        return segments[-1] if segments else 0
+
+    def _read_block(self, block: Dict) -> Iterator[Dict]:
+        with open(self._segment_path(block["segment"]), "rb") as f:
+            f.seek(block["offset"])
+            data = gzip.decompress(f.read(block["length"]))
+        for line in data.splitlines():
+            yield json.loads(line)
+
+    def _run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                item = _WRITE
+
+            self._write_blocks()
+            if item is None:
+                return
+            if isinstance(item, threading.Event):
+                item.set()
+
+    def _write_blocks(self):
+        while self._write_block():
+            pass
+
+    def _write_block(self) -> bool:
+        """Write up to one block of pending records; False if none were pending"""
+        with self._lock:
+            records = self._pending[:self.block_records]
+        if not records:
+            return False
+
+        payload = gzip.compress(
+            b"".join(
+                json.dumps(r, separators=(",", ":"), default=str).encode() + b"\n"
+                for r in records
+            )
+        )
+
+        created = [r.get("created_at", "") for r in records]
+        entry = {
+            "length": len(payload),
+            "count": len(records),
+            "t_min": min(created),
+            "t_max": max(created),
+            "regions": sorted({r.get("region") for r in records if r.get("region")}),
+            "severities": sorted({r.get("severity") for r in records if r.get("severity")}),
+        }
+
+        # Another process may have appended or rotated since: find the live
+        # segment and its end while holding the lock
+        with file_lock(self._file_lock):
+            while self._segment_path(self._segment + 1).exists():
+                self._segment += 1
+            path = self._segment_path(self._segment)
+            if path.exists() and path.stat().st_size + len(payload) > self.max_segment_bytes:
+                self._segment += 1
+                path = self._segment_path(self._segment)
+
+            with open(path, "ab") as f:
+                entry["offset"] = f.seek(0, os.SEEK_END)
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+
+            # Publish the block and drop it from pending in one step, so a
+            # query sees the records either on disk or pending, never both
+            with self._lock:
+                with open(self._index_path(self._segment), "a") as f:
+                    f.write(json.dumps(entry) + "\n")
+                self._refresh_index()
+                del self._pending[:len(records)]
+        return True
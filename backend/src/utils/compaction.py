@@ -0,0 +1,157 @@
+import json
+from typing import Any, Dict, Optional
+
+from src.utils.metrics import TOOL_TOKENS_RETURNED, TOOL_TOKENS_SAVED
+
+
+# What the model sees of each tool's result. A spec is True (keep as is),
+# a dotted path (pull a nested value up), a list of keys (keep those keys of
+# each item in a list), or a dict of specs (recurse). Anything not listed
+# stays out of the model context; the full result remains in session state
+# and in the trace spill.
+PROJECTIONS: Dict[str, Any] = {
+    "forecast_demand": {
+        "status": True,
+        "message": True,
+        "product_sku": True,
+        "region": True,
+        "spike_detected": True,
+        "spike_multiplier": True,
+        "peak_demand": True,
+        "peak_date": True,
+        "total_7day_demand": True,
+        "confidence": True,
+    },
+    "optimize_inventory": {
+        "status": True,
+        "message": True,
+        "action": True,
+        "target_warehouse": True,
+        "current_stock": True,
+        "forecasted_demand": True,
+        "gap": True,
+        "reorder_needed": True,
+        "reorder_quantity": True,
+        "transfers": ["from_warehouse", "to_warehouse", "quantity", "distance_km"],
+    },
+    "get_warehouse_status": {
+        "warehouses": ["id", "name", "current_stock", "utilization_percent", "status"],
+    },
+    "list_all_products": ["sku", "name", "category", "price"],
+    "negotiate_with_vendor": {
+        "status": True,
+        "message": True,
+        "vendor_selected": True,
+        "quantity": True,
+        "unit_price": True,
+        "total_price": True,
+        "delivery_date": True,
+        "po_number": "purchase_order.po_number",
+        "negotiation_savings": True,
+    },
+    "plan_delivery_route": {
+        "status": True,
+        "message": True,
+        "total_routes": True,
+        "total_cost": True,
+        "earliest_delivery": True,
+        "average_delivery_hours": True,
+        "routes": ["from", "to", "mode", "quantity", "eta_display", "cost", "carrier"],
+        "consolidation": {"total_trips": True, "savings": True, "savings_percent": True},
+    },
+    "send_supply_alerts": {
+        "status": True,
+        "message": True,
+        "alert_id": True,
+        "severity": True,
+        "escalated": True,
+        "recipients_notified": True,
+        "channels_used": True,
+        "suppressed_duplicates": True,
+        "window_remaining_seconds": True,
+        "audit_id": "audit_record.audit_id",
+    },
+}
+
+
+def estimate_tokens(value: Any) -> int:
+    """~4 characters per token of compact JSON; no tokenizer dependency"""
+    encoded = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    return (len(encoded) + 3) // 4
+
+
+def _lookup(value: Any, path: str) -> Any:
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def _project(value: Any, spec: Any) -> Any:
+    if spec is True or value is None:
+        return value
+    if isinstance(spec, list):
+        if not isinstance(value, list):
+            return value
+        return [
+            {key: item[key] for key in spec if key in item} if isinstance(item, dict) else item
+            for item in value
+        ]
+    if isinstance(spec, dict) and isinstance(value, dict):
+        projected = {}
+        for key, sub_spec in spec.items():
+            if isinstance(sub_spec, str):
+                item = _lookup(value, sub_spec)
+                if item is not None:
+                    projected[key] = item
+            elif key in value:
+                projected[key] = _project(value[key], sub_spec)
+        return projected
+    return value
+
+
+def _trim_to_budget(projected: Any, budget: int) -> Any:
+    """Halve the longest list until the projection fits, noting what was cut"""
+    while estimate_tokens(projected) > budget:
+        if isinstance(projected, list):
+            if len(projected) <= 1:
+                break
+            projected = projected[: len(projected) // 2]
+            continue
+        if not isinstance(projected, dict):
+            break
+        lists = [
+            (len(v), k) for k, v in projected.items() if isinstance(v, list) and len(v) > 1
+        ]
+        if not lists:
+            break
+        _, key = max(lists)
+        kept = projected[key][: len(projected[key]) // 2]
+        omitted = projected.get(f"{key}_omitted", 0) + len(projected[key]) - len(kept)
+        projected = {**projected, key: kept, f"{key}_omitted": omitted}
+    return projected
+
+
+def compact_result(tool: str, result: Any, budget_tokens: Optional[int] = None) -> Any:
+    """
+    Projection of a tool result for the model context, within budget_tokens.
+
+    Error results pass through untouched. Tokens saved versus the full result
+    are counted per tool in the metrics registry.
+    """
+    spec = PROJECTIONS.get(tool)
+    if spec is None or (isinstance(result, dict) and result.get("status") == "error"):
+        return result
+
+    projected = _project(result, spec)
+    if budget_tokens:
+        projected = _trim_to_budget(projected, budget_tokens)
+    if isinstance(result, list) and isinstance(projected, list) and len(projected) < len(result):
+        projected = {"items": projected, "items_omitted": len(result) - len(projected)}
+
+    full_tokens = estimate_tokens(result)
+    returned_tokens = estimate_tokens(projected)
+    TOOL_TOKENS_RETURNED.labels(tool)[0] += returned_tokens
+    TOOL_TOKENS_SAVED.labels(tool)[0] += max(full_tokens - returned_tokens, 0)
+    return projected
@@ -0,0 +1,22 @@
+import fcntl
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Union
+
+
+@contextmanager
+def file_lock(path: Union[str, Path], shared: bool = False) -> Iterator[None]:
+    """
+    Cross-process lock on a sidecar lock file:
+    - flock, so each open is its own lock: threads of one process exclude
+      each other too, and closing one handle never drops another's lock
+    - Lock a file that is never renamed, so rotating the data file it
+      guards doesn't move the lock along with it
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
@@ -0,0 +1,45 @@
+import threading
+from time import perf_counter
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Lazy(Generic[T]):
+    """
+    Singleton built on first attribute access:
+    - Callers use it like the object itself (svc.method(...))
+    - Construction runs once, guarded by a lock, so a background warmup
+      thread and a request can race safely
+    - build_seconds records how long construction took
+    """
+
+    __slots__ = ("_factory", "_value", "_lock", "name", "build_seconds")
+
+    def __init__(self, factory: Callable[[], T], name: Optional[str] = None):
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+        self.name = name or getattr(factory, "__qualname__", "lazy")
+        self.build_seconds: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self._value is not None
+
+    def resolve(self) -> T:
+        value = self._value
+        if value is None:
+            with self._lock:
+                value = self._value
+                if value is None:
+                    started = perf_counter()
+                    value = self._value = self._factory()
+                    self.build_seconds = perf_counter() - started
+        return value
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.resolve(), attr)
+
+    def __repr__(self) -> str:
+        return f"Lazy({self.name}, ready={self.ready})"
@@ -0,0 +1,337 @@
+import functools
+import inspect
+from bisect import bisect_left
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Latency is counted in buckets growing by 2^(1/4) (~19%) from 10µs to ~100s,
+# fine enough for bucket-interpolated p50/p95/p99 to land within about 10% of
+# the true value. /metrics exports every 4th bound (a 2x progression, 24
+# buckets) so each series stays small to scrape; the quantile gauges are
+# computed in process from the fine counts.
+LATENCY_BOUNDS: Tuple[float, ...] = tuple(1e-5 * 2 ** (k / 4) for k in range(94))
+EXPORTED_LATENCY_BOUNDS: Tuple[float, ...] = LATENCY_BOUNDS[::4]
+PAYLOAD_BOUNDS: Tuple[float, ...] = tuple(float(2 ** k) for k in range(6, 25))
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class _HistogramSeries:
+    """
+    One labelled histogram:
+    - Per-bucket counts in a plain list, no lock
+    - observe() is a bisect plus two in-place increments
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Sequence[float]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate by linear interpolation inside the bucket holding rank q"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.bounds[-1]
+
+
+class Histogram:
+    """
+    Labelled histogram. Observations are counted against bounds; render()
+    exports only exported_bounds (a subset of bounds, all of them by default),
+    summing the finer buckets in between.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        label: str,
+        bounds: Sequence[float],
+        exported_bounds: Optional[Sequence[float]] = None,
+    ):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.bounds = bounds
+        self.exported_bounds = tuple(bounds if exported_bounds is None else exported_bounds)
+        positions = {bound: i for i, bound in enumerate(bounds)}
+        if any(bound not in positions for bound in self.exported_bounds):
+            raise ValueError(f"{name}: exported bounds must be a subset of the bounds")
+        self._exported_at = {positions[bound]: bound for bound in self.exported_bounds}
+        self.series: Dict[str, _HistogramSeries] = {}
+
+    def labels(self, value: str) -> _HistogramSeries:
+        series = self.series.get(value)
+        if series is None:
+            series = self.series.setdefault(value, _HistogramSeries(self.bounds))
+        return series
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for value, series in sorted(self.series.items()):
+            counts = list(series.counts)
+            if not any(counts):
+                continue  # registered at import, never observed: calls_total still shows it
+            label = f'{self.label}="{_escape(value)}"'
+            cumulative = 0
+            for i, count in enumerate(counts[:-1]):
+                cumulative += count
+                bound = self._exported_at.get(i)
+                if bound is not None:
+                    lines.append(f'{self.name}_bucket{{{label},le="{bound:.6g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{label}}} {series.sum:.6f}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+    def render_quantiles(self, name: str, help: str) -> List[str]:
+        lines = [f"# HELP {name} {help}", f"# TYPE {name} gauge"]
+        for value, series in sorted(self.series.items()):
+            for q in QUANTILES:
+                estimate = series.quantile(q)
+                if estimate is not None:
+                    lines.append(
+                        f'{name}{{{self.label}="{_escape(value)}",quantile="{q}"}} {estimate:.6f}'
+                    )
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label: str):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values: Dict[str, List[int]] = {}
+
+    def labels(self, value: str) -> List[int]:
+        cell = self.values.get(value)
+        if cell is None:
+            cell = self.values.setdefault(value, [0])
+        return cell
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for value, cell in sorted(self.values.items()):
+            lines.append(f'{self.name}{{{self.label}="{_escape(value)}"}} {cell[0]}')
+        return lines
+
+
+class Gauge(Counter):
+    """Like Counter, but the cell is set rather than only incremented"""
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Family:
+    """Latency histogram plus call and error counters for one kind of callable"""
+
+    def __init__(self, prefix: str, label: str, what: str):
+        self.prefix = prefix
+        self.latency = Histogram(
+            f"{prefix}_latency_seconds",
+            f"{what} latency in seconds",
+            label,
+            LATENCY_BOUNDS,
+            EXPORTED_LATENCY_BOUNDS,
+        )
+        self.calls = Counter(f"{prefix}_calls_total", f"{what} calls", label)
+        self.errors = Counter(
+            f"{prefix}_errors_total", f"{what} calls that raised or returned status=error", label
+        )
+
+    def render(self) -> List[str]:
+        return (
+            self.calls.render()
+            + self.errors.render()
+            + self.latency.render()
+            + self.latency.render_quantiles(
+                f"{self.prefix}_latency_quantile_seconds",
+                "Latency p50/p95/p99 estimated from the histogram",
+            )
+        )
+
+
+TOOLS = _Family("supply_chain_tool", "tool", "Tool wrapper")
+SERVICES = _Family("supply_chain_service", "method", "Agent service method")
+TOOL_PAYLOAD = Histogram(
+    "supply_chain_tool_payload_bytes",
+    "Encoded size of tool input plus output",
+    "tool",
+    PAYLOAD_BOUNDS,
+)
+
+TOOL_TOKENS_RETURNED = Counter(
+    "supply_chain_tool_context_tokens_total",
+    "Estimated tokens of tool results returned to the model",
+    "tool",
+)
+TOOL_TOKENS_SAVED = Counter(
+    "supply_chain_tool_context_tokens_saved_total",
+    "Estimated tokens kept out of the model context by result compaction",
+    "tool",
+)
+
+MODELS = _Family("supply_chain_model", "route", "Model call (agent:tier)")
+MODEL_COST = Counter(
+    "supply_chain_model_cost_usd_total",
+    "Estimated model spend in USD per agent:tier route",
+    "route",
+)
+MODEL_FALLBACKS = Counter(
+    "supply_chain_model_fallbacks_total",
+    "Turns retried on a stronger tier after an invalid tool call",
+    "route",
+)
+
+SESSION_BYTES = Gauge(
+    "supply_chain_session_resident_bytes", "Estimated bytes of sessions held in memory", "tier"
+)
+SESSIONS_RESIDENT = Gauge(
+    "supply_chain_sessions_resident", "Sessions held in memory", "tier"
+)
+SESSION_EVENTS = Counter(
+    "supply_chain_session_events_total",
+    "Session tier events: evicted, loaded from disk, flushed, compacted",
+    "event",
+)
+
+ADMISSION = Counter(
+    "supply_chain_admission_total",
+    "Agent requests by admission outcome: admitted, queued, rejected, expired",
+    "outcome",
+)
+ADMISSION_DEPTH = Gauge(
+    "supply_chain_admission_requests", "Agent requests running or waiting for a slot", "state"
+)
+ADMISSION_WAIT = Histogram(
+    "supply_chain_admission_wait_seconds",
+    "Time agent requests spent queued before admission or expiry",
+    "outcome",
+    LATENCY_BOUNDS,
+    EXPORTED_LATENCY_BOUNDS,
+)
+MODEL_PACING_WAIT = Histogram(
+    "supply_chain_model_pacing_wait_seconds",
+    "Time model calls waited for the request/token buckets",
+    "model",
+    LATENCY_BOUNDS,
+    EXPORTED_LATENCY_BOUNDS,
+)
+
+LOG_DROPPED = Counter(
+    "supply_chain_log_records_dropped_total",
+    "Log records dropped because the log queue was full",
+    "level",
+)
+
+_FAMILIES = {"tool": TOOLS, "service": SERVICES}
+
+
+def instrumented(kind: str = "tool", name: Optional[str] = None) -> Callable:
+    """
+    Time a tool wrapper or service method with the monotonic clock.
+
+    Series are resolved once at decoration time, so each call only pays for
+    two perf_counter() reads and a few list increments. Works for sync and
+    async callables and keeps the signature ADK reads tool schemas from.
+    """
+    family = _FAMILIES[kind]
+
+    def decorate(func: Callable) -> Callable:
+        label = name or (func.__name__ if kind == "tool" else func.__qualname__)
+        latency = family.latency.labels(label)
+        calls = family.calls.labels(label)
+        errors = family.errors.labels(label)
+
+        def record(started: float, result: Any):
+            latency.observe(perf_counter() - started)
+            calls[0] += 1
+            if isinstance(result, dict) and result.get("status") == "error":
+                errors[0] += 1
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = perf_counter()
+                try:
+                    result = await func(*args, **kwargs)
+                except BaseException:
+                    errors[0] += 1
+                    record(started, None)
+                    raise
+                record(started, result)
+                return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                errors[0] += 1
+                record(started, None)
+                raise
+            record(started, result)
+            return result
+
+        return wrapper
+
+    return decorate
+
+
+def observe_payload(tool: str, size: int):
+    TOOL_PAYLOAD.labels(tool).observe(size)
+
+
+def render_prometheus() -> str:
+    """All metrics in Prometheus text exposition format"""
+    lines = (
+        TOOLS.render()
+        + TOOL_PAYLOAD.render()
+        + TOOL_TOKENS_RETURNED.render()
+        + TOOL_TOKENS_SAVED.render()
+        + SERVICES.render()
+        + MODELS.render()
+        + MODEL_COST.render()
+        + MODEL_FALLBACKS.render()
+        + SESSION_BYTES.render()
+        + SESSIONS_RESIDENT.render()
+        + SESSION_EVENTS.render()
+        + ADMISSION.render()
+        + ADMISSION_DEPTH.render()
+        + ADMISSION_WAIT.render()
+        + ADMISSION_WAIT.render_quantiles(
+            "supply_chain_admission_wait_quantile_seconds",
+            "Admission wait p50/p95/p99 estimated from the histogram",
+        )
+        + MODEL_PACING_WAIT.render()
+        + LOG_DROPPED.render()
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,51 @@
+import asyncio
+import time
+
+
+class TokenBucket:
+    """
+    Paces callers to `rate` units per second with bursts up to `capacity`:
+    - acquire(n) waits until n units are available, then takes them
+    - Waiters are served in arrival order, so a large request isn't starved
+      by a stream of small ones
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Take amount units, waiting as needed; returns seconds waited"""
+        amount = min(amount, self.capacity)
+        started = time.monotonic()
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+        return time.monotonic() - started
+
+
+# Test
+async def test_token_bucket():
+    bucket = TokenBucket(rate=20, capacity=5)
+    started = time.monotonic()
+    await asyncio.gather(*(bucket.acquire() for _ in range(25)))
+    print(f"25 calls at 20/s with burst 5: {time.monotonic() - started:.2f}s (expected ~1.0s)")
+
+    tokens = TokenBucket(rate=1000, capacity=1000)
+    waited = [await tokens.acquire(n) for n in (800, 800, 100)]
+    print(f"800, 800, 100 tokens at 1000/s: waited {[round(w, 2) for w in waited]} (expected [0, ~0.6, ~0.1])")
+
+
+if __name__ == "__main__":
+    asyncio.run(test_token_bucket())
@@ -0,0 +1,477 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig, ListSessionsResponse
+from google.adk.sessions.state import State
+from google.genai import types
+
+from src.utils.metrics import SESSION_BYTES, SESSION_EVENTS, SESSIONS_RESIDENT
+
+Key = Tuple[str, str, str]  # app_name, user_id, session_id
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS sessions ("
+    " app_name TEXT, user_id TEXT, id TEXT, last_update_time REAL,"
+    " compacted_events INTEGER, payload TEXT,"
+    " PRIMARY KEY (app_name, user_id, id))",
+    "CREATE TABLE IF NOT EXISTS scoped_state ("
+    " app_name TEXT, user_id TEXT, payload TEXT, PRIMARY KEY (app_name, user_id))",
+)
+
+
+def _split_state(state: Optional[Dict[str, Any]]) -> Tuple[Dict, Dict, Dict]:
+    """(app, user, session) parts of a state delta; temp: keys are dropped"""
+    app, user, session = {}, {}, {}
+    for key, value in (state or {}).items():
+        if key.startswith(State.APP_PREFIX):
+            app[key[len(State.APP_PREFIX):]] = value
+        elif key.startswith(State.USER_PREFIX):
+            user[key[len(State.USER_PREFIX):]] = value
+        elif not key.startswith(State.TEMP_PREFIX):
+            session[key] = value
+    return app, user, session
+
+
+def _light_copy(session: Session, events: Optional[List[Event]] = None) -> Session:
+    copied = session.model_copy(deep=False)
+    copied.events = list(session.events if events is None else events)
+    copied.state = dict(session.state)
+    return copied
+
+
+def _compaction_cut(events: List[Event], keep_events: int) -> int:
+    """Index of the first kept event; never splits a tool call from its response"""
+    cut = max(0, len(events) - keep_events)
+    while cut > 0 and events[cut].get_function_responses():
+        cut -= 1
+    return cut
+
+
+def _conversation_turn(event: Event) -> Optional[Event]:
+    """
+    The user/model text of a compacted event, or None if it has none.
+    Tool calls, tool responses, thoughts and the state delta are dropped.
+    """
+    parts = event.content.parts if event.content and event.content.parts else []
+    text = [p for p in parts if p.text and not p.thought]
+    if not text:
+        return None
+    if len(text) == len(parts) and not event.actions.state_delta:
+        return event  # already a plain text turn
+    return event.model_copy(update={
+        "content": types.Content(role=event.content.role, parts=text),
+        "actions": EventActions(),
+    })
+
+
+class _Resident:
+    __slots__ = ("session", "size", "dirty", "compacted")
+
+    def __init__(self, session: Session, size: int, compacted: int = 0):
+        self.session = session
+        self.size = size
+        self.dirty = True
+        self.compacted = compacted  # events folded into the state snapshot so far
+
+
+class TieredSessionService(BaseSessionService):
+    """
+    Session storage in two tiers:
+    - Hot: in-memory LRU, bounded by the estimated bytes of its sessions
+    - Cold: SQLite file; evicted and periodically flushed sessions land
+      here, and survive restarts
+    - Compaction: once a session is idle (or on eviction), events older than
+      the last keep_events are reduced to the conversation: user and model
+      text turns are kept, tool calls, tool responses and state deltas are
+      dropped; session.state already holds their effect, so the state is
+      the snapshot
+    - Resident bytes, sessions and tier events are exported as metrics
+    - shared: for several worker processes on one SQLite file. Every
+      change is written through at once, and a hot session (and the
+      app:/user: state) is re-read when another process has saved a newer
+      version, so a chat's next turn can land on any worker
+    """
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        max_bytes: int = 64 * 1024 * 1024,
+        keep_events: int = 40,
+        compact_after_seconds: float = 300,
+        flush_interval_seconds: float = 5,
+        shared: bool = False,
+    ):
+        self.shared = shared
+        self.max_bytes = max_bytes
+        self.keep_events = keep_events
+        self.compact_after_seconds = compact_after_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+
+        self._hot: "OrderedDict[Key, _Resident]" = OrderedDict()
+        self._hot_bytes = 0
+        self._app_state: Dict[str, Dict[str, Any]] = {}
+        self._user_state: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._maintenance: Optional[asyncio.Task] = None
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._db.execute(statement)
+        self._db.commit()
+        self._load_scoped()
+
+    # BaseSessionService
+
+    async def create_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        state: Optional[Dict[str, Any]] = None,
+        session_id: Optional[str] = None,
+    ) -> Session:
+        self._start_maintenance()
+        session_id = session_id.strip() if session_id else uuid.uuid4().hex
+        key = (app_name, user_id, session_id)
+        if key in self._hot or await asyncio.to_thread(self._db_exists, key):
+            from google.adk.errors.already_exists_error import AlreadyExistsError
+            raise AlreadyExistsError(f"Session with id {session_id} already exists.")
+
+        app_delta, user_delta, session_state = _split_state(state)
+        await self._update_scoped(app_name, user_id, app_delta, user_delta)
+        session = Session(
+            app_name=app_name,
+            user_id=user_id,
+            id=session_id,
+            state=session_state,
+            last_update_time=time.time(),
+        )
+        resident = await self._admit(key, session)
+        if self.shared:
+            await self._write_through(key, resident)
+        return self._merge_scoped(_light_copy(session))
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        self._start_maintenance()
+        resident = await self._resident((app_name, user_id, session_id.strip()))
+        if resident is None:
+            return None
+        if self.shared:
+            await asyncio.to_thread(self._load_scoped)
+        events = resident.session.events
+        if config is not None:
+            if config.num_recent_events is not None:
+                events = events[-config.num_recent_events:] if config.num_recent_events else []
+            if config.after_timestamp is not None:
+                events = [e for e in events if e.timestamp >= config.after_timestamp]
+        return self._merge_scoped(_light_copy(resident.session, events))
+
+    async def list_sessions(
+        self, *, app_name: str, user_id: Optional[str] = None
+    ) -> ListSessionsResponse:
+        sessions: Dict[Key, Session] = {}
+        for app, user, sid, last_update, payload in await asyncio.to_thread(
+            self._db_list, app_name, user_id
+        ):
+            state = json.loads(payload).get("state", {})
+            sessions[(app, user, sid)] = Session(
+                app_name=app, user_id=user, id=sid, state=state, last_update_time=last_update
+            )
+        for key, resident in self._hot.items():
+            if key[0] == app_name and (user_id is None or key[1] == user_id):
+                sessions[key] = _light_copy(resident.session, [])
+        ordered = sorted(sessions.values(), key=lambda s: (s.last_update_time, s.user_id, s.id))
+        return ListSessionsResponse(sessions=[self._merge_scoped(s) for s in ordered])
+
+    async def delete_session(self, *, app_name: str, user_id: str, session_id: str) -> None:
+        key = (app_name, user_id, session_id.strip())
+        resident = self._hot.pop(key, None)
+        if resident is not None:
+            self._hot_bytes -= resident.size
+            self._publish()
+        await asyncio.to_thread(self._db_delete, key)
+
+    async def get_user_state(self, *, app_name: str, user_id: str) -> Dict[str, Any]:
+        return dict(self._user_state.get((app_name, user_id), {}))
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        if event.partial:
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        resident = await self._resident(key)
+        if resident is None:
+            from google.adk.errors.session_not_found_error import SessionNotFoundError
+            raise SessionNotFoundError(f"Session {session.id} not found.")
+        stored = resident.session
+        if any(e == event for e in stored.events if e.id == event.id):
+            return event
+
+        await super().append_event(session=session, event=event)
+        session.last_update_time = event.timestamp
+        if stored is not session:
+            stored.events.append(event)
+        stored.last_update_time = event.timestamp
+
+        growth = len(event.model_dump_json(exclude_none=True))
+        if event.actions and event.actions.state_delta:
+            app_delta, user_delta, session_delta = _split_state(event.actions.state_delta)
+            await self._update_scoped(session.app_name, session.user_id, app_delta, user_delta)
+            if session_delta:
+                stored.state.update(session_delta)
+        resident.size += growth
+        resident.dirty = True
+        self._hot_bytes += growth
+        if self.shared:
+            await self._write_through(key, resident)
+        await self._evict_over_budget(keep=key)
+        return event
+
+    async def flush(self) -> None:
+        """Write every dirty hot session to the cold tier"""
+        dirty = [(key, r) for key, r in self._hot.items() if r.dirty]
+        if not dirty:
+            return
+        rows = [self._row(key, r) for key, r in dirty]
+        for _, resident in dirty:
+            resident.dirty = False
+        await asyncio.to_thread(self._db_put_many, rows)
+        SESSION_EVENTS.labels("flushed")[0] += len(rows)
+
+    # Maintenance
+
+    def compact(self, resident: _Resident) -> int:
+        """
+        Reduce events older than the last keep_events to their text turns;
+        returns how many events were dropped or trimmed
+        """
+        events = resident.session.events
+        cut = _compaction_cut(events, self.keep_events)
+        kept, changed = [], 0
+        for event in events[:cut]:
+            turn = _conversation_turn(event)
+            if turn is not event:
+                changed += 1
+            if turn is not None:
+                kept.append(turn)
+        if changed == 0:
+            return 0
+        resident.session.events = kept + events[cut:]
+        resident.compacted += cut - len(kept)
+        resident.dirty = True
+        new_size = self._size(resident.session)
+        self._hot_bytes += new_size - resident.size
+        resident.size = new_size
+        SESSION_EVENTS.labels("compacted_events")[0] += changed
+        return changed
+
+    async def maintain(self):
+        """Compact idle sessions, then flush; runs every flush_interval_seconds"""
+        idle_before = time.time() - self.compact_after_seconds
+        for resident in list(self._hot.values()):
+            if resident.session.last_update_time < idle_before:
+                self.compact(resident)
+        await self.flush()
+        self._publish()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._db_lock:
+            cold = self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return {
+            "hot_sessions": len(self._hot),
+            "hot_bytes": self._hot_bytes,
+            "max_bytes": self.max_bytes,
+            "cold_sessions": cold,
+            **{name: cell[0] for name, cell in SESSION_EVENTS.values.items()},
+        }
+
+    def _start_maintenance(self):
+        if self._maintenance is None or self._maintenance.done():
+            self._maintenance = asyncio.get_running_loop().create_task(self._maintenance_loop())
+
+    async def _maintenance_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            await self.maintain()
+
+    # Hot tier
+
+    async def _resident(self, key: Key) -> Optional[_Resident]:
+        resident = self._hot.get(key)
+        if resident is not None and self.shared:
+            saved = await asyncio.to_thread(self._db_last_update, key)
+            if saved is None or saved > resident.session.last_update_time:
+                # Deleted or advanced by another process: drop the stale copy
+                if self._hot.pop(key, None) is resident:
+                    self._hot_bytes -= resident.size
+                resident = None
+                if saved is None:
+                    self._publish()
+                    return None
+        if resident is not None:
+            self._hot.move_to_end(key)
+            return resident
+        row = await asyncio.to_thread(self._db_get, key)
+        if row is None:
+            return None
+        # Another coroutine may have loaded it while this one waited
+        resident = self._hot.get(key)
+        if resident is not None:
+            return resident
+        compacted, payload = row
+        SESSION_EVENTS.labels("loaded")[0] += 1
+        resident = await self._admit(key, Session.model_validate_json(payload), compacted)
+        resident.dirty = False
+        return resident
+
+    async def _admit(self, key: Key, session: Session, compacted: int = 0) -> _Resident:
+        resident = _Resident(session, self._size(session), compacted)
+        self._hot[key] = resident
+        self._hot_bytes += resident.size
+        await self._evict_over_budget(keep=key)
+        return resident
+
+    async def _evict_over_budget(self, keep: Key):
+        evicted = []
+        while self._hot_bytes > self.max_bytes and len(self._hot) > 1:
+            key, resident = next(iter(self._hot.items()))
+            if key == keep:
+                self._hot.move_to_end(key)
+                continue
+            self.compact(resident)
+            del self._hot[key]
+            self._hot_bytes -= resident.size
+            evicted.append((key, resident))
+        if evicted:
+            SESSION_EVENTS.labels("evicted")[0] += len(evicted)
+            rows = [self._row(key, r) for key, r in evicted if r.dirty]
+            if rows:
+                await asyncio.to_thread(self._db_put_many, rows)
+        self._publish()
+
+    def _publish(self):
+        SESSION_BYTES.labels("hot")[0] = self._hot_bytes
+        SESSIONS_RESIDENT.labels("hot")[0] = len(self._hot)
+
+    @staticmethod
+    def _size(session: Session) -> int:
+        return len(session.model_dump_json(exclude_none=True))
+
+    # Scoped (app:/user:) state, small and written through
+
+    async def _update_scoped(self, app_name: str, user_id: str, app_delta: Dict, user_delta: Dict):
+        if self.shared and (app_delta or user_delta):
+            await asyncio.to_thread(self._load_scoped)  # apply the delta to the latest values
+        rows = []
+        if app_delta:
+            state = self._app_state.setdefault(app_name, {})
+            state.update(app_delta)
+            rows.append((app_name, "", json.dumps(state, default=str)))
+        if user_delta:
+            state = self._user_state.setdefault((app_name, user_id), {})
+            state.update(user_delta)
+            rows.append((app_name, user_id, json.dumps(state, default=str)))
+        if rows:
+            await asyncio.to_thread(self._db_put_scoped, rows)
+
+    def _load_scoped(self):
+        with self._db_lock:
+            rows = self._db.execute("SELECT app_name, user_id, payload FROM scoped_state").fetchall()
+        for app_name, user_id, payload in rows:
+            if user_id:
+                self._user_state[(app_name, user_id)] = json.loads(payload)
+            else:
+                self._app_state[app_name] = json.loads(payload)
+
+    def _merge_scoped(self, session: Session) -> Session:
+        for key, value in self._app_state.get(session.app_name, {}).items():
+            session.state[State.APP_PREFIX + key] = value
+        for key, value in self._user_state.get((session.app_name, session.user_id), {}).items():
+            session.state[State.USER_PREFIX + key] = value
+        return session
+
+    # Cold tier
+
+    @staticmethod
+    def _row(key: Key, resident: _Resident) -> tuple:
+        session = resident.session
+        return (*key, session.last_update_time, resident.compacted, session.model_dump_json())
+
+    async def _write_through(self, key: Key, resident: _Resident):
+        await asyncio.to_thread(self._db_put_many, [self._row(key, resident)])
+        resident.dirty = False
+
+    def _db_last_update(self, key: Key) -> Optional[float]:
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT last_update_time FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?",
+                key,
+            ).fetchone()
+        return row[0] if row else None
+
+    def _db_exists(self, key: Key) -> bool:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT 1 FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            ).fetchone() is not None
+
+    def _db_get(self, key: Key):
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT compacted_events, payload FROM sessions"
+                " WHERE app_name = ? AND user_id = ? AND id = ?",
+                key,
+            ).fetchone()
+
+    def _db_list(self, app_name: str, user_id: Optional[str]):
+        query = "SELECT app_name, user_id, id, last_update_time, payload FROM sessions WHERE app_name = ?"
+        params: tuple = (app_name,)
+        if user_id is not None:
+            query += " AND user_id = ?"
+            params += (user_id,)
+        with self._db_lock:
+            return self._db.execute(query, params).fetchall()
+
+    def _db_put_many(self, rows: List[tuple]):
+        # Never replace a newer version (saved by another process) with an older one
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (app_name, user_id, id) DO UPDATE SET"
+                " last_update_time = excluded.last_update_time,"
+                " compacted_events = excluded.compacted_events, payload = excluded.payload"
+                " WHERE excluded.last_update_time >= sessions.last_update_time",
+                rows,
+            )
+            self._db.commit()
+
+    def _db_put_scoped(self, rows: List[tuple]):
+        with self._db_lock:
+            self._db.executemany("INSERT OR REPLACE INTO scoped_state VALUES (?, ?, ?)", rows)
+            self._db.commit()
+
+    def _db_delete(self, key: Key):
+        with self._db_lock:
+            self._db.execute(
+                "DELETE FROM sessions WHERE app_name = ? AND user_id = ? AND id = ?", key
+            )
+            self._db.commit()
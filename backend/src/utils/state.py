@@ -1,5 +1,6 @@
+import json
 from pydantic import BaseModel, Field
-from typing import Optional, Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 
 class SupplyChainState(BaseModel):
@@ -8,21 +9,296 @@ class SupplyChainState(BaseModel):
     event_type: Optional[str] = None
 
     spike_detected: Optional[bool] = None
+    spike_multiplier: Optional[float] = None
     peak_demand: Optional[int] = None
+    peak_date: Optional[str] = None
     total_7day_demand: Optional[int] = None
     confidence: Optional[float] = None
+    forecast: Optional[List[dict]] = None
+    factors: Optional[List[str]] = None
 
     stock_levels: Optional[Dict[str, int]] = None
+    current_stock: Optional[int] = None
     gap_size: Optional[int] = None
     reorder_needed: Optional[bool] = None
+    reorder_quantity: Optional[int] = None
+    reservation_id: Optional[str] = None
+    warehouses: Optional[List[dict]] = None
+    products: Optional[List[dict]] = None
 
     po_number: Optional[str] = None
     vendor_name: Optional[str] = None
+    unit_price: Optional[float] = None
+    vendor_total_cost: Optional[float] = None
     delivery_date: Optional[str] = None
+    purchase_order: Optional[dict] = None
 
     transfers: Optional[List[dict]] = None
     routes: Optional[List[dict]] = None
+    routing_total_cost: Optional[float] = None
+    earliest_delivery: Optional[str] = None
+    consolidation: Optional[dict] = None
 
+    alert_id: Optional[str] = None
     alert_severity: Optional[str] = None
 
-    execution_trace: List[dict] = Field(default_factory=list)
\ No newline at end of file
+    execution_trace: List[dict] = Field(default_factory=list)
+
+
+# Each workflow field is its own session-state key, so a tool call only emits
+# deltas for the fields it changed instead of rewriting one nested object.
+FIELD_PREFIX = "wf."
+TRACE_PREFIX = "wf_trace."
+TRACE_HEAD = "wf_trace_head"
+
+_MISSING = object()
+_NUMBER = (int, float)
+
+
+class _Field:
+    __slots__ = ("name", "types", "lazy")
+
+    def __init__(self, name: str, types: Any, lazy: bool = False):
+        self.name = name
+        self.types = types
+        self.lazy = lazy  # stored encoded; decoded on first read
+
+
+FIELDS: Dict[str, _Field] = {
+    f.name: f
+    for f in (
+        _Field("product_sku", str),
+        _Field("region", str),
+        _Field("event_type", str),
+        _Field("spike_detected", bool),
+        _Field("spike_multiplier", _NUMBER),
+        _Field("peak_demand", int),
+        _Field("peak_date", str),
+        _Field("total_7day_demand", int),
+        _Field("confidence", _NUMBER),
+        _Field("forecast", list, lazy=True),
+        _Field("factors", list, lazy=True),
+        _Field("stock_levels", dict),
+        _Field("current_stock", int),
+        _Field("gap_size", int),
+        _Field("reorder_needed", bool),
+        _Field("reorder_quantity", int),
+        _Field("reservation_id", str),
+        _Field("warehouses", list, lazy=True),
+        _Field("products", list, lazy=True),
+        _Field("po_number", str),
+        _Field("vendor_name", str),
+        _Field("unit_price", _NUMBER),
+        _Field("vendor_total_cost", _NUMBER),
+        _Field("delivery_date", str),
+        _Field("purchase_order", dict, lazy=True),
+        _Field("transfers", list),
+        _Field("routes", list),
+        _Field("routing_total_cost", _NUMBER),
+        _Field("earliest_delivery", str),
+        _Field("consolidation", dict, lazy=True),
+        _Field("alert_id", str),
+        _Field("alert_severity", str),
+    )
+}
+
+# Fields each tool may write, mapped to where the value sits in the tool's
+# result (dotted for nested keys; None when the tool wrapper sets it itself).
+# Result keys not listed here stay out of session state.
+TOOL_WRITES: Dict[str, Dict[str, Optional[str]]] = {
+    "forecast_demand": {
+        "product_sku": "product_sku",
+        "region": "region",
+        "event_type": None,
+        "spike_detected": "spike_detected",
+        "spike_multiplier": "spike_multiplier",
+        "peak_demand": "peak_demand",
+        "peak_date": "peak_date",
+        "total_7day_demand": "total_7day_demand",
+        "confidence": "confidence",
+        "forecast": "forecast",
+        "factors": "factors",
+    },
+    "optimize_inventory": {
+        "current_stock": "current_stock",
+        "gap_size": "gap",
+        "reorder_needed": "reorder_needed",
+        "reorder_quantity": "reorder_quantity",
+        "reservation_id": "reservation_id",
+        "transfers": "transfers",
+    },
+    "get_warehouse_status": {
+        "warehouses": "warehouses",
+    },
+    "list_all_products": {
+        "products": None,
+    },
+    "negotiate_with_vendor": {
+        "vendor_name": "vendor_selected",
+        "po_number": "purchase_order.po_number",
+        "unit_price": "unit_price",
+        "vendor_total_cost": "total_price",
+        "delivery_date": "delivery_date",
+        "purchase_order": "purchase_order",
+    },
+    "plan_delivery_route": {
+        "routes": "routes",
+        "routing_total_cost": "total_cost",
+        "earliest_delivery": "earliest_delivery",
+        "consolidation": "consolidation",
+    },
+    "source_and_route": {},  # filled below: vendor and routing fields together
+    "send_supply_alerts": {
+        "alert_id": "alert_id",
+        "alert_severity": None,
+    },
+}
+
+TOOL_WRITES["source_and_route"] = {
+    **TOOL_WRITES["negotiate_with_vendor"],
+    **TOOL_WRITES["plan_delivery_route"],
+}
+
+_encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def encode(value: Any) -> str:
+    """Compact JSON for state values"""
+    return _encoder.encode(value)
+
+
+def decode(text: str) -> Any:
+    return json.loads(text)
+
+
+def dump_workflow(session_state: Any) -> bytes:
+    """Binary snapshot of the workflow keys; lazy fields stay encoded"""
+    return encode({
+        key: value
+        for key, value in _items(session_state)
+        if key.startswith((FIELD_PREFIX, TRACE_PREFIX)) or key == TRACE_HEAD
+    }).encode()
+
+
+def load_workflow(data: bytes) -> Dict[str, Any]:
+    return decode(data)
+
+
+def _items(session_state: Any) -> Iterable[Tuple[str, Any]]:
+    # ADK's State merges committed values and pending deltas in to_dict()
+    if hasattr(session_state, "to_dict"):
+        return session_state.to_dict().items()
+    return session_state.items()
+
+
+def _lookup(result: Dict[str, Any], path: str) -> Any:
+    value: Any = result
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def init_workflow_state(session_state: Any):
+    """Seed defaults for fields a session has not written yet"""
+    for name in FIELDS:
+        if FIELD_PREFIX + name not in session_state:
+            session_state[FIELD_PREFIX + name] = None
+
+
+def read_workflow_state(session_state: Any, decode_lazy: bool = True) -> Dict[str, Any]:
+    """Reassemble the nested SupplyChainState view from the flat keys"""
+    workflow: Dict[str, Any] = {name: None for name in FIELDS}
+    trace = []
+    for key, value in _items(session_state):
+        if key.startswith(FIELD_PREFIX):
+            name = key[len(FIELD_PREFIX):]
+            field = FIELDS.get(name)
+            if field is not None and field.lazy and decode_lazy and isinstance(value, str):
+                value = decode(value)
+            workflow[name] = value
+        elif key.startswith(TRACE_PREFIX) and value is not None:
+            trace.append(value)
+    trace.sort(key=lambda entry: entry.get("seq", 0))
+    workflow["execution_trace"] = trace
+    return workflow
+
+
+class StateWriter:
+    """
+    Change-tracked, schema-checked view of one session's workflow state:
+    - Writes are limited to the tool's fields in TOOL_WRITES and type-checked
+    - Only fields whose value actually changed are recorded
+    - Large, rarely read sub-objects are stored encoded and decoded on first read
+    - Execution trace lives in a fixed ring of slots, one write per entry
+    - commit() writes the changed keys once and returns them as JSON-Patch ops
+    """
+
+    def __init__(self, session_state: Any, tool: Optional[str] = None, trace_slots: int = 50):
+        self._session_state = session_state
+        self.tool = tool
+        self.trace_slots = trace_slots
+        self._changes: Dict[str, Any] = {}
+        self._decoded: Dict[str, Any] = {}
+
+    def get(self, name: str, default: Any = None) -> Any:
+        key = FIELD_PREFIX + name
+        if name in self._decoded:
+            return self._decoded[name]
+        value = self._changes.get(key, self._session_state.get(key, _MISSING))
+        if value is _MISSING or value is None:
+            return default
+        field = FIELDS.get(name)
+        if field is not None and field.lazy and isinstance(value, str):
+            value = self._decoded[name] = decode(value)
+        return value
+
+    def __setitem__(self, name: str, value: Any):
+        field = FIELDS.get(name)
+        if field is None:
+            raise KeyError(f"Unknown workflow field: {name}")
+        if self.tool is not None and name not in TOOL_WRITES.get(self.tool, {}):
+            raise ValueError(f"{self.tool} may not write workflow field {name}")
+        if value is not None and not isinstance(value, field.types):
+            raise TypeError(
+                f"Workflow field {name} expects {field.types}, got {type(value).__name__}"
+            )
+
+        key = FIELD_PREFIX + name
+        if field.lazy and value is not None:
+            self._decoded[name] = value
+            value = encode(value)
+        else:
+            self._decoded.pop(name, None)
+        current = self._changes.get(key, self._session_state.get(key, _MISSING))
+        if current is _MISSING or current != value:
+            self._changes[key] = value
+
+    def update(self, values: Dict[str, Any]):
+        for name, value in values.items():
+            self[name] = value
+
+    def write_result(self, result: Dict[str, Any], source_tool: Optional[str] = None):
+        """Copy the fields this tool owns out of its result (or a sub-tool's)"""
+        for name, path in TOOL_WRITES.get(source_tool or self.tool, {}).items():
+            if path is None:
+                continue
+            value = _lookup(result, path)
+            if value is not _MISSING:
+                self[name] = value
+
+    def append_trace(self, entry: Dict[str, Any]):
+        seq = self._changes.get(TRACE_HEAD, self._session_state.get(TRACE_HEAD, 0))
+        self._changes[f"{TRACE_PREFIX}{seq % self.trace_slots}"] = {**entry, "seq": seq}
+        self._changes[TRACE_HEAD] = seq + 1
+
+    def commit(self) -> List[Dict[str, Any]]:
+        """Write pending changes to the session; returns the patch that was applied"""
+        patch = []
+        for key, value in self._changes.items():
+            op = "replace" if key in self._session_state else "add"
+            self._session_state[key] = value
+            patch.append({"op": op, "path": f"/{key}", "value": value})
+        self._changes = {}
+        return patch
@@ -0,0 +1,196 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from src.utils.file_lock import file_lock
+
+
+def summarize_payload(payload: Any, inline_bytes: int = 256) -> Any:
+    """Small payloads pass through; large ones become a hash and shape summary"""
+    encoded = json.dumps(payload, separators=(",", ":"), default=str, sort_keys=True)
+    if len(encoded) <= inline_bytes:
+        return payload
+
+    summary = {
+        "sha256": hashlib.sha256(encoded.encode()).hexdigest()[:16],
+        "bytes": len(encoded),
+    }
+    if isinstance(payload, dict):
+        summary["keys"] = list(payload)[:12]
+        if "status" in payload:
+            summary["status"] = payload["status"]
+    elif isinstance(payload, list):
+        summary["items"] = len(payload)
+    return summary
+
+
+class TraceSpill:
+    """
+    Full tool payloads, kept out of session state:
+    - Appended to a local JSONL file, written by a background thread
+    - Looked up by trace id through an offset index, kept in a sidecar
+      file and loaded incrementally; an id that isn't indexed is not found
+      (no scan of the payload file)
+    - Rotates once, keeping the current and previous file
+    - Safe to share between worker processes: appends and rotation happen
+      under a lock file, every process reads the index lines the others
+      wrote, and offsets are pinned to the payload file's inode (so a
+      rotation by another process can't misdirect a read)
+    """
+
+    def __init__(self, path: Union[str, Path], max_bytes: int = 64 * 1024 * 1024):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.previous_path = self.path.with_suffix(self.path.suffix + ".1")
+        self.index_path = self.path.with_suffix(self.path.suffix + ".idx")
+        self.previous_index_path = self.path.with_suffix(self.path.suffix + ".idx.1")
+        self.lock_path = self.path.with_suffix(self.path.suffix + ".lock")
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._pending: Dict[str, bytes] = {}
+        self._offsets: Dict[str, tuple] = {}  # trace_id -> (inode, offset, length)
+        self._inode: Optional[int] = None  # payload file of the last index line loaded
+        self._index_inode: Optional[int] = None  # index file being read
+        self._index_read = 0  # bytes of it loaded
+        with self._lock:
+            self._refresh_index()
+
+        self._writer = threading.Thread(target=self._run, name="trace-spill-writer", daemon=True)
+        self._writer.start()
+
+    def append(self, entry: Dict[str, Any]) -> Tuple[str, int]:
+        """Queue an entry; returns its trace id and encoded size in bytes"""
+        trace_id = entry.setdefault("trace_id", f"TRC-{uuid.uuid4().hex[:16]}")
+        line = json.dumps(entry, separators=(",", ":"), default=str).encode() + b"\n"
+        with self._cond:
+            self._pending[trace_id] = line
+            self._cond.notify()
+        return trace_id, len(line)
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            line = self._pending.get(trace_id)
+            location = self._offsets.get(trace_id)
+            if line is None and location is None:
+                # Maybe written by another process since the last refresh
+                self._refresh_index()
+                location = self._offsets.get(trace_id)
+        if line is not None:
+            return json.loads(line)
+        if location is None:
+            return None
+        inode, offset, length = location
+        for path in (self.path, self.previous_path):
+            try:
+                with open(path, "rb") as f:
+                    if os.fstat(f.fileno()).st_ino != inode:
+                        continue
+                    f.seek(offset)
+                    data = f.read(length)
+            except FileNotFoundError:
+                continue
+            # A deleted file's inode can be reused by a newer one
+            if f'"trace_id":"{trace_id}"'.encode() in data:
+                return json.loads(data)
+        return None
+
+    def _refresh_index(self):
+        """
+        Load index lines appended since the last call, by this process or
+        another. Callers hold self._lock.
+        """
+        try:
+            f = open(self.index_path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            inode = os.fstat(f.fileno()).st_ino
+            if inode != self._index_inode:
+                # New, or rotated since the last refresh: entries older than
+                # the previous file are gone
+                self._load_previous_index()
+                self._offsets = {
+                    trace_id: location
+                    for trace_id, location in self._offsets.items()
+                    if location[0] == self._inode
+                }
+                self._index_inode, self._index_read = inode, 0
+            self._load_index_lines(f)
+
+    def _load_previous_index(self):
+        """Finish the index read so far if it is now the previous one, else read the previous whole"""
+        try:
+            with open(self.previous_index_path, "rb") as f:
+                if os.fstat(f.fileno()).st_ino != self._index_inode:
+                    self._index_read = 0
+                self._load_index_lines(f)
+        except FileNotFoundError:
+            return
+
+    def _load_index_lines(self, f):
+        f.seek(self._index_read)
+        data = f.read()
+        complete = data[:data.rfind(b"\n") + 1]  # a line being written is left for later
+        for line in complete.splitlines():
+            trace_id, inode, offset, length = json.loads(line)
+            self._offsets[trace_id] = (inode, offset, length)
+            self._inode = inode
+        self._index_read += len(complete)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                batch = list(self._pending.items())
+
+            with file_lock(self.lock_path):
+                if self.path.exists() and self.path.stat().st_size > self.max_bytes:
+                    os.replace(self.path, self.previous_path)
+                    if self.index_path.exists():
+                        os.replace(self.index_path, self.previous_index_path)
+                with open(self.path, "ab") as f:
+                    inode = os.fstat(f.fileno()).st_ino
+                    offset = f.seek(0, os.SEEK_END)
+                    index = []
+                    for trace_id, line in batch:
+                        index.append(json.dumps([trace_id, inode, offset, len(line)]) + "\n")
+                        offset += len(line)
+                    f.write(b"".join(line for _, line in batch))
+                    f.flush()
+
+                # Indexed and no longer pending in one step, so get() finds
+                # each entry in one place or the other
+                with self._lock:
+                    with open(self.index_path, "a") as f:
+                        f.write("".join(index))
+                    self._refresh_index()
+                    for trace_id, _ in batch:
+                        self._pending.pop(trace_id, None)
+
+
+def compact_entry(
+    agent: str,
+    tool: str,
+    timestamp: str,
+    duration_ms: float,
+    input_data: Any,
+    output: Any,
+    trace_id: str
+) -> Dict[str, Any]:
+    return {
+        "trace_id": trace_id,
+        "timestamp": timestamp,
+        "agent": agent,
+        "tool": tool,
+        "duration_ms": round(duration_ms, 2),
+        "input": summarize_payload(input_data),
+        "output": summarize_payload(output),
+    }
+
@@ -0,0 +1,335 @@
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from src.utils.file_lock import file_lock
+from src.utils.log import bind
+
+
+# OTLP SpanKind values
+_KIND_INTERNAL = 1
+_KIND_CLIENT = 3
+
+
+class Span:
+    __slots__ = (
+        "trace_id", "span_id", "parent_id", "name", "kind",
+        "start_ns", "end_ns", "_t0", "attributes", "error",
+    )
+
+    def __init__(self, trace_id: str, parent_id: Optional[str], name: str, kind: str, attributes: Dict):
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind  # agent | llm | tool
+        self.start_ns = time.time_ns()
+        self._t0 = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.error: Optional[str] = None
+
+    def end(self, error: Optional[str] = None):
+        # Wall-clock start, monotonic duration
+        self.end_ns = self.start_ns + (time.perf_counter_ns() - self._t0)
+        self.error = error
+
+    def to_otlp(self) -> Dict[str, Any]:
+        attributes = [{"key": "span.kind", "value": {"stringValue": self.kind}}]
+        for key, value in self.attributes.items():
+            if isinstance(value, bool):
+                attributes.append({"key": key, "value": {"boolValue": value}})
+            elif isinstance(value, int):
+                attributes.append({"key": key, "value": {"intValue": str(value)}})
+            elif isinstance(value, float):
+                attributes.append({"key": key, "value": {"doubleValue": value}})
+            else:
+                attributes.append({"key": key, "value": {"stringValue": str(value)}})
+        span = {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": _KIND_CLIENT if self.kind == "llm" else _KIND_INTERNAL,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": attributes,
+            "status": {"code": 2, "message": self.error} if self.error else {"code": 1},
+        }
+        if self.parent_id:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+class _Invocation:
+    __slots__ = ("trace_id", "spans", "agent_stack", "open_llm", "open_tools")
+
+    def __init__(self):
+        self.trace_id = uuid.uuid4().hex
+        self.spans: List[Span] = []
+        self.agent_stack: List[Span] = []
+        self.open_llm: Dict[str, Span] = {}  # agent name -> in-flight model call
+        self.open_tools: Dict[str, Span] = {}  # function call id -> in-flight tool call
+
+
+class SpanTracer:
+    """
+    Hierarchical spans for one chat turn, driven by ADK callbacks:
+    - One span per agent run (including transfers), model call and tool call
+    - Parent ids follow the agent stack of each invocation
+    - Finished traces kept in an in-process collector for waterfall views
+      (per worker: /spans shows the turns this process ran)
+    - Exported as OTLP/JSON lines to a local file on a background thread;
+      the file may be shared by several workers
+    """
+
+    def __init__(
+        self,
+        export_path: Union[str, Path, None] = None,
+        service_name: str = "supply-chain-backend",
+        max_traces: int = 200,
+        max_active: int = 1000
+    ):
+        self.service_name = service_name
+        self.max_traces = max_traces
+        self.max_active = max_active
+        self._active: "OrderedDict[str, _Invocation]" = OrderedDict()
+        self._finished: "OrderedDict[str, List[Span]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.export_path = Path(export_path) if export_path else None
+        self._export_lock = Path(f"{self.export_path}.lock") if self.export_path else None
+        self._queue: queue.Queue = queue.Queue()
+        if self.export_path:
+            self.export_path.parent.mkdir(parents=True, exist_ok=True)
+            threading.Thread(target=self._run, name="span-exporter", daemon=True).start()
+
+    # ADK callbacks
+
+    def before_agent(self, callback_context):
+        _bind_log_ids(callback_context)
+        invocation = self._invocation(callback_context.invocation_id)
+        self._start(
+            invocation, "agent", f"agent {callback_context.agent_name}",
+            {"agent.name": callback_context.agent_name},
+        )
+        invocation.agent_stack.append(invocation.spans[-1])
+
+    def after_agent(self, callback_context):
+        invocation = self._active.get(callback_context.invocation_id)
+        if invocation is None or not invocation.agent_stack:
+            return
+        span = invocation.agent_stack.pop()
+        # Anything the agent left open (raised tools, aborted streams) ends with it
+        for key, child in list(invocation.open_tools.items()):
+            if child.parent_id == span.span_id:
+                child.end(error="unfinished")
+                del invocation.open_tools[key]
+        llm = invocation.open_llm.pop(callback_context.agent_name, None)
+        if llm is not None:
+            llm.end(error="unfinished")
+        span.end()
+        if not invocation.agent_stack:
+            self._finish(callback_context.invocation_id)
+
+    def before_model(self, callback_context, llm_request):
+        invocation = self._invocation(callback_context.invocation_id)
+        invocation.open_llm[callback_context.agent_name] = self._start(
+            invocation, "llm", f"llm {getattr(llm_request, 'model', None) or 'model'}",
+            {"agent.name": callback_context.agent_name, "llm.model": str(getattr(llm_request, "model", ""))},
+        )
+
+    def after_model(self, callback_context, llm_response):
+        invocation = self._active.get(callback_context.invocation_id)
+        span = invocation.open_llm.get(callback_context.agent_name) if invocation else None
+        if span is None:
+            return
+        if getattr(llm_response, "partial", False):
+            # Streaming: called per chunk; the span ends on the final response
+            span.attributes.setdefault(
+                "llm.first_chunk_ms", round((time.perf_counter_ns() - span._t0) / 1e6, 2)
+            )
+            return
+        usage = getattr(llm_response, "usage_metadata", None)
+        if usage is not None:
+            span.attributes["llm.prompt_tokens"] = getattr(usage, "prompt_token_count", None) or 0
+            span.attributes["llm.completion_tokens"] = getattr(usage, "candidates_token_count", None) or 0
+        del invocation.open_llm[callback_context.agent_name]
+        span.end(error=getattr(llm_response, "error_code", None))
+
+    def before_tool(self, tool, args, tool_context):
+        # ADK runs each tool call in its own task: bind there so service logs carry the ids
+        _bind_log_ids(tool_context)
+        invocation = self._invocation(tool_context.invocation_id)
+        invocation.open_tools[self._call_key(tool, tool_context)] = self._start(
+            invocation, "tool", f"tool {tool.name}",
+            {"agent.name": tool_context.agent_name, "tool.name": tool.name},
+        )
+
+    def after_tool(self, tool, args, tool_context, tool_response):
+        invocation = self._active.get(tool_context.invocation_id)
+        span = invocation.open_tools.pop(self._call_key(tool, tool_context), None) if invocation else None
+        if span is None:
+            return
+        error = None
+        if isinstance(tool_response, dict) and tool_response.get("status") == "error":
+            error = str(tool_response.get("message", "error"))
+        span.end(error=error)
+
+    def callbacks(self) -> Dict[str, Any]:
+        """LlmAgent keyword arguments that wire this tracer in"""
+        return {
+            "before_agent_callback": self.before_agent,
+            "after_agent_callback": self.after_agent,
+            "before_model_callback": self.before_model,
+            "after_model_callback": self.after_model,
+            "before_tool_callback": self.before_tool,
+            "after_tool_callback": self.after_tool,
+        }
+
+    # Collector
+
+    def recent(self, limit: int = 20) -> List[Dict[str, Any]]:
+        with self._lock:
+            traces = list(self._finished.items())[-limit:]
+        return [self._summary(trace_id, spans) for trace_id, spans in reversed(traces)]
+
+    def waterfall(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        """Spans of one request ordered by start, with offsets and depth"""
+        with self._lock:
+            spans = self._finished.get(trace_id)
+        if spans is None:
+            return None
+
+        by_id = {s.span_id: s for s in spans}
+        origin = min(s.start_ns for s in spans)
+
+        def depth(span: Span) -> int:
+            level = 0
+            while span.parent_id in by_id:
+                span = by_id[span.parent_id]
+                level += 1
+            return level
+
+        rows = [
+            {
+                "span_id": s.span_id,
+                "parent_id": s.parent_id,
+                "name": s.name,
+                "kind": s.kind,
+                "depth": depth(s),
+                "offset_ms": round((s.start_ns - origin) / 1e6, 2),
+                "duration_ms": round(((s.end_ns or s.start_ns) - s.start_ns) / 1e6, 2),
+                "error": s.error,
+                "attributes": s.attributes,
+            }
+            for s in sorted(spans, key=lambda s: s.start_ns)
+        ]
+        return {**self._summary(trace_id, spans), "spans": rows}
+
+    # Internals
+
+    def _invocation(self, invocation_id: str) -> _Invocation:
+        invocation = self._active.get(invocation_id)
+        if invocation is None:
+            invocation = self._active[invocation_id] = _Invocation()
+            while len(self._active) > self.max_active:
+                stale_id = next(iter(self._active))
+                self._finish(stale_id)
+        return invocation
+
+    def _start(self, invocation: _Invocation, kind: str, name: str, attributes: Dict) -> Span:
+        parent = invocation.agent_stack[-1].span_id if invocation.agent_stack else None
+        span = Span(invocation.trace_id, parent, name, kind, attributes)
+        invocation.spans.append(span)
+        return span
+
+    @staticmethod
+    def _call_key(tool, tool_context) -> str:
+        return getattr(tool_context, "function_call_id", None) or f"{tool_context.agent_name}:{tool.name}"
+
+    def _finish(self, invocation_id: str):
+        invocation = self._active.pop(invocation_id, None)
+        if invocation is None:
+            return
+        for span in invocation.spans:
+            if span.end_ns is None:
+                span.end(error="unfinished")
+        with self._lock:
+            self._finished[invocation.trace_id] = invocation.spans
+            while len(self._finished) > self.max_traces:
+                self._finished.popitem(last=False)
+        if self.export_path:
+            self._queue.put(invocation.spans)
+
+    @staticmethod
+    def _summary(trace_id: str, spans: List[Span]) -> Dict[str, Any]:
+        start = min(s.start_ns for s in spans)
+        end = max(s.end_ns or s.start_ns for s in spans)
+        root = next((s for s in spans if s.parent_id is None), spans[0])
+        return {
+            "trace_id": trace_id,
+            "root": root.name,
+            "started_at": start,
+            "duration_ms": round((end - start) / 1e6, 2),
+            # Union of intervals, so overlapping calls are not double counted
+            "model_ms": round(_covered_ns(s for s in spans if s.kind == "llm") / 1e6, 2),
+            "tool_ms": round(_covered_ns(s for s in spans if s.kind == "tool") / 1e6, 2),
+            "llm_calls": sum(1 for s in spans if s.kind == "llm"),
+            "tool_calls": sum(1 for s in spans if s.kind == "tool"),
+            "errors": sum(1 for s in spans if s.error),
+        }
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            lines = "".join(
+                json.dumps(self._otlp(spans), separators=(",", ":")) + "\n" for spans in batch
+            )
+            # Workers share the export file: one locked write per batch keeps lines whole
+            with file_lock(self._export_lock), open(self.export_path, "a") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _otlp(self, spans: List[Span]) -> Dict[str, Any]:
+        return {
+            "resourceSpans": [{
+                "resource": {
+                    "attributes": [{"key": "service.name", "value": {"stringValue": self.service_name}}]
+                },
+                "scopeSpans": [{
+                    "scope": {"name": "src.utils.tracing"},
+                    "spans": [s.to_otlp() for s in spans],
+                }],
+            }]
+        }
+
+
+def _bind_log_ids(context):
+    bind(session_id=context.session.id, invocation_id=context.invocation_id)
+
+
+def _covered_ns(spans) -> int:
+    intervals: List[Tuple[int, int]] = sorted(
+        (s.start_ns, s.end_ns or s.start_ns) for s in spans
+    )
+    covered = 0
+    current_start = current_end = None
+    for start, end in intervals:
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                covered += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        covered += current_end - current_start
+    return covered
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+# Offline defaults, set before src.core.config is imported
+os.environ.setdefault("PROVIDER", "stub")
+os.environ.setdefault("OPENAI_API_KEY", "offline")
+os.environ.setdefault("GOOGLE_API_KEY", "offline")
+
+# Services built from settings write their files here, not under data/
+_data = tempfile.mkdtemp(prefix="supply-chain-tests-")
+os.environ.setdefault("AUDIT_LOG_DIR", os.path.join(_data, "audit"))
+os.environ.setdefault("TRACE_SPILL_PATH", os.path.join(_data, "traces", "payloads.jsonl"))
+os.environ.setdefault("SPAN_EXPORT_PATH", os.path.join(_data, "traces", "spans.otlp.jsonl"))
+os.environ.setdefault("SESSION_DB_PATH", os.path.join(_data, "sessions", "sessions.sqlite3"))
+os.environ.setdefault("SHARED_STOCK_PATH", os.path.join(_data, "shared", "stock.mmap"))
@@ -0,0 +1,71 @@
+import asyncio
+
+from src.tools.alert import AlertAgent
+from src.tools.notifications import NotificationDispatcher, StubSMTPSink, StubWebhookSink
+from src.tools.suppression import AlertSuppressor
+from src.utils.audit_log import AuditLog
+
+
+def _agent(tmp_path, window_seconds: float = 900) -> AlertAgent:
+    return AlertAgent(
+        dispatcher=NotificationDispatcher(
+            sinks={"slack": StubWebhookSink(), "email": StubSMTPSink()},
+            rate_limits={"slack": 1000.0, "email": 1000.0},
+        ),
+        suppressor=AlertSuppressor(window_seconds=window_seconds),
+        audit_log=AuditLog(tmp_path / "audit"),
+    )
+
+
+def _summary(description: str, event_type=None, region: str = "Mumbai") -> dict:
+    return {"event": {
+        "type": event_type, "description": description, "region": region, "product_sku": "RC-FULL-NVY-M",
+    }}
+
+
+def test_same_event_type_is_suppressed_whatever_the_wording(tmp_path):
+    agent = _agent(tmp_path)
+
+    async def run():
+        first = await agent.send_alerts(_summary("Cyclone in Mumbai", "cyclone"), severity="high")
+        second = await agent.send_alerts(_summary("Cyclone approaching Mumbai", "cyclone"), severity="high")
+        other_region = await agent.send_alerts(_summary("Cyclone in Chennai", "cyclone", "Chennai"), severity="high")
+        await agent.dispatcher.close()
+        return first, second, other_region
+
+    first, second, other_region = asyncio.run(run())
+
+    assert first["status"] == "success"
+    assert second["status"] == "suppressed"
+    assert second["alert_id"] == first["alert_id"]
+    assert other_region["status"] == "success"
+
+
+def test_description_keys_alerts_without_event_type(tmp_path):
+    agent = _agent(tmp_path)
+
+    async def run():
+        results = [
+            await agent.send_alerts(_summary(description), severity="high")
+            for description in ("Cyclone in Mumbai", "cyclone  in mumbai", "Cyclone approaching Mumbai")
+        ]
+        await agent.dispatcher.close()
+        return [r["status"] for r in results]
+
+    assert asyncio.run(run()) == ["success", "suppressed", "success"]
+
+
+def test_digest_sent_when_window_closes(tmp_path):
+    agent = _agent(tmp_path, window_seconds=0.1)
+
+    async def run():
+        for description in ("Cyclone in Mumbai", "Cyclone approaching Mumbai", "Mumbai cyclone"):
+            await agent.send_alerts(_summary(description, "cyclone"), severity="high")
+        await asyncio.sleep(0.2)
+        await agent.dispatcher.close()
+
+    asyncio.run(run())
+
+    texts = [r["payload"]["text"] for r in agent.dispatcher.sinks["slack"].received]
+    assert agent.suppressor.stats["digests"] == 1
+    assert any("Duplicate alerts suppressed: 2 (2 high)" in text for text in texts)
@@ -0,0 +1,56 @@
+import threading
+
+from src.utils.audit_log import AuditLog
+
+
+def _record(n: int) -> dict:
+    return {"n": n, "region": "Mumbai" if n % 2 else "Delhi", "severity": "high"}
+
+
+def test_query_filters_across_disk_and_pending(tmp_path):
+    log = AuditLog(tmp_path, block_records=4, flush_interval=60)
+    for n in range(10):
+        log.append(_record(n))
+    log.flush()
+    for n in range(10, 13):
+        log.append(_record(n))  # still pending
+
+    assert [r["n"] for r in log.query()] == list(range(13))
+    assert [r["n"] for r in log.query(region="Mumbai", limit=3)] == [1, 3, 5]
+    log.close()
+
+
+def test_records_are_returned_once_while_blocks_are_written(tmp_path):
+    log = AuditLog(tmp_path, block_records=1, flush_interval=0.001)
+    stop = threading.Event()
+    duplicates = []
+
+    def query_loop():
+        while not stop.is_set():
+            ids = [r["audit_id"] for r in log.query()]
+            if len(ids) != len(set(ids)):
+                duplicates.append(len(ids) - len(set(ids)))
+
+    reader = threading.Thread(target=query_loop)
+    reader.start()
+    for n in range(300):
+        log.append(_record(n))
+    log.flush()
+    stop.set()
+    reader.join()
+
+    assert not duplicates
+    assert [r["n"] for r in log.query()] == list(range(300))
+    log.close()
+
+
+def test_reopened_log_reads_earlier_segments(tmp_path):
+    log = AuditLog(tmp_path, max_segment_bytes=200, block_records=2)
+    for n in range(20):
+        log.append(_record(n))
+    log.close()
+
+    reopened = AuditLog(tmp_path)
+    assert len(list(tmp_path.glob("audit-*.jsonl.gz"))) > 1
+    assert [r["n"] for r in reopened.query(severity="high")] == list(range(20))
+    reopened.close()
@@ -0,0 +1,47 @@
+from src.tools.consolidation import TripConsolidator
+
+_KM = {
+    frozenset(("Delhi", "Mumbai")): 1400,
+    frozenset(("Bangalore", "Mumbai")): 980,
+    frozenset(("Chennai", "Mumbai")): 1300,
+    frozenset(("Bangalore", "Chennai")): 350,
+    frozenset(("Delhi", "Bangalore")): 2100,
+    frozenset(("Delhi", "Chennai")): 2200,
+}
+
+
+def _distance(a: str, b: str):
+    return _KM.get(frozenset((a, b)))
+
+
+def _shipment(origin: str, quantity: int, destination: str = "Mumbai") -> dict:
+    return {"origin": origin, "destination": destination, "quantity": quantity}
+
+
+def test_nearby_pickups_share_a_truck():
+    plan = TripConsolidator(_distance, vehicle_capacity=1000).consolidate([
+        _shipment("Bangalore", 300), _shipment("Chennai", 400), _shipment("Delhi", 200),
+    ])
+
+    stops = sorted(tuple(trip["stops"]) for trip in plan["trips"])
+    assert stops == [("Chennai", "Bangalore"), ("Delhi",)]
+    assert plan["consolidated_cost"] < plan["naive_cost"]
+
+
+def test_oversized_shipment_is_split_into_truckloads():
+    plan = TripConsolidator(_distance, vehicle_capacity=1000).consolidate([_shipment("Delhi", 2500)])
+
+    assert [trip["quantity"] for trip in plan["trips"]] == [1000, 1000, 500]
+    assert [(s["part"], s["parts"]) for trip in plan["trips"] for s in trip["shipments"]] == [(1, 3), (2, 3), (3, 3)]
+    assert plan["naive_trips"] == 3
+
+
+def test_no_trip_exceeds_capacity():
+    shipments = [
+        _shipment("Bangalore", 1700), _shipment("Chennai", 650), _shipment("Delhi", 999),
+        _shipment("Chennai", 350), _shipment("Bangalore", 2000),
+    ]
+    plan = TripConsolidator(_distance, vehicle_capacity=1000).consolidate(shipments, time_budget_ms=20)
+
+    assert all(trip["quantity"] <= 1000 for trip in plan["trips"])
+    assert sum(trip["quantity"] for trip in plan["trips"]) == sum(s["quantity"] for s in shipments)
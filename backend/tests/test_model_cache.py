@@ -0,0 +1,132 @@
+import asyncio
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from src.models import CachedLlm, ResponseCache, StubLlm
+
+
+def _request(text: str) -> LlmRequest:
+    return LlmRequest(
+        model="stub",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(system_instruction="You forecast demand."),
+    )
+
+
+def _collect(llm, request: LlmRequest):
+    async def run():
+        return [r async for r in llm.generate_content_async(request)]
+    return asyncio.run(run())
+
+
+def _text(responses) -> str:
+    return "".join(p.text or "" for r in responses for p in r.content.parts)
+
+
+def _cached(cache: ResponseCache = None, **stub_args):
+    stub = StubLlm(**stub_args)
+    return stub, CachedLlm(model=stub.model, inner=stub, cache=cache or ResponseCache())
+
+
+def test_stub_echoes_last_input_and_counts_calls():
+    stub = StubLlm()
+    responses = _collect(stub, _request("Cyclone in Mumbai"))
+
+    assert _text(responses) == "stub: Cyclone in Mumbai"
+    assert responses[-1].turn_complete and not responses[-1].partial
+    assert stub.calls == 1
+
+
+def test_identical_requests_hit_the_cache():
+    stub, llm = _cached()
+
+    first = _collect(llm, _request("Cyclone in Mumbai"))
+    second = _collect(llm, _request("  Cyclone   in Mumbai "))  # whitespace is normalized
+
+    assert _text(second) == _text(first)
+    assert stub.calls == 1
+    assert llm.cache.stats["hits"] == 1
+
+
+def test_changed_prompt_or_params_miss():
+    cache = ResponseCache()
+    stub, llm = _cached(cache)
+    tuned = CachedLlm(model=stub.model, inner=stub, cache=cache, params={"temperature": 0.9})
+
+    _collect(llm, _request("Cyclone in Mumbai"))
+    _collect(llm, _request("Cyclone in Chennai"))
+    _collect(tuned, _request("Cyclone in Mumbai"))
+
+    assert stub.calls == 3
+    assert cache.stats["misses"] == 3
+
+
+def test_replayed_tool_calls_get_fresh_ids():
+    def tool_call(llm_request):
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(
+            function_call=types.FunctionCall(id="adk-1", name="forecast_demand", args={"region": "Mumbai"})
+        )]))
+
+    stub, llm = _cached(responder=tool_call)
+    _collect(llm, _request("Cyclone in Mumbai"))
+    replay = _collect(llm, _request("Cyclone in Mumbai"))
+
+    call = replay[0].content.parts[0].function_call
+    assert stub.calls == 1
+    assert (call.name, call.args, call.id) == ("forecast_demand", {"region": "Mumbai"}, None)
+
+
+def test_errors_are_not_cached():
+    def failing(llm_request):
+        return LlmResponse(error_code="RESOURCE_EXHAUSTED", error_message="quota")
+
+    stub, llm = _cached(responder=failing)
+    _collect(llm, _request("Cyclone in Mumbai"))
+    _collect(llm, _request("Cyclone in Mumbai"))
+
+    assert stub.calls == 2
+    assert llm.cache.stats["stores"] == 0
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.models.cache.time.time", lambda: now[0])
+    stub, llm = _cached(ResponseCache(ttl_seconds=60))
+
+    _collect(llm, _request("Cyclone in Mumbai"))
+    now[0] += 59
+    _collect(llm, _request("Cyclone in Mumbai"))
+    now[0] += 2
+    _collect(llm, _request("Cyclone in Mumbai"))
+
+    assert stub.calls == 2
+
+
+def test_least_recently_used_entry_is_evicted():
+    stub, llm = _cached(ResponseCache(max_entries=2))
+
+    for text in ("a", "b", "a", "c", "a", "b"):
+        _collect(llm, _request(text))
+
+    # "b" was evicted by "c"; "a" stayed warm
+    assert stub.calls == 4
+
+
+def test_disk_tier_survives_a_new_cache(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.models.cache.time.time", lambda: now[0])
+    stub, llm = _cached(ResponseCache(directory=tmp_path))
+    _collect(llm, _request("Cyclone in Mumbai"))
+
+    restarted = ResponseCache(directory=tmp_path, ttl_seconds=60)
+    stub, llm = _cached(restarted)
+    assert _text(_collect(llm, _request("Cyclone in Mumbai"))) == "stub: Cyclone in Mumbai"
+    assert stub.calls == 0
+    assert restarted.stats["disk_hits"] == 1
+
+    now[0] += 61
+    stub, llm = _cached(ResponseCache(directory=tmp_path, ttl_seconds=60))
+    _collect(llm, _request("Cyclone in Mumbai"))
+    assert stub.calls == 1
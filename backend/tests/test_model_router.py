@@ -0,0 +1,151 @@
+import asyncio
+import time
+
+import pytest
+
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from src.models import CachedLlm, PacedLlm, ResponseCache, RoutedLlm, StubLlm, estimate_prompt_tokens
+from src.utils.rate_limit import TokenBucket
+
+_REQUIRED = ["product_sku", "region"]
+
+
+def _declaration(name: str) -> types.FunctionDeclaration:
+    return types.FunctionDeclaration(
+        name=name,
+        parameters=types.Schema(
+            type="OBJECT",
+            properties={arg: types.Schema(type="STRING") for arg in _REQUIRED},
+            required=_REQUIRED,
+        ),
+    )
+
+
+def _request(text: str = "Cyclone in Mumbai", tools=("forecast_demand",)) -> LlmRequest:
+    return LlmRequest(
+        model="routed",
+        contents=[types.Content(role="user", parts=[types.Part(text=text)])],
+        config=types.GenerateContentConfig(
+            tools=[types.Tool(function_declarations=[_declaration(name) for name in tools])]
+        ),
+    )
+
+
+def _tool_call(**args):
+    def responder(llm_request):
+        return LlmResponse(content=types.Content(role="model", parts=[
+            types.Part(function_call=types.FunctionCall(name="forecast_demand", args=args))
+        ]))
+    return responder
+
+
+def _router(agent_name: str = "DemandAgent", fast=None, strong=None, **kwargs) -> RoutedLlm:
+    return RoutedLlm(
+        model=f"routed:{agent_name}",
+        agent_name=agent_name,
+        models={"fast": fast or StubLlm(model="stub-fast"), "strong": strong or StubLlm(model="stub-strong")},
+        strong_agents=["SupplyChainOrchestrator"],
+        **kwargs,
+    )
+
+
+def _collect(llm, request: LlmRequest):
+    async def run():
+        return [r async for r in llm.generate_content_async(request)]
+    return asyncio.run(run())
+
+
+def test_tier_selection_policies():
+    router = _router(long_prompt_tokens=200)
+
+    assert router.choose(_request()) == ("fast", "deterministic_tools_policy")
+    assert router.choose(_request(tools=("forecast_demand", "optimize_inventory"))) == ("fast", "default")
+    assert router.choose(_request("x" * 2000)) == ("strong", "long_prompt_policy")
+    assert _router("SupplyChainOrchestrator").choose(_request()) == ("strong", "strong_agents_policy")
+    assert _router(default_tier="strong").choose(
+        _request(tools=("forecast_demand", "optimize_inventory"))
+    ) == ("strong", "default")
+
+
+def test_chosen_tier_answers():
+    fast, strong = StubLlm(model="stub-fast"), StubLlm(model="stub-strong")
+
+    _collect(_router(fast=fast, strong=strong), _request())
+    _collect(_router("SupplyChainOrchestrator", fast=fast, strong=strong), _request())
+
+    assert (fast.calls, strong.calls) == (1, 1)
+
+
+def test_invalid_tool_call_falls_back_to_stronger_tier():
+    fast = StubLlm(model="stub-fast", responder=_tool_call(product_sku="RC-FULL-NVY-M"))
+    strong = StubLlm(model="stub-strong", responder=_tool_call(product_sku="RC-FULL-NVY-M", region="Mumbai"))
+
+    responses = _collect(_router(fast=fast, strong=strong), _request())
+
+    # Only the valid answer reaches the caller
+    assert len(responses) == 1
+    assert responses[0].content.parts[0].function_call.args == {"product_sku": "RC-FULL-NVY-M", "region": "Mumbai"}
+    assert (fast.calls, strong.calls) == (1, 1)
+
+
+def test_strongest_tier_answer_is_returned_even_if_invalid():
+    unknown = StubLlm(model="stub-strong", responder=lambda r: LlmResponse(content=types.Content(
+        role="model", parts=[types.Part(function_call=types.FunctionCall(name="launch_rocket", args={}))]
+    )))
+
+    responses = _collect(_router("SupplyChainOrchestrator", strong=unknown), _request())
+
+    assert responses[0].content.parts[0].function_call.name == "launch_rocket"
+
+
+def test_pacing_spaces_calls_by_the_request_bucket():
+    stub = StubLlm()
+    paced = PacedLlm(model=stub.model, inner=stub, requests=TokenBucket(rate=20, capacity=1))
+
+    async def run():
+        started = time.monotonic()
+        await asyncio.gather(*(_drain(paced, _request()) for _ in range(5)))
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+
+    # One call at once, then four more at 20/s
+    assert stub.calls == 5
+    assert elapsed >= 0.18
+
+
+def test_pacing_charges_estimated_prompt_tokens():
+    stub = StubLlm()
+    request = _request("x" * 4000)
+    tokens = TokenBucket(rate=1, capacity=estimate_prompt_tokens(request) * 10)
+    paced = PacedLlm(model=stub.model, inner=stub, tokens=tokens)
+
+    _collect(paced, request)
+
+    assert tokens.capacity - tokens.tokens == pytest.approx(estimate_prompt_tokens(request), abs=1)
+
+
+def test_cache_in_front_of_routed_paced_tiers():
+    # The stack model_for() builds: cache -> router -> paced tier models
+    fast, strong = StubLlm(model="stub-fast"), StubLlm(model="stub-strong")
+    requests = TokenBucket(rate=1000, capacity=10)
+    router = _router(
+        fast=PacedLlm(model=fast.model, inner=fast, requests=requests),
+        strong=PacedLlm(model=strong.model, inner=strong, requests=requests),
+    )
+    llm = CachedLlm(model=router.model, inner=router, cache=ResponseCache())
+
+    first = _collect(llm, _request())
+    second = _collect(llm, _request())
+
+    assert [r.content for r in second] == [r.content for r in first]
+    assert (fast.calls, strong.calls) == (1, 0)
+    assert requests.tokens <= 9.01  # the replay took no pacing unit
+
+
+async def _drain(llm, request: LlmRequest):
+    async for _ in llm.generate_content_async(request):
+        pass
@@ -0,0 +1,159 @@
+import asyncio
+import time
+
+from src.tools.notifications import NotificationDispatcher, StubSMTPSink, StubWebhookSink
+
+
+class FlakySink:
+    """Fails the first `failures` deliveries, then records the rest"""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.attempts = 0
+        self.received = []
+
+    async def deliver(self, delivery):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("sink unavailable")
+        self.received.append(delivery)
+
+
+def _dispatcher(sink, **kwargs) -> NotificationDispatcher:
+    kwargs.setdefault("rate_limits", {"slack": 1000.0})
+    kwargs.setdefault("backoff_base", 0.001)
+    return NotificationDispatcher(sinks={"slack": sink}, **kwargs)
+
+
+def test_batch_coalesces_per_recipient():
+    sink = StubWebhookSink()
+    dispatcher = _dispatcher(sink)
+
+    async def run():
+        dispatcher.enqueue("slack", ["#ops", "#mgmt"], "Cyclone in Mumbai", "high")
+        dispatcher.enqueue("slack", ["#ops", "#mgmt"], "Cyclone in Mumbai", "high")
+        dispatcher.enqueue("slack", ["#ops"], "Reorder placed", "critical")
+        await dispatcher.close()
+
+    asyncio.run(run())
+
+    by_channel = {r["payload"]["channel"]: r["payload"]["text"] for r in sink.received}
+    assert by_channel == {
+        "#ops": "Cyclone in Mumbai\n\nReorder placed",
+        "#mgmt": "Cyclone in Mumbai",
+    }
+    assert dispatcher.stats["deliveries"] == 2
+    assert dispatcher.stats["delivered_notifications"] == 5
+    assert dispatcher.stats["coalesced"] == 2
+
+
+def test_batch_size_splits_deliveries():
+    sink = FlakySink(failures=0)
+    dispatcher = _dispatcher(sink, batch_size=2)
+
+    async def run():
+        for i in range(3):
+            dispatcher.enqueue("slack", ["#ops"], f"update {i}", "info")
+        await dispatcher.close()
+
+    asyncio.run(run())
+
+    assert [d["messages"] for d in sink.received] == [["update 0", "update 1"], ["update 2"]]
+
+
+def test_escalates_to_highest_severity():
+    sink = StubSMTPSink()
+    dispatcher = NotificationDispatcher(sinks={"email": sink}, rate_limits={"email": 1000.0})
+
+    async def run():
+        dispatcher.enqueue("email", ["ops@styleflow.in"], "Stock low", "high")
+        dispatcher.enqueue("email", ["ops@styleflow.in"], "Vendor delayed", "critical")
+        await dispatcher.close()
+
+    asyncio.run(run())
+
+    assert len(sink.outbox) == 1
+    assert sink.outbox[0]["Subject"] == "[CRITICAL] Supply chain alert (2 updates)"
+
+
+def test_rate_limit_paces_deliveries():
+    sink = FlakySink(failures=0)
+    dispatcher = _dispatcher(sink, rate_limits={"slack": 20.0})
+
+    async def run():
+        dispatcher.enqueue("slack", [f"#team-{i}" for i in range(5)], "Cyclone in Mumbai", "high")
+        started = time.monotonic()
+        await dispatcher.close()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(run())
+
+    # Burst of 1, then 4 more at 20/s
+    assert len(sink.received) == 5
+    assert elapsed >= 0.18
+
+
+def test_retries_with_backoff_then_delivers():
+    sink = FlakySink(failures=2)
+    dispatcher = _dispatcher(sink, max_retries=3)
+
+    async def run():
+        dispatcher.enqueue("slack", ["#ops"], "Cyclone in Mumbai", "high")
+        await dispatcher.close()
+
+    asyncio.run(run())
+
+    assert sink.attempts == 3
+    assert len(sink.received) == 1
+    assert dispatcher.stats["retries"] == 2
+    assert not dispatcher.dead_letters
+
+
+def test_dead_letters_after_max_retries():
+    sink = FlakySink(failures=100)
+    dispatcher = _dispatcher(sink, max_retries=2)
+
+    async def run():
+        receipt = dispatcher.enqueue("slack", ["#ops", "#mgmt"], "Cyclone in Mumbai", "high")
+        await dispatcher.close()
+        return receipt
+
+    receipt = asyncio.run(run())
+
+    assert sink.attempts == 6  # 3 attempts for each of 2 recipients
+    assert dispatcher.stats["retries"] == 4
+    assert dispatcher.stats["failed_notifications"] == 2
+    assert [d["delivery"]["recipient"] for d in dispatcher.dead_letters] == ["#ops", "#mgmt"]
+    assert dispatcher.dead_letters[0]["delivery"]["notification_ids"] == [receipt["notification_id"]]
+
+
+def test_full_queue_drops_and_unknown_channel_is_refused():
+    dispatcher = _dispatcher(FlakySink(failures=0), max_queue=1)
+
+    async def run():
+        first = dispatcher.enqueue("slack", ["#ops"], "one", "info")
+        second = dispatcher.enqueue("slack", ["#ops"], "two", "info")
+        other = dispatcher.enqueue("pager", ["oncall"], "three", "info")
+        await dispatcher.close()
+        return first, second, other
+
+    first, second, other = asyncio.run(run())
+
+    assert (first["status"], second["status"], other["status"]) == ("queued", "dropped", "unsupported_channel")
+    assert dispatcher.stats["dropped"] == 1
+
+
+def test_stub_sinks_keep_only_recent_deliveries():
+    webhook = StubWebhookSink(max_kept=3)
+    smtp = StubSMTPSink(max_kept=3)
+
+    async def run():
+        for i in range(5):
+            delivery = {"recipient": "#ops", "severity": "info", "messages": [f"update {i}"]}
+            await webhook.deliver(delivery)
+            await smtp.deliver(delivery)
+
+    asyncio.run(run())
+
+    assert [r["payload"]["text"] for r in webhook.received] == ["update 2", "update 3", "update 4"]
+    assert [m.get_content().strip() for m in smtp.outbox] == ["update 2", "update 3", "update 4"]
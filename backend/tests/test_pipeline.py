@@ -0,0 +1,44 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from main import app
+
+client = TestClient(app)
+
+
+def test_pipeline_runs_the_workflow():
+    response = client.post("/pipeline", json={
+        "product_sku": "RC-FULL-NVY-M", "region": "Mumbai", "event_type": "cyclone", "notify": False,
+    })
+
+    assert response.status_code == 200
+    state = response.json()
+    assert state["spike_detected"] is True
+    assert state["product_sku"] == "RC-FULL-NVY-M"
+
+
+def test_unknown_product_is_rejected_with_the_service_message():
+    response = client.post("/pipeline", json={"product_sku": "NOPE-1", "region": "Mumbai"})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Product NOPE-1 not found"}
+
+
+def test_unknown_region_is_rejected():
+    response = client.post("/pipeline", json={"product_sku": "RC-FULL-NVY-M", "region": "Atlantis"})
+
+    assert response.status_code == 422
+    assert response.json() == {"detail": "Warehouse not found for Atlantis"}
+
+
+def test_batch_reports_failed_items_in_their_own_line():
+    response = client.post("/api/pipeline/batch", json={"ordered": True, "items": [
+        {"product_sku": "RC-FULL-NVY-M", "region": "Mumbai", "notify": False},
+        {"product_sku": "NOPE-1", "region": "Mumbai"},
+    ]})
+
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows[0]["result"]["product_sku"] == "RC-FULL-NVY-M"
+    assert rows[1]["result"] == {"status": "error", "message": "Product NOPE-1 not found"}
+    assert rows[2]["errors"] == 1
@@ -0,0 +1,103 @@
+import asyncio
+
+from google.adk.events.event import Event
+from google.adk.events.event_actions import EventActions
+from google.genai import types
+
+from src.utils.sessions import TieredSessionService
+
+
+def _text(author: str, text: str) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(author=author, content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+
+def _tool_call(n: int) -> Event:
+    return Event(
+        author="InventoryAgent",
+        content=types.Content(role="model", parts=[
+            types.Part(text=f"Checking stock {n}"),
+            types.Part(function_call=types.FunctionCall(id=f"call-{n}", name="optimize_inventory", args={})),
+        ]),
+    )
+
+
+def _tool_response(n: int) -> Event:
+    return Event(
+        author="InventoryAgent",
+        content=types.Content(role="user", parts=[types.Part(function_response=types.FunctionResponse(
+            id=f"call-{n}", name="optimize_inventory", response={"gap": n},
+        ))]),
+        actions=EventActions(state_delta={"gap": n}),
+    )
+
+
+def _turn(n: int):
+    return [
+        _text("user", f"question {n}"),
+        _tool_call(n),
+        _tool_response(n),
+        _text("InventoryAgent", f"answer {n}"),
+    ]
+
+
+async def _session_with_turns(service: TieredSessionService, turns: int):
+    session = await service.create_session(app_name="app", user_id="u", session_id="s")
+    for n in range(turns):
+        for event in _turn(n):
+            await service.append_event(session, event)
+    return service._hot[("app", "u", "s")]
+
+
+def _describe(event: Event) -> str:
+    if event.get_function_calls():
+        return "call"
+    if event.get_function_responses():
+        return "response"
+    return "".join(p.text or "" for p in event.content.parts)
+
+
+def _texts(events):
+    return [_describe(e) for e in events]
+
+
+def test_compaction_keeps_conversation_text(tmp_path):
+    service = TieredSessionService(tmp_path / "sessions.sqlite3", keep_events=4)
+
+    async def run():
+        resident = await _session_with_turns(service, 3)
+        changed = service.compact(resident)
+        return resident, changed
+
+    resident, changed = asyncio.run(run())
+
+    # Turns 0 and 1: tool responses dropped, tool calls trimmed to their text
+    assert changed == 4
+    assert _texts(resident.session.events) == [
+        "question 0", "Checking stock 0", "answer 0",
+        "question 1", "Checking stock 1", "answer 1",
+        "question 2", "call", "response", "answer 2",
+    ]
+    assert resident.compacted == 2
+    assert resident.session.state["gap"] == 2
+
+
+def test_compaction_is_idempotent_and_survives_reload(tmp_path):
+    path = tmp_path / "sessions.sqlite3"
+    service = TieredSessionService(path, keep_events=4)
+
+    async def run():
+        resident = await _session_with_turns(service, 3)
+        service.compact(resident)
+        again = service.compact(resident)
+        await service.flush()
+        reloaded = await TieredSessionService(path, keep_events=4).get_session(
+            app_name="app", user_id="u", session_id="s"
+        )
+        return resident, again, reloaded
+
+    resident, again, reloaded = asyncio.run(run())
+
+    assert again == 0
+    assert _texts(reloaded.events) == _texts(resident.session.events)
+    assert reloaded.state["gap"] == 2
@@ -0,0 +1,68 @@
+import json
+import time
+
+from src.utils.trace import TraceSpill
+
+
+def _wait_written(*spills: TraceSpill, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while any(spill._pending for spill in spills):
+        assert time.monotonic() < deadline, "spill writer did not catch up"
+        time.sleep(0.005)
+
+
+def test_entries_are_found_before_and_after_writing(tmp_path):
+    spill = TraceSpill(tmp_path / "payloads.jsonl")
+    trace_id, size = spill.append({"tool": "forecast_demand", "output": {"peak": 96}})
+
+    assert spill.get(trace_id)["output"] == {"peak": 96}
+    _wait_written(spill)
+    assert spill.get(trace_id)["output"] == {"peak": 96}
+    assert size == (tmp_path / "payloads.jsonl").stat().st_size
+
+
+def test_unknown_id_is_not_found_without_reading_payloads(tmp_path, monkeypatch):
+    spill = TraceSpill(tmp_path / "payloads.jsonl")
+    spill.append({"tool": "forecast_demand", "output": "x" * 1000})
+    _wait_written(spill)
+
+    real_open = open
+    opened = []
+
+    def tracking_open(path, *args, **kwargs):
+        opened.append(str(path))
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("builtins.open", tracking_open)
+    assert spill.get("TRC-does-not-exist") is None
+    assert str(tmp_path / "payloads.jsonl") not in opened
+
+
+def test_processes_sharing_a_file_read_each_others_entries(tmp_path):
+    writer = TraceSpill(tmp_path / "payloads.jsonl")
+    reader = TraceSpill(tmp_path / "payloads.jsonl")
+    ids = [writer.append({"n": n})[0] for n in range(20)]
+    _wait_written(writer)
+
+    assert [reader.get(trace_id)["n"] for trace_id in ids] == list(range(20))
+
+
+def test_rotation_keeps_the_previous_file(tmp_path):
+    path = tmp_path / "payloads.jsonl"
+    spill = TraceSpill(path, max_bytes=2000)
+    other = TraceSpill(path, max_bytes=2000)  # reads nothing while the files rotate
+    ids = []
+    for n in range(30):
+        ids.append(spill.append({"n": n, "pad": "x" * 200})[0])
+        _wait_written(spill)
+
+    on_disk = {
+        file: [json.loads(line)["trace_id"] for line in file.read_text().splitlines()]
+        for file in (path, tmp_path / "payloads.jsonl.1")
+    }
+    assert all(on_disk.values()), "expected entries in both files"
+    kept = on_disk[path] + on_disk[tmp_path / "payloads.jsonl.1"]
+    reopened = TraceSpill(path, max_bytes=2000)
+    for reader in (spill, other, reopened):
+        assert {trace_id for trace_id in ids if reader.get(trace_id)} == set(kept)
+    assert spill.get(ids[0]) is None  # rotated out
@@ -1,4 +1,4 @@
-import { AgentState } from "@/lib/types";
+import { AgentState, workflowState } from "@/lib/types";
 import {
   useCoAgent,
 } from "@copilotkit/react-core";
@@ -13,7 +13,7 @@ export function WorkflowDebugger() {
     name: "cognitive_supply_network_agent",
   });
 
-  const wf = state?.workflow_state;
+  const wf = workflowState(state);
 
   if (!wf) {
     return (
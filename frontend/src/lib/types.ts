@@ -4,36 +4,83 @@ export interface ToolCardProps {
   isStreaming?: boolean;
 }
 
-export type AgentState = {
-  workflow_state?: {
-    product_sku?: string;
-    region?: string;
-    event_type?: string;
-
-    spike_detected?: boolean;
-    peak_demand?: number;
-    total_7day_demand?: number;
-    confidence?: number;
-
-    stock_levels?: Record<string, number>;
-    gap_size?: number;
-    reorder_needed?: boolean;
-
-    po_number?: string;
-    vendor_name?: string;
-    delivery_date?: string;
-
-    transfers?: object[];
-    routes?: Record<string, unknown>[];
-
-    alert_severity?: string;
-
-    execution_trace?: {
-      agent: string;
-      tool: string;
-      input: unknown;
-      output: unknown;
-      timestamp?: string;
-    }[];
-  };
+export type TraceEntry = {
+  trace_id?: string;
+  seq?: number;
+  agent: string;
+  tool: string;
+  input: unknown;
+  output: unknown;
+  duration_ms?: number;
+  timestamp?: string;
 };
+
+export type WorkflowState = {
+  product_sku?: string;
+  region?: string;
+  event_type?: string;
+
+  spike_detected?: boolean;
+  spike_multiplier?: number;
+  peak_demand?: number;
+  peak_date?: string;
+  total_7day_demand?: number;
+  confidence?: number;
+
+  stock_levels?: Record<string, number>;
+  current_stock?: number;
+  gap_size?: number;
+  reorder_needed?: boolean;
+  reorder_quantity?: number;
+
+  po_number?: string;
+  vendor_name?: string;
+  unit_price?: number;
+  vendor_total_cost?: number;
+  delivery_date?: string;
+
+  transfers?: object[];
+  routes?: Record<string, unknown>[];
+  routing_total_cost?: number;
+  earliest_delivery?: string;
+
+  alert_id?: string;
+  alert_severity?: string;
+
+  // forecast, factors, warehouses, products, purchase_order and consolidation
+  // arrive as JSON-encoded strings (decoded lazily on the backend).
+
+  // Bounded to the most recent entries; large payloads are summarised.
+  // Full input/output: GET /execution-trace/{trace_id} on the backend.
+  execution_trace?: TraceEntry[];
+};
+
+// The backend stores each workflow field under its own key ("wf.<field>")
+// and the trace in ring slots ("wf_trace.<n>"), so tool calls only stream
+// deltas for what changed. workflowState() reassembles the nested view.
+export type AgentState = Record<string, unknown>;
+
+const FIELD_PREFIX = "wf.";
+const TRACE_PREFIX = "wf_trace.";
+
+export function workflowState(state?: AgentState): WorkflowState | undefined {
+  if (!state) return undefined;
+
+  const wf: Record<string, unknown> = {};
+  const trace: TraceEntry[] = [];
+  let found = false;
+
+  for (const [key, value] of Object.entries(state)) {
+    if (key.startsWith(FIELD_PREFIX)) {
+      wf[key.slice(FIELD_PREFIX.length)] = value ?? undefined;
+      found = true;
+    } else if (key.startsWith(TRACE_PREFIX) && value) {
+      trace.push(value as TraceEntry);
+      found = true;
+    }
+  }
+  if (!found) return undefined;
+
+  trace.sort((a, b) => (a.seq ?? 0) - (b.seq ?? 0));
+  return { ...(wf as WorkflowState), execution_trace: trace };
+}